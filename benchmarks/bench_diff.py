@@ -0,0 +1,72 @@
+"""
+文件差异基准测试
+
+对比 difflib.unified_diff 与 diff_files 所用的哈希行 patience/Myers 实现
+在大文件分散修改、以及大量重复行两种场景下的耗时。
+
+运行方式：
+    python benchmarks/bench_diff.py [行数]
+"""
+
+import difflib
+import random
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from server.tools.diff import unified_diff  # noqa: E402
+
+
+def scattered_edits(lines: int) -> tuple[list[str], list[str]]:
+    """源码风格的文件，约 1% 的行被修改、插入或删除"""
+    rng = random.Random(42)
+    before = [f"    value_{i} = compute({rng.randint(0, 10**6)})\n" for i in range(lines)]
+    after = list(before)
+    for _ in range(lines // 100):
+        position = rng.randrange(len(after))
+        action = rng.choice(("edit", "insert", "delete"))
+        if action == "edit":
+            after[position] = f"    edited = {rng.random()}\n"
+        elif action == "insert":
+            after.insert(position, f"    inserted = {rng.random()}\n")
+        else:
+            del after[position]
+    return before, after
+
+
+def repetitive(lines: int) -> tuple[list[str], list[str]]:
+    """
+    由少量重复行组成（日志、CSV 等）：每行重复次数低于 difflib 的 autojunk
+    阈值，difflib 的最长匹配查找退化为接近平方复杂度
+    """
+    rng = random.Random(7)
+    vocabulary = [f"status=ok code={i}\n" for i in range(max(lines // 200, 1))]
+    before = [rng.choice(vocabulary) for _ in range(lines)]
+    after = [line if rng.random() > 0.01 else rng.choice(vocabulary) for line in before]
+    return before, after
+
+
+def measure(func: Callable[..., Any], *args: Any) -> tuple[Any, float]:
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    for name, make in (("scattered", scattered_edits), ("repetitive", repetitive)):
+        before, after = make(lines)
+        legacy, legacy_time = measure(lambda a, b: list(difflib.unified_diff(a, b, "a", "b")), before, after)
+        result, new_time = measure(unified_diff, before, after, "a", "b")
+        legacy_changes = sum(1 for line in legacy if line[:1] in "+-" and line[:3] not in ("+++", "---"))
+        print(f"{name:<11} lines: {lines}")
+        print(f"{'':<11} difflib: {legacy_time:6.2f} s  changed lines {legacy_changes}")
+        print(f"{'':<11} hashed:  {new_time:6.2f} s  changed lines {result['added'] + result['removed']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+文件工具事件循环阻塞基准测试
+
+模拟一次缓慢的存储读取（如 NFS），同时并发调用一个无关的快速工具，
+对比"在事件循环中同步执行"与"在文件 I/O 线程池中执行"时快速调用的延迟。
+
+运行方式：
+    python benchmarks/bench_file_io.py
+"""
+
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mcp.server.fastmcp import FastMCP  # noqa: E402
+
+from server.tools import file_operations  # noqa: E402
+
+SLOW_READ_SECONDS = 0.5
+FAST_CALLS = 20
+
+
+def slow_read(path: Path) -> str:
+    """模拟慢速存储上的阻塞读取"""
+    time.sleep(SLOW_READ_SECONDS)
+    return path.read_text(encoding="utf-8")
+
+
+async def measure(mcp: FastMCP, path: Path, offloaded: bool) -> list[float]:
+    """在慢速读取进行期间测量快速工具调用的延迟"""
+
+    async def slow_call() -> str:
+        if offloaded:
+            return await file_operations.run_in_io_pool(slow_read, path)
+        return slow_read(path)
+
+    async def fast_call(issued_at: float) -> float:
+        await mcp._tool_manager.call_tool("file_info", {"file_path": path.name})
+        return time.perf_counter() - issued_at
+
+    # 慢速读取与快速调用同时发出，延迟从发出时刻开始计算
+    issued_at = time.perf_counter()
+    slow_task = asyncio.create_task(slow_call())
+    latencies = await asyncio.gather(*(fast_call(issued_at) for _ in range(FAST_CALLS)))
+    await slow_task
+    return list(latencies)
+
+
+async def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        file_operations.SAFE_DIR = Path(tmp)
+        mcp = FastMCP("bench")
+        file_operations.register_file_tools(mcp)
+        path = Path(tmp) / "data.txt"
+        path.write_text("x" * 1024, encoding="utf-8")
+
+        for label, offloaded in (("inline (blocking)", False), ("io thread pool", True)):
+            latencies = await measure(mcp, path, offloaded)
+            print(
+                f"{label:<20} fast-call latency: "
+                f"p50={statistics.median(latencies) * 1000:8.2f} ms  "
+                f"max={max(latencies) * 1000:8.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
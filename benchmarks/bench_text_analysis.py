@@ -0,0 +1,104 @@
+"""
+文本分析基准测试
+
+对比 count_words / text_statistics 的原始多遍实现与单遍 TextAnalyzer
+在大文本上的耗时与峰值内存（tracemalloc）。
+
+运行方式：
+    python benchmarks/bench_text_analysis.py [文本大小MB]
+"""
+
+import random
+import re
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from server.tools.text_processing import analyze_text  # noqa: E402
+
+
+def legacy_count_words(text: str) -> dict[str, int]:
+    """原始 count_words 实现"""
+    return {
+        "words": len(text.split()),
+        "characters": len(text),
+        "characters_no_spaces": len(text.replace(" ", "")),
+        "lines": len(text.split("\n"))
+    }
+
+
+def legacy_text_statistics(text: str) -> dict[str, Any]:
+    """原始 text_statistics 实现"""
+    words = text.split()
+    sentences = re.split(r'[.!?]+', text)
+    sentences = [s.strip() for s in sentences if s.strip()]
+    total_word_length = sum(len(word) for word in words)
+    avg_word_length = total_word_length / len(words) if words else 0
+    total_sentence_length = sum(len(sentence.split()) for sentence in sentences)
+    avg_sentence_length = total_sentence_length / len(sentences) if sentences else 0
+    return {
+        "total_characters": len(text),
+        "total_words": len(words),
+        "total_sentences": len(sentences),
+        "average_word_length": round(avg_word_length, 2),
+        "average_sentence_length": round(avg_sentence_length, 2),
+        "unique_words": len({word.lower() for word in words}),
+        "reading_time_minutes": round(len(words) / 200, 1)
+    }
+
+
+def make_text(size_mb: float) -> str:
+    """生成带句子标点和换行的随机英文文本"""
+    rng = random.Random(42)
+    vocabulary = [
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 10)))
+        for _ in range(20000)
+    ]
+    parts = []
+    size = 0
+    target = int(size_mb * 1024 * 1024)
+    while size < target:
+        sentence = " ".join(rng.choices(vocabulary, k=rng.randint(5, 20)))
+        sentence = sentence.capitalize() + rng.choice([". ", "! ", "? ", ".\n"])
+        parts.append(sentence)
+        size += len(sentence)
+    return "".join(parts)
+
+
+def measure(func: Callable[[str], Any], text: str) -> tuple[Any, float, float]:
+    """返回 (结果, 耗时秒, 峰值内存 MB)；耗时与内存分开测量，避免 tracemalloc 影响计时"""
+    start = time.perf_counter()
+    result = func(text)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+
+def main() -> None:
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 20
+    text = make_text(size_mb)
+    print(f"text size: {len(text) / 1024 / 1024:.1f} M chars")
+
+    cases = [
+        ("count_words", legacy_count_words, lambda t: analyze_text(t, statistics=False).word_counts()),
+        ("text_statistics", legacy_text_statistics, lambda t: analyze_text(t).statistics()),
+    ]
+    for name, legacy, single_pass in cases:
+        expected, legacy_time, legacy_peak = measure(legacy, text)
+        actual, new_time, new_peak = measure(single_pass, text)
+        assert actual == expected, f"{name} results differ"
+        print(f"{name:<16} legacy: {legacy_time:6.2f} s  peak {legacy_peak:8.1f} MB")
+        print(f"{'':<16} single: {new_time:6.2f} s  peak {new_peak:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
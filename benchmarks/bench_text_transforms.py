@@ -0,0 +1,97 @@
+"""
+文本转换微基准测试
+
+对比 clean_text / generate_slug / convert_case 的原始正则实现与转换表实现
+在短标题与长文本上的单次调用耗时。
+
+generate_slug 的 unicode 一行不可直接比较：原始实现丢弃全部非 ASCII 字符，
+新实现需要做 Unicode 分解与转写，这一行只用于观察非 ASCII 路径的开销。
+
+运行方式：
+    python benchmarks/bench_text_transforms.py [重复次数]
+"""
+
+import random
+import re
+import sys
+import timeit
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from server.tools.text_processing import (  # noqa: E402
+    _clean_text,
+    _convert_case,
+    _generate_slug,
+)
+
+
+def legacy_clean_text(text: str) -> str:
+    """原始 clean_text 实现"""
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def legacy_generate_slug(text: str) -> str:
+    """原始 generate_slug 实现"""
+    slug = text.lower()
+    slug = re.sub(r'[^a-z0-9]+', '-', slug)
+    return slug.strip('-')
+
+
+def legacy_convert_case(text: str, case_type: str) -> str:
+    """原始 convert_case 实现"""
+    case_type = case_type.lower()
+    if case_type == "upper":
+        return text.upper()
+    elif case_type == "lower":
+        return text.lower()
+    elif case_type == "title":
+        return text.title()
+    elif case_type == "capitalize":
+        return text.capitalize()
+    raise ValueError("Invalid case_type")
+
+
+def make_titles(count: int) -> list[str]:
+    """生成带标点与多余空白的英文短标题"""
+    rng = random.Random(42)
+    words = ["Hello", "world", "MCP", "server", "fast", "path", "v2.0", "Q&A", "--", "tools!"]
+    return [
+        "  ".join(rng.choices(words, k=rng.randint(3, 10))) + rng.choice([" ", "\t", "?", ""])
+        for _ in range(count)
+    ]
+
+
+def per_call_ns(func: Callable[[str], Any], inputs: list[str], repeat: int) -> float:
+    """返回每次调用的平均耗时（纳秒），取多轮中的最小值"""
+    timings = timeit.repeat(lambda: [func(text) for text in inputs], number=1, repeat=repeat)
+    return min(timings) / len(inputs) * 1e9
+
+
+def main() -> None:
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    titles = make_titles(20000)
+    long_text = "\n".join(titles) * 20
+    unicode_titles = ["Café Crème brûlée", "你好 世界！Hello", "Straße Łódź", "한국어 제목"] * 5000
+
+    cases = [
+        ("clean_text", "titles", legacy_clean_text, _clean_text, titles),
+        ("clean_text", "long", legacy_clean_text, _clean_text, [long_text]),
+        ("generate_slug", "titles", legacy_generate_slug, _generate_slug, titles),
+        ("generate_slug", "unicode", legacy_generate_slug, _generate_slug, unicode_titles),
+        ("convert_case", "titles",
+         lambda t: legacy_convert_case(t, "title"), lambda t: _convert_case(t, "title"), titles),
+    ]
+    print(f"{'tool':<14} {'input':<8} {'legacy ns':>12} {'new ns':>12}")
+    for name, label, legacy, current, inputs in cases:
+        if label != "unicode":
+            assert [legacy(t) for t in inputs] == [current(t) for t in inputs], f"{name} results differ"
+        legacy_ns = per_call_ns(legacy, inputs, repeat)
+        new_ns = per_call_ns(current, inputs, repeat)
+        print(f"{name:<14} {label:<8} {legacy_ns:12.0f} {new_ns:12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -46,6 +46,40 @@ class Settings(BaseSettings):
     secret_key: str | None = Field(default=None, description="应用密钥")
     api_key: str | None = Field(default=None, description="API 密钥")
 
+    # 文件 I/O 线程池配置
+    file_io_max_workers: int = Field(default=8, ge=1, description="文件 I/O 线程池大小")
+    file_io_max_queue: int = Field(
+        default=64, ge=0, description="文件 I/O 最大排队任务数，超出后拒绝新请求"
+    )
+
+    file_cache_max_bytes: int = Field(
+        default=64 * 1024 * 1024, ge=0, description="文件读取缓存容量（字节），0 表示禁用"
+    )
+
+    # 正则执行配置
+    regex_timeout_seconds: float = Field(
+        default=2.0, gt=0, description="单次正则替换的时间预算（秒），超时终止工作进程"
+    )
+    regex_max_workers: int = Field(default=2, ge=1, description="正则工作进程数量")
+    text_batch_max_workers: int = Field(default=4, ge=1, description="批量文本处理进程池大小")
+
+    # 全文检索配置
+    search_index_dir: str | None = Field(
+        default=None, description="全文索引存放目录，默认为工作目录同级的 .search_index"
+    )
+    search_refresh_interval: float = Field(
+        default=2.0, ge=0, description="检索前重新扫描工作目录的最小间隔（秒），0 表示每次都扫描"
+    )
+
+    # 表达式求值配置
+    eval_timeout_seconds: float = Field(
+        default=2.0, gt=0, description="evaluate 工具单次调用的时间预算（秒）"
+    )
+    eval_max_exponent: float = Field(default=1000, gt=0, description="表达式中允许的最大指数绝对值")
+    compute_max_workers: int = Field(
+        default=4, ge=1, description="纯计算工具线程池大小，与文件 I/O 线程池分开"
+    )
+
     # 数据库配置（可选）
     database_url: str | None = Field(default=None, description="数据库连接URL")
 
@@ -2,28 +2,47 @@
 数据分析提示模块
 
 提供数据分析和处理相关的 MCP 提示模板。
+传入工作目录中的数据集路径时，提示会嵌入该文件的紧凑列画像，
+无需再粘贴样例行。
 """
 
 from mcp.server.fastmcp import FastMCP
 
+from ..tools.datasets import format_profile, load_profile
+from ..tools.file_operations import offload_io
+
+
+def _profile_section(file_path: str) -> str:
+    """生成嵌入提示的数据集画像段落；未提供路径时返回空字符串"""
+    if not file_path:
+        return ""
+    profile, _ = load_profile(file_path)
+    return f"""
+**Dataset Profile ({file_path}):**
+{format_profile(profile)}
+"""
+
 
 def register_analysis_prompts(mcp: FastMCP) -> None:
     """注册数据分析相关的提示模板"""
 
     @mcp.prompt(title="Data Analysis")
-    def data_analysis(data_description: str, analysis_goals: str = "") -> str:
+    @offload_io
+    def data_analysis(data_description: str, analysis_goals: str = "", file_path: str = "") -> str:
         """
         Generate a prompt for comprehensive data analysis.
         
         Args:
             data_description: Description of the dataset
             analysis_goals: Specific analysis objectives
+            file_path: Workspace CSV/JSONL file whose column profile is embedded
         """
         prompt = f"""Please conduct a comprehensive analysis of the following dataset:
 
 **Dataset Description:**
 {data_description}
 """
+        prompt += _profile_section(file_path)
 
         if analysis_goals:
             prompt += f"""
@@ -71,13 +90,15 @@ Please provide specific, data-driven insights with supporting evidence."""
         return prompt
 
     @mcp.prompt(title="Statistical Analysis")
-    def statistical_analysis(hypothesis: str, data_info: str) -> str:
+    @offload_io
+    def statistical_analysis(hypothesis: str, data_info: str, file_path: str = "") -> str:
         """
         Generate a prompt for statistical hypothesis testing.
         
         Args:
             hypothesis: The hypothesis to test
             data_info: Information about the available data
+            file_path: Workspace CSV/JSONL file whose column profile is embedded
         """
         return f"""Please design and conduct a statistical analysis to test the following hypothesis:
 
@@ -86,7 +107,7 @@ Please provide specific, data-driven insights with supporting evidence."""
 
 **Available Data:**
 {data_info}
-
+{_profile_section(file_path)}
 Please provide:
 
 1. **Hypothesis Formulation**:
@@ -184,18 +205,20 @@ Please provide a comprehensive modeling strategy with practical recommendations.
         return prompt
 
     @mcp.prompt(title="Data Quality Assessment")
-    def data_quality_assessment(dataset_info: str) -> str:
+    @offload_io
+    def data_quality_assessment(dataset_info: str, file_path: str = "") -> str:
         """
         Generate a prompt for data quality evaluation.
         
         Args:
             dataset_info: Information about the dataset to assess
+            file_path: Workspace CSV/JSONL file whose column profile is embedded
         """
         return f"""Please conduct a comprehensive data quality assessment for the following dataset:
 
 **Dataset Information:**
 {dataset_info}
-
+{_profile_section(file_path)}
 Please evaluate and report on:
 
 1. **Completeness**:
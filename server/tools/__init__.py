@@ -10,7 +10,11 @@ import logging
 from mcp.server.fastmcp import FastMCP
 
 from .calculator import register_calculator_tools
+from .datasets import register_dataset_tools
+from .diff import register_diff_tools
 from .file_operations import register_file_tools
+from .search import register_search_tools
+from .similarity import register_similarity_tools
 from .text_processing import register_text_tools
 
 logger = logging.getLogger(__name__)
@@ -29,4 +33,16 @@ def register_tools(mcp: FastMCP) -> None:
     # 注册文件操作工具
     register_file_tools(mcp)
 
+    # 注册全文检索工具
+    register_search_tools(mcp)
+
+    # 注册相似文档检测工具
+    register_similarity_tools(mcp)
+
+    # 注册文件差异工具
+    register_diff_tools(mcp)
+
+    # 注册数据集工具
+    register_dataset_tools(mcp)
+
     logger.info("All MCP tools registered successfully")
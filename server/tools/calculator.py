@@ -4,10 +4,522 @@
 提供基础数学计算功能的 MCP 工具。
 """
 
+import ast
+import asyncio
+import functools
 import math
+import operator
+import re
+import threading
+import time
+from array import array
+from collections.abc import Awaitable, Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from itertools import pairwise, repeat
+from typing import Any, Literal, TypeVar
 
 from mcp.server.fastmcp import FastMCP
 
+from ..config import settings
+from .file_operations import offload_io
+from .text_processing import iter_text_chunks
+
+np: Any
+try:
+    import numpy as np
+except ImportError:  # NumPy 为可选依赖，未安装时使用 array/math 实现
+    np = None
+
+VectorOperation = Literal["add", "subtract", "multiply", "divide", "power", "sqrt", "percentage"]
+
+# 纯 Python 实现的二元运算
+_BINARY_OPERATIONS: dict[str, Callable[[float, float], float]] = {
+    "add": operator.add,
+    "subtract": operator.sub,
+    "multiply": operator.mul,
+    "divide": operator.truediv,
+    "power": operator.pow,
+    "percentage": lambda value, percentage: value * percentage / 100,
+}
+
+
+def _as_operand(values: list[float] | float) -> array | float:
+    """列表转为紧凑的 double 数组，标量原样返回"""
+    return array("d", values) if isinstance(values, list) else float(values)
+
+
+def _broadcast_length(a: array | float, b: array | float | None) -> int:
+    """按广播规则确定结果长度：两个数组长度必须一致，标量与任意长度兼容"""
+    lengths = {len(operand) for operand in (a, b) if isinstance(operand, array)}
+    if len(lengths) > 1:
+        raise ValueError(f"Array lengths do not match: {sorted(lengths)}")
+    return lengths.pop() if lengths else 1
+
+
+def _vector_python(operation: str, a: array | float, b: array | float | None, length: int) -> list[float]:
+    """array/math 实现，标量通过 itertools.repeat 广播"""
+    left = a if isinstance(a, array) else repeat(a, length)
+    try:
+        if operation == "sqrt":
+            result = list(map(math.sqrt, left))
+        else:
+            right = b if isinstance(b, array) else repeat(b, length)
+            result = list(map(_BINARY_OPERATIONS[operation], left, right))
+    except (OverflowError, ZeroDivisionError):
+        # 0 的负数次幂在 Python 中抛出 ZeroDivisionError，NumPy 中得到 inf
+        raise ValueError("Result is not a finite real number") from None
+    # 与 NumPy 实现一致：inf/nan 或复数结果（负数的分数次幂）都视为错误
+    if any(isinstance(value, complex) or not math.isfinite(value) for value in result):
+        raise ValueError("Result is not a finite real number")
+    return result
+
+
+def _vector_numpy(operation: str, a: array | float, b: array | float | None) -> list[float]:
+    """NumPy 实现，一次 ufunc 调用完成整个数组"""
+    x = np.frombuffer(a, dtype=np.float64) if isinstance(a, array) else np.float64(a)
+    with np.errstate(all="ignore"):
+        if operation == "sqrt":
+            result = np.sqrt(x)
+        else:
+            y = np.frombuffer(b, dtype=np.float64) if isinstance(b, array) else np.float64(b)
+            if operation == "percentage":
+                result = x * y / 100
+            else:
+                ufuncs = {
+                    "add": np.add,
+                    "subtract": np.subtract,
+                    "multiply": np.multiply,
+                    "divide": np.divide,
+                    "power": np.power,
+                }
+                result = ufuncs[operation](x, y)
+    result = np.atleast_1d(result)
+    if not np.isfinite(result).all():
+        raise ValueError("Result is not a finite real number")
+    return result.tolist()  # type: ignore[no-any-return]
+
+
+def vector_apply(
+    operation: str,
+    a: list[float] | float,
+    b: list[float] | float | None = None,
+) -> list[float]:
+    """
+    对数组逐元素执行运算，支持数组与标量之间的广播。
+
+    已安装 NumPy 时使用向量化 ufunc，否则退回 array/math 实现；两者的
+    参数校验与错误信息一致。
+    """
+    if operation != "sqrt" and operation not in _BINARY_OPERATIONS:
+        raise ValueError(f"Invalid operation: {operation}")
+    if operation == "sqrt":
+        if b is not None:
+            raise ValueError("sqrt takes a single operand")
+    elif b is None:
+        raise ValueError(f"{operation} requires a second operand")
+
+    left = _as_operand(a)
+    right = _as_operand(b) if b is not None else None
+    length = _broadcast_length(left, right)
+
+    if operation == "divide" and (0.0 in right if isinstance(right, array) else right == 0):
+        raise ValueError("Cannot divide by zero")
+    if operation == "sqrt" and (any(value < 0 for value in left) if isinstance(left, array) else left < 0):
+        raise ValueError("Cannot calculate square root of negative number")
+
+    if np is not None:
+        return _vector_numpy(operation, left, right)
+    return _vector_python(operation, left, right, length)
+
+
+class TDigest:
+    """
+    合并式 t-digest 近似分位数摘要。
+
+    数据先进入缓冲区，满后与已有质心一起按均值排序，并按 k1 尺度函数合并：
+    两端（q 接近 0 或 1）的质心更小，中间更大，内存只与 compression 相关。
+    """
+
+    def __init__(self, compression: int = 100):
+        if compression < 10:
+            raise ValueError("compression must be >= 10")
+        self.compression = compression
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._centroids: list[tuple[float, float]] = []
+        self._buffer: list[tuple[float, float]] = []
+        self._buffer_limit = compression * 5
+
+    def add(self, value: float, weight: float = 1.0) -> None:
+        self._buffer.append((value, weight))
+        self.count += weight
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if len(self._buffer) >= self._buffer_limit:
+            self._compress()
+
+    def merge(self, other: "TDigest") -> None:
+        """并入另一个摘要（例如分组或并行计算的部分结果）"""
+        other._compress()
+        for mean, weight in other._centroids:
+            self.add(mean, weight)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def _k(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _k_inverse(self, k: float) -> float:
+        return (math.sin(k * 2 * math.pi / self.compression) + 1) / 2
+
+    def _compress(self) -> None:
+        if not self._buffer:
+            return
+        items = sorted(self._centroids + self._buffer)
+        self._buffer = []
+        total = self.count
+
+        merged = []
+        mean, weight = items[0]
+        seen = 0.0
+        q_limit = self._k_inverse(self._k(0.0) + 1)
+        for next_mean, next_weight in items[1:]:
+            if (seen + weight + next_weight) / total <= q_limit:
+                weight += next_weight
+                mean += (next_mean - mean) * next_weight / weight
+            else:
+                merged.append((mean, weight))
+                seen += weight
+                q_limit = self._k_inverse(min(self._k(seen / total) + 1, self.compression / 4))
+                mean, weight = next_mean, next_weight
+        merged.append((mean, weight))
+        self._centroids = merged
+
+    def quantile(self, q: float) -> float:
+        """返回近似分位数（0 <= q <= 1），质心之间线性插值"""
+        if not 0 <= q <= 1:
+            raise ValueError("Quantile must be between 0 and 1")
+        if not self.count:
+            raise ValueError("Cannot compute quantiles of an empty dataset")
+        self._compress()
+        centroids = self._centroids
+        if q == 0:
+            return self.min
+        if q == 1:
+            return self.max
+
+        target = q * self.count
+        first_mean, first_weight = centroids[0]
+        if target < first_weight / 2:
+            # 最小值与第一个质心中心之间
+            return self.min + (first_mean - self.min) * target / (first_weight / 2)
+
+        cumulative = 0.0
+        for (mean, weight), (next_mean, next_weight) in pairwise(centroids):
+            center = cumulative + weight / 2
+            next_center = cumulative + weight + next_weight / 2
+            if target < next_center:
+                return mean + (next_mean - mean) * (target - center) / (next_center - center)
+            cumulative += weight
+
+        last_mean, last_weight = centroids[-1]
+        remaining = self.count - target
+        return self.max - (self.max - last_mean) * remaining / (last_weight / 2)
+
+
+class RunningStats:
+    """
+    单遍流式描述统计：Welford 均值/方差、补偿求和、最值与 t-digest 近似分位数。
+
+    compression 为 None 时不维护 t-digest，适合只需要计数/求和/均值的大量分组。
+    """
+
+    def __init__(self, compression: int | None = 100):
+        self.count = 0
+        self.mean = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._m2 = 0.0
+        self._sum = 0.0
+        self._sum_error = 0.0
+        self.digest = TDigest(compression) if compression is not None else None
+
+    def add(self, value: float) -> None:
+        if not math.isfinite(value):
+            raise ValueError(f"Non-finite value: {value}")
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self._add_to_sum(value)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if self.digest is not None:
+            self.digest.add(value)
+
+    def _add_to_sum(self, value: float) -> None:
+        # Neumaier 补偿求和
+        total = self._sum + value
+        if abs(self._sum) >= abs(value):
+            self._sum_error += (self._sum - total) + value
+        else:
+            self._sum_error += (value - total) + self._sum
+        self._sum = total
+
+    @property
+    def sum(self) -> float:
+        return self._sum + self._sum_error
+
+    def update(self, values: Iterable[float]) -> "RunningStats":
+        for value in values:
+            self.add(value)
+        return self
+
+    def merge(self, other: "RunningStats") -> None:
+        """按 Chan 等人的并行公式合并另一份统计"""
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self._add_to_sum(other._sum)
+        self._add_to_sum(other._sum_error)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if self.digest is not None and other.digest is not None:
+            self.digest.merge(other.digest)
+
+    def variance(self, population: bool = False) -> float:
+        """样本方差（population=True 时为总体方差）"""
+        divisor = self.count if population else self.count - 1
+        return self._m2 / divisor if divisor > 0 else 0.0
+
+    def summary(self, quantiles: Iterable[float] = (0.25, 0.5, 0.75), population: bool = False) -> dict[str, Any]:
+        if not self.count:
+            raise ValueError("Cannot describe an empty dataset")
+        variance = self.variance(population)
+        result: dict[str, Any] = {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.mean,
+            "variance": variance,
+            "std": math.sqrt(variance),
+            "min": self.min,
+            "max": self.max,
+        }
+        if self.digest is not None:
+            result["quantiles"] = {f"p{q * 100:g}": self.digest.quantile(q) for q in quantiles}
+        return result
+
+
+# 数值文件中的分隔符：空白或逗号
+_NUMBER_SEPARATOR = re.compile(r'[\s,]+')
+
+
+def iter_numbers(chunks: Iterable[str]) -> Iterator[float]:
+    """从文本块中流式解析以空白或逗号分隔的数字，跨块的数字会被拼接"""
+    carry = ""
+    for chunk in chunks:
+        tokens = _NUMBER_SEPARATOR.split(carry + chunk)
+        carry = tokens.pop()
+        for token in tokens:
+            if token:
+                yield _parse_number(token)
+    if carry:
+        yield _parse_number(carry)
+
+
+def _parse_number(token: str) -> float:
+    try:
+        return float(token)
+    except ValueError:
+        raise ValueError(f"Invalid number: {token[:50]!r}") from None
+
+
+# 表达式的最大长度与语法树节点数
+EVAL_MAX_LENGTH = 2000
+EVAL_MAX_NODES = 500
+
+# 表达式中可调用的函数与常量
+_EVAL_FUNCTIONS: dict[str, Callable[..., float]] = {
+    name: getattr(math, name)
+    for name in (
+        "sqrt", "exp", "log", "log2", "log10", "sin", "cos", "tan", "asin", "acos", "atan",
+        "atan2", "sinh", "cosh", "tanh", "fabs", "hypot", "degrees", "radians",
+    )
+}
+# 返回整数的函数统一转为浮点数，避免后续运算落入大整数
+_EVAL_FUNCTIONS.update({
+    "floor": lambda x: float(math.floor(x)),
+    "ceil": lambda x: float(math.ceil(x)),
+    "round": lambda x, digits=0: float(round(x, int(digits))),
+    "abs": abs,
+    "min": min,
+    "max": max,
+})
+_EVAL_CONSTANTS = {"pi": math.pi, "e": math.e, "tau": math.tau}
+
+_EVAL_BINARY_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow)
+_EVAL_UNARY_OPERATORS = (ast.UAdd, ast.USub)
+
+
+def _safe_pow(base: float, exponent: float) -> float:
+    """带指数大小限制的乘方"""
+    if abs(exponent) > settings.eval_max_exponent:
+        raise ValueError(f"Exponent {exponent:g} exceeds the limit of {settings.eval_max_exponent:g}")
+    return base ** exponent  # type: ignore[no-any-return]
+
+
+_EVAL_GLOBALS: dict[str, Any] = {
+    "__builtins__": {},
+    "_pow": _safe_pow,
+    **_EVAL_FUNCTIONS,
+    **_EVAL_CONSTANTS,
+}
+
+
+class _ExpressionCompiler(ast.NodeTransformer):
+    """校验表达式只包含允许的运算，整数常量转为浮点数，乘方改写为 _pow 调用"""
+
+    def __init__(self) -> None:
+        self.variables: set[str] = set()
+
+    def generic_visit(self, node: ast.AST) -> ast.AST:
+        if not isinstance(node, (ast.Expression, ast.Load)):
+            raise ValueError(f"Unsupported syntax: {type(node).__name__}")
+        return super().generic_visit(node)
+
+    def visit_Constant(self, node: ast.Constant) -> ast.AST:
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ValueError(f"Unsupported constant: {node.value!r}")
+        return ast.copy_location(ast.Constant(float(node.value)), node)
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        if node.id.startswith("_") or node.id in _EVAL_FUNCTIONS:
+            raise ValueError(f"Invalid name: {node.id}")
+        if node.id not in _EVAL_CONSTANTS:
+            self.variables.add(node.id)
+        return node
+
+    def visit_UnaryOp(self, node: ast.UnaryOp) -> ast.AST:
+        if not isinstance(node.op, _EVAL_UNARY_OPERATORS):
+            raise ValueError(f"Unsupported operator: {type(node.op).__name__}")
+        node.operand = self.visit(node.operand)
+        return node
+
+    def visit_BinOp(self, node: ast.BinOp) -> ast.AST:
+        if not isinstance(node.op, _EVAL_BINARY_OPERATORS):
+            raise ValueError(f"Unsupported operator: {type(node.op).__name__}")
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        if isinstance(node.op, ast.Pow):
+            call = ast.Call(func=ast.Name("_pow", ast.Load()), args=[left, right], keywords=[])
+            return ast.copy_location(call, node)
+        node.left, node.right = left, right
+        return node
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        if not isinstance(node.func, ast.Name) or node.func.id not in _EVAL_FUNCTIONS:
+            raise ValueError("Only math functions can be called")
+        if node.keywords:
+            raise ValueError("Keyword arguments are not supported")
+        node.args = [self.visit(arg) for arg in node.args]
+        return node
+
+
+class CompiledExpression:
+    """编译后的表达式：代码对象及其需要的变量名"""
+
+    def __init__(self, expression: str):
+        if len(expression) > EVAL_MAX_LENGTH:
+            raise ValueError(f"Expression is longer than {EVAL_MAX_LENGTH} characters")
+        try:
+            tree = ast.parse(expression.strip(), mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"Invalid expression: {e.msg}") from e
+        if sum(1 for _ in ast.walk(tree)) > EVAL_MAX_NODES:
+            raise ValueError(f"Expression has more than {EVAL_MAX_NODES} nodes")
+
+        compiler = _ExpressionCompiler()
+        tree = ast.fix_missing_locations(compiler.visit(tree))
+        self.expression = expression
+        self.variables = frozenset(compiler.variables)
+        self._code = compile(tree, "<expression>", "eval")
+
+    def evaluate(self, variables: dict[str, float]) -> float:
+        missing = self.variables - variables.keys()
+        if missing:
+            raise ValueError(f"Missing variables: {', '.join(sorted(missing))}")
+        try:
+            result = eval(self._code, _EVAL_GLOBALS, variables)
+        except ZeroDivisionError:
+            raise ValueError("Cannot divide by zero") from None
+        except OverflowError:
+            raise ValueError("Result is not a finite real number") from None
+        except TypeError as e:
+            raise ValueError(f"Invalid function call: {e}") from e
+        if isinstance(result, complex) or not math.isfinite(result):
+            raise ValueError("Result is not a finite real number")
+        return float(result)
+
+
+@functools.lru_cache(maxsize=256)
+def compile_expression(expression: str) -> CompiledExpression:
+    """按表达式文本缓存编译结果"""
+    return CompiledExpression(expression)
+
+
+def evaluate_bindings(expression: str, bindings: Iterable[dict[str, float]]) -> list[float]:
+    """对多组变量绑定求值；超过 eval_timeout_seconds 时抛出 TimeoutError"""
+    compiled = compile_expression(expression)
+    deadline = time.monotonic() + settings.eval_timeout_seconds
+    results = []
+    for index, variables in enumerate(bindings):
+        # 单次求值没有循环，开销受表达式大小限制；按批检查时间即可
+        if not index % 256 and time.monotonic() > deadline:
+            raise TimeoutError(
+                f"Evaluation exceeded the {settings.eval_timeout_seconds}s time budget "
+                f"after {index} bindings"
+            )
+        results.append(compiled.evaluate(variables))
+    return results
+
+
+T = TypeVar("T")
+
+# 纯计算工具的线程池（首次使用时创建），与文件 I/O 线程池分开，不占用其排队配额
+_compute_executor: ThreadPoolExecutor | None = None
+_compute_lock = threading.Lock()
+
+
+def _get_compute_executor() -> ThreadPoolExecutor:
+    """获取纯计算工具使用的线程池"""
+    global _compute_executor
+    with _compute_lock:
+        if _compute_executor is None:
+            _compute_executor = ThreadPoolExecutor(
+                max_workers=settings.compute_max_workers,
+                thread_name_prefix="compute",
+            )
+        return _compute_executor
+
+
+def offload_compute(func: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+    """将同步计算工具包装为在计算线程池中执行的协程，保持原有签名"""
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        return await asyncio.wrap_future(_get_compute_executor().submit(func, *args, **kwargs))
+
+    return wrapper
+
 
 def register_calculator_tools(mcp: FastMCP) -> None:
     """注册计算器相关的工具"""
@@ -37,7 +549,8 @@ def register_calculator_tools(mcp: FastMCP) -> None:
     @mcp.tool(title="Calculate Power", description="Calculate a raised to the power of b")
     def power(a: float, b: float) -> float:
         """Calculate a raised to the power of b."""
-        return a ** b
+        result: float = a ** b
+        return result
 
     @mcp.tool(title="Calculate Square Root", description="Calculate square root of a number")
     def sqrt(x: float) -> float:
@@ -91,3 +604,107 @@ def register_calculator_tools(mcp: FastMCP) -> None:
         if not numbers:
             raise ValueError("Cannot calculate average of empty list")
         return sum(numbers) / len(numbers)
+
+    @mcp.tool(
+        title="Vector Calculate",
+        description="Apply add/subtract/multiply/divide/power/sqrt/percentage element-wise over arrays",
+    )
+    @offload_compute
+    def vector_calculate(
+        operation: VectorOperation,
+        a: list[float] | float,
+        b: list[float] | float | None = None,
+        round_digits: int | None = None,
+    ) -> dict[str, Any]:
+        """
+        Apply an arithmetic operation element-wise in a single call.
+
+        Either operand may be a list or a scalar; a scalar is broadcast
+        against the other list, while two lists must have the same length.
+        Uses NumPy when installed.
+
+        Args:
+            operation: add, subtract, multiply, divide, power, sqrt or percentage
+            a: First operand (value for percentage, x for sqrt)
+            b: Second operand (percentage for percentage, unused for sqrt)
+            round_digits: Round results to this many decimal places to keep responses compact
+        """
+        values = vector_apply(operation, a, b)
+        if round_digits is not None:
+            values = [round(value, round_digits) for value in values]
+        return {
+            "operation": operation,
+            "count": len(values),
+            "values": values,
+        }
+
+    @mcp.tool(
+        title="Describe Numbers",
+        description="Compute count, mean, variance, min/max and approximate quantiles in one pass",
+    )
+    @offload_io
+    def describe(
+        numbers: list[float] | None = None,
+        file_path: str | None = None,
+        quantiles: list[float] | None = None,
+        population: bool = False,
+        compression: int = 100,
+    ) -> dict[str, Any]:
+        """
+        Describe a dataset in a single streaming pass.
+
+        Mean and variance use Welford's algorithm; quantiles come from a
+        t-digest, so memory stays constant for arbitrarily large files.
+
+        Args:
+            numbers: Numbers to describe
+            file_path: Workspace file of numbers separated by whitespace or commas (streamed)
+            quantiles: Quantiles to estimate between 0 and 1 (default: 0.25, 0.5, 0.75)
+            population: Report population instead of sample variance
+            compression: t-digest compression; higher is more accurate and uses more memory
+        """
+        if (numbers is None) == (file_path is None):
+            raise ValueError("Provide either numbers or file_path")
+        quantiles = [0.25, 0.5, 0.75] if quantiles is None else quantiles
+        if any(not 0 <= q <= 1 for q in quantiles):
+            raise ValueError("Quantiles must be between 0 and 1")
+
+        values = numbers if numbers is not None else iter_numbers(iter_text_chunks(file_path=file_path))
+        return RunningStats(compression).update(values).summary(quantiles, population)
+
+    @mcp.tool(
+        title="Evaluate Expression",
+        description="Evaluate an arithmetic expression, optionally over many variable bindings",
+    )
+    @offload_compute
+    def evaluate(
+        expression: str,
+        variables: dict[str, float] | None = None,
+        bindings: list[dict[str, float]] | None = None,
+        round_digits: int | None = None,
+    ) -> dict[str, Any]:
+        """
+        Evaluate a formula such as "sqrt(a**2 + b**2) * 100 / total" in one call.
+
+        Only + - * / ** , unary signs, numbers, variables, the constants pi, e
+        and tau, and math functions (sqrt, exp, log, sin, ..., abs, min, max,
+        round) are allowed. Compiled expressions are cached; exponents and
+        total evaluation time are limited.
+
+        Args:
+            expression: Arithmetic expression to evaluate
+            variables: Variable values shared by every evaluation
+            bindings: List of variable sets; the expression is evaluated once per set
+            round_digits: Round results to this many decimal places
+        """
+        shared = variables or {}
+        if bindings is None:
+            results = evaluate_bindings(expression, [shared])
+        else:
+            results = evaluate_bindings(expression, ({**shared, **binding} for binding in bindings))
+        if round_digits is not None:
+            results = [round(value, round_digits) for value in results]
+
+        if bindings is None:
+            return {"expression": expression, "result": results[0]}
+        return {"expression": expression, "count": len(results), "results": results}
@@ -0,0 +1,545 @@
+"""
+数据集工具模块
+
+直接在服务端流式读取工作目录中的 CSV / JSON Lines 文件，只解析请求的列，
+返回分组聚合、列画像等体积与结果成正比的摘要，避免把整份数据传给客户端。
+"""
+
+import csv
+import json
+import math
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from collections.abc import Iterator
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Literal
+
+from mcp.server.fastmcp import FastMCP
+
+from .calculator import RunningStats
+from .file_operations import _get_safe_path, digest_cache, offload_io
+
+np: Any
+try:
+    import numpy as np
+except ImportError:  # NumPy 为可选依赖，未安装时使用纯 Python 分桶
+    np = None
+
+DatasetFormat = Literal["auto", "csv", "tsv", "jsonl"]
+
+# 按扩展名推断格式
+_FORMAT_BY_SUFFIX = {
+    ".csv": "csv",
+    ".tsv": "tsv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+}
+
+# 聚合结果最多允许的分组数
+AGGREGATE_MAX_GROUPS = 10000
+
+# 画像默认最多扫描的行数
+PROFILE_MAX_ROWS = 1_000_000
+
+# 画像缓存最多保留的条目数
+PROFILE_CACHE_MAX_ENTRIES = 128
+
+# 非数值列保留的高频值个数
+PROFILE_TOP_VALUES = 5
+
+# 视为空值的文本（不区分大小写）
+_NULL_TOKENS = frozenset({"", "null", "none", "na", "n/a", "nan"})
+
+_INTEGER = re.compile(r'[+-]?\d+')
+_DATE_PREFIX = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+
+def _resolve_dataset(file_path: str, fmt: str) -> tuple[Path, str]:
+    """校验路径并确定文件格式"""
+    path = _get_safe_path(file_path)
+    if not path.is_file():
+        raise FileNotFoundError(f"File {file_path} not found")
+    if fmt == "auto":
+        detected = _FORMAT_BY_SUFFIX.get(path.suffix.lower())
+        if detected is None:
+            raise ValueError(f"Cannot detect format of {file_path}; pass file_format explicitly")
+        fmt = detected
+    return path, fmt
+
+
+def _reject_json_array(line: str) -> None:
+    """首条记录以 [ 开头时说明是普通 JSON 数组而不是 JSON Lines"""
+    if line.lstrip().startswith("["):
+        raise ValueError("File is a JSON array, not JSON Lines; write one object per line")
+
+
+def read_columns(path: Path, fmt: str) -> list[str]:
+    """返回 CSV 的表头；JSON Lines 返回首条记录的键"""
+    with path.open("r", encoding="utf-8", newline="") as f:
+        if fmt == "jsonl":
+            for line in f:
+                if line.strip():
+                    _reject_json_array(line)
+                    record = json.loads(line)
+                    return list(record) if isinstance(record, dict) else []
+            return []
+        return next(csv.reader(f, delimiter="\t" if fmt == "tsv" else ","), [])
+
+
+def iter_rows(path: Path, fmt: str, columns: list[str] | None = None) -> Iterator[tuple[Any, ...]]:
+    """
+    流式产出每行中指定列的原始值（缺失为 None）；columns 为 None 时产出全部列。
+
+    CSV 按表头定位列，只从每行中取出需要的字段；JSON Lines 跳过空行，
+    非对象记录视为所有列缺失，整个文件是 JSON 数组时报错。
+    """
+    with path.open("r", encoding="utf-8", newline="") as f:
+        if fmt == "jsonl":
+            names = columns
+            first = True
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                if first:
+                    _reject_json_array(line)
+                    first = False
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Invalid JSON on line {line_no}: {e.msg}") from e
+                if not isinstance(record, dict):
+                    record = {}
+                if names is None:
+                    names = list(record)
+                yield tuple(record.get(name) for name in names)
+            return
+
+        reader = csv.reader(f, delimiter="\t" if fmt == "tsv" else ",")
+        header = next(reader, None)
+        if header is None:
+            return
+        names = header if columns is None else columns
+        missing = [name for name in names if name not in header]
+        if missing:
+            raise ValueError(f"Unknown columns: {', '.join(missing)}")
+        indices = [header.index(name) for name in names]
+        width = max(indices, default=-1) + 1
+        for row in reader:
+            if len(row) >= width:
+                yield tuple(row[index] for index in indices)
+            else:
+                yield tuple(row[index] if index < len(row) else None for index in indices)
+
+
+def to_number(value: Any) -> float | None:
+    """将单元格转换为有限浮点数；空值、布尔值与无法解析的内容返回 None"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        number = float(value)
+    else:
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return None
+    return number if math.isfinite(number) else None
+
+
+def _group_value(value: Any) -> Any:
+    """分组键中的值需可哈希；嵌套结构序列化为 JSON 文本"""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, sort_keys=True)
+    return value
+
+
+class _Group:
+    """单个分组的行数与各列的流式统计"""
+
+    __slots__ = ("rows", "stats")
+
+    def __init__(self, columns: int, compression: int | None):
+        self.rows = 0
+        self.stats = [RunningStats(compression) for _ in range(columns)]
+
+
+class HyperLogLog:
+    """
+    HyperLogLog 基数估计，2^precision 个单字节寄存器。
+
+    precision=12 时占用 4KB，标准误差约 1.6%；基数较小时使用线性计数修正。
+    值使用进程内的字符串哈希，估计结果可缓存，寄存器本身不跨进程复用。
+    """
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: str) -> None:
+        hashed = hash(value) & 0xFFFFFFFFFFFFFFFF
+        width = 64 - self.precision
+        rest = hashed & ((1 << width) - 1)
+        rank = width - rest.bit_length() + 1
+        index = hashed >> width
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -rank for rank in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+
+def _classify(value: Any) -> tuple[str, float | None]:
+    """推断单元格类型，返回 (类型, 数值)；数值仅对 integer/float 有意义"""
+    if value is None:
+        return "null", None
+    if isinstance(value, bool):
+        return "boolean", None
+    if isinstance(value, int):
+        return "integer", float(value)
+    if isinstance(value, float):
+        return ("float", value) if math.isfinite(value) else ("null", None)
+    if isinstance(value, dict):
+        return "object", None
+    if isinstance(value, list):
+        return "array", None
+
+    text = str(value).strip()
+    lowered = text.lower()
+    if lowered in _NULL_TOKENS:
+        return "null", None
+    if lowered in ("true", "false"):
+        return "boolean", None
+    if _INTEGER.fullmatch(text):
+        return "integer", float(text)
+    try:
+        number = float(text)
+    except ValueError:
+        pass
+    else:
+        return ("float", number) if math.isfinite(number) else ("null", None)
+    if _DATE_PREFIX.match(text):
+        try:
+            datetime.fromisoformat(text)
+            return "datetime", None
+        except ValueError:
+            pass
+    return "string", None
+
+
+def _infer_type(type_counts: dict[str, int]) -> str:
+    """由非空值的类型计数推断列类型；整数与浮点混合视为 float"""
+    kinds = set(type_counts) - {"null"}
+    if not kinds:
+        return "empty"
+    if kinds == {"integer", "float"}:
+        return "float"
+    if len(kinds) == 1:
+        return kinds.pop()
+    return "mixed"
+
+
+def _histogram(values: array, low: float, high: float, bins: int) -> list[int]:
+    """[low, high] 上的等宽直方图计数"""
+    if high == low:
+        return [len(values)] + [0] * (bins - 1)
+    if np is not None:
+        histogram, _ = np.histogram(np.frombuffer(values, dtype=np.float64), bins=bins, range=(low, high))
+        counts: list[int] = histogram.tolist()
+        return counts
+    counts = [0] * bins
+    scale = bins / (high - low)
+    last = bins - 1
+    for value in values:
+        counts[min(int((value - low) * scale), last)] += 1
+    return counts
+
+
+class _ColumnProfile:
+    """单列的画像状态：数值存入紧凑的 double 数组，其余值只保留草图"""
+
+    __slots__ = ("name", "type_counts", "sketch", "numbers", "stats", "top")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.type_counts: dict[str, int] = {}
+        self.sketch = HyperLogLog()
+        self.numbers = array("d")
+        self.stats = RunningStats(None)
+        # Misra-Gries 高频值摘要，计数为下界
+        self.top: dict[str, int] = {}
+
+    def add(self, value: Any) -> None:
+        kind, number = _classify(value)
+        self.type_counts[kind] = self.type_counts.get(kind, 0) + 1
+        if kind == "null":
+            return
+        text = json.dumps(value, sort_keys=True) if kind in ("object", "array") else str(value)
+        self.sketch.add(text)
+        if number is not None:
+            self.numbers.append(number)
+            self.stats.add(number)
+            return
+        top = self.top
+        if text in top:
+            top[text] += 1
+        elif len(top) < 4 * PROFILE_TOP_VALUES:
+            top[text] = 1
+        else:
+            for key in list(top):
+                top[key] -= 1
+                if not top[key]:
+                    del top[key]
+
+    def result(self, rows: int, bins: int) -> dict[str, Any]:
+        nulls = self.type_counts.get("null", 0)
+        profile: dict[str, Any] = {
+            "name": self.name,
+            "type": _infer_type(self.type_counts),
+            "type_counts": dict(sorted(self.type_counts.items())),
+            "null_rate": nulls / rows if rows else 0.0,
+            "distinct": self.sketch.count(),
+        }
+        if self.stats.count:
+            summary = self.stats.summary(())
+            summary.pop("variance")
+            summary.pop("sum")
+            profile["numeric"] = summary
+            profile["histogram"] = _histogram(self.numbers, self.stats.min, self.stats.max, bins)
+        if self.top:
+            ranked = sorted(self.top.items(), key=lambda item: (-item[1], item[0]))
+            profile["top_values"] = [
+                {"value": value, "count": count} for value, count in ranked[:PROFILE_TOP_VALUES]
+            ]
+        return profile
+
+
+def profile_rows(rows: Iterator[tuple[Any, ...]], columns: list[str], bins: int, max_rows: int) -> dict[str, Any]:
+    """单遍扫描行数据，计算各列的空值率、基数、类型与直方图"""
+    profiles = [_ColumnProfile(name) for name in columns]
+    count = 0
+    truncated = False
+    for values in rows:
+        if count >= max_rows:
+            truncated = True
+            break
+        count += 1
+        for profile, value in zip(profiles, values, strict=True):
+            profile.add(value)
+    return {
+        "rows": count,
+        "truncated": truncated,
+        "columns": [profile.result(count, bins) for profile in profiles],
+    }
+
+
+class ProfileCache:
+    """按 (内容摘要, 格式, 参数) 缓存数据集画像的 LRU 缓存"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str, int, int], dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple[str, str, int, int]) -> dict[str, Any] | None:
+        with self._lock:
+            profile = self._entries.get(key)
+            if profile is not None:
+                self._entries.move_to_end(key)
+            return profile
+
+    def put(self, key: tuple[str, str, int, int], profile: dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = profile
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+profile_cache = ProfileCache(PROFILE_CACHE_MAX_ENTRIES)
+
+
+def load_profile(
+    file_path: str,
+    file_format: str = "auto",
+    bins: int = 10,
+    max_rows: int = PROFILE_MAX_ROWS,
+) -> tuple[dict[str, Any], bool]:
+    """
+    计算（或从缓存读取）数据集画像。
+
+    Returns:
+        (画像, 是否来自缓存)
+    """
+    if bins <= 0 or max_rows <= 0:
+        raise ValueError("bins and max_rows must be > 0")
+    path, fmt = _resolve_dataset(file_path, file_format)
+    digest, _ = digest_cache.digest(path, "blake2b")
+    key = (digest, fmt, bins, max_rows)
+    profile = profile_cache.get(key)
+    if profile is not None:
+        return profile, True
+
+    try:
+        columns = read_columns(path, fmt)
+        profile = profile_rows(iter_rows(path, fmt, columns), columns, bins, max_rows)
+    except UnicodeDecodeError:
+        raise ValueError(f"File {file_path} is not a valid UTF-8 text file") from None
+    except csv.Error as e:
+        raise ValueError(f"Invalid CSV: {e}") from e
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON: {e.msg}") from e
+    profile = {"format": fmt, **profile}
+    profile_cache.put(key, profile)
+    return profile, False
+
+
+def _format_number(value: float) -> str:
+    return f"{value:.6g}"
+
+
+def format_profile(profile: dict[str, Any]) -> str:
+    """将画像压缩为适合嵌入提示的简短文本，每列一行"""
+    rows = f"{profile['rows']}+" if profile["truncated"] else str(profile["rows"])
+    lines = [f"{rows} rows, {len(profile['columns'])} columns ({profile['format']})"]
+    for column in profile["columns"]:
+        parts = [
+            column["type"],
+            f"nulls {column['null_rate']:.1%}",
+            f"~{column['distinct']} distinct",
+        ]
+        numeric = column.get("numeric")
+        if numeric:
+            parts.append(
+                f"mean {_format_number(numeric['mean'])}, std {_format_number(numeric['std'])}, "
+                f"range [{_format_number(numeric['min'])}, {_format_number(numeric['max'])}]"
+            )
+            parts.append(f"histogram {column['histogram']}")
+        if column.get("top_values"):
+            top = ", ".join(f"{item['value'][:40]} ({item['count']})" for item in column["top_values"])
+            parts.append(f"top: {top}")
+        lines.append(f"- {column['name']}: " + "; ".join(parts))
+    return "\n".join(lines)
+
+
+def register_dataset_tools(mcp: FastMCP) -> None:
+    """注册数据集相关的工具"""
+
+    @mcp.tool(title="Aggregate File", description="Grouped numeric aggregation over a workspace CSV/JSONL file")
+    @offload_io
+    def aggregate_file(
+        file_path: str,
+        columns: list[str],
+        group_by: list[str] | None = None,
+        quantiles: list[float] | None = None,
+        file_format: DatasetFormat = "auto",
+        max_groups: int = 1000,
+    ) -> dict[str, Any]:
+        """
+        Stream a CSV/TSV or JSON Lines file and aggregate numeric columns.
+
+        Only the requested columns are converted to numbers. Each group keeps
+        running count, sum, mean, std and min/max (plus a t-digest when
+        quantiles are requested), so memory grows with the number of groups,
+        not the number of rows. Empty or non-numeric cells are counted as
+        missing.
+
+        Args:
+            file_path: Relative path to the dataset within workspace
+            columns: Numeric columns to aggregate
+            group_by: Columns whose values define the groups
+            quantiles: Quantiles to estimate per group (between 0 and 1)
+            file_format: File format: auto (by extension), csv, tsv or jsonl
+            max_groups: Maximum number of distinct groups before failing
+        """
+        if not columns:
+            raise ValueError("columns must not be empty")
+        if not 0 < max_groups <= AGGREGATE_MAX_GROUPS:
+            raise ValueError(f"max_groups must be between 1 and {AGGREGATE_MAX_GROUPS}")
+        if quantiles is not None and any(not 0 <= q <= 1 for q in quantiles):
+            raise ValueError("Quantiles must be between 0 and 1")
+
+        path, fmt = _resolve_dataset(file_path, file_format)
+        group_by = group_by or []
+        key_width = len(group_by)
+        compression = 100 if quantiles else None
+
+        groups: dict[tuple[Any, ...], _Group] = {}
+        rows = 0
+        try:
+            for values in iter_rows(path, fmt, group_by + columns):
+                rows += 1
+                key = tuple(_group_value(value) for value in values[:key_width])
+                group = groups.get(key)
+                if group is None:
+                    if len(groups) >= max_groups:
+                        raise ValueError(f"More than {max_groups} groups; narrow group_by or raise max_groups")
+                    group = groups[key] = _Group(len(columns), compression)
+                group.rows += 1
+                for stats, value in zip(group.stats, values[key_width:], strict=True):
+                    number = to_number(value)
+                    if number is not None:
+                        stats.add(number)
+        except UnicodeDecodeError:
+            raise ValueError(f"File {file_path} is not a valid UTF-8 text file") from None
+        except csv.Error as e:
+            raise ValueError(f"Invalid CSV: {e}") from e
+
+        results = []
+        for key, group in groups.items():
+            summaries = {}
+            for name, stats in zip(columns, group.stats, strict=True):
+                summary = stats.summary(quantiles or ()) if stats.count else {"count": 0}
+                summary.pop("variance", None)
+                summary["missing"] = group.rows - stats.count
+                summaries[name] = summary
+            results.append({
+                "key": dict(zip(group_by, key, strict=True)),
+                "rows": group.rows,
+                "columns": summaries,
+            })
+
+        return {
+            "file_path": file_path,
+            "format": fmt,
+            "rows": rows,
+            "groups": results,
+            "group_count": len(results),
+        }
+
+    @mcp.tool(title="Profile File", description="Profile the columns of a workspace CSV/JSONL file")
+    @offload_io
+    def profile_file(
+        file_path: str,
+        file_format: DatasetFormat = "auto",
+        bins: int = 10,
+        max_rows: int = PROFILE_MAX_ROWS,
+    ) -> dict[str, Any]:
+        """
+        Scan a CSV/TSV or JSON Lines file once and profile every column.
+
+        Each column reports its inferred type, null rate, a HyperLogLog
+        distinct-count estimate, numeric summary with an equal-width
+        histogram, and the most frequent non-numeric values. Profiles are
+        cached by file content hash, so repeated calls on an unchanged file
+        are free. JSON Lines columns are taken from the first record.
+
+        Args:
+            file_path: Relative path to the dataset within workspace
+            file_format: File format: auto (by extension), csv, tsv or jsonl
+            bins: Number of histogram bins for numeric columns
+            max_rows: Maximum number of rows to scan
+        """
+        profile, cached = load_profile(file_path, file_format, bins, max_rows)
+        return {
+            "file_path": file_path,
+            **profile,
+            "cached": cached,
+        }
@@ -0,0 +1,307 @@
+"""
+文件差异工具模块
+
+按行比较工作目录中的两个文本文件并输出 unified diff。
+行先映射为整数编号再比较；差异计算以 patience 算法的唯一行锚点切分区间，
+无锚点的区间使用限定代价的 Myers 算法，避免 difflib 在大文件上的最坏情况。
+"""
+
+import bisect
+from pathlib import Path
+from typing import Any
+
+from mcp.server.fastmcp import FastMCP
+
+from .file_operations import _get_safe_path, _load_text, offload_io, read_cache
+
+# Myers 算法在单个区间内允许的最大编辑距离，超出后整段视为替换
+MYERS_MAX_COST = 1000
+
+
+def _hash_lines(a_lines: list[str], b_lines: list[str]) -> tuple[list[int], list[int]]:
+    """将两侧的行映射为整数编号，相同内容得到相同编号"""
+    ids: dict[str, int] = {}
+    a = [ids.setdefault(line, len(ids)) for line in a_lines]
+    b = [ids.setdefault(line, len(ids)) for line in b_lines]
+    return a, b
+
+
+def _unique_anchors(a: list[int], b: list[int], a0: int, a1: int, b0: int, b1: int) -> list[tuple[int, int]]:
+    """patience 锚点：区间内两侧各只出现一次的行，按最长递增子序列取保序的一组"""
+    counts: dict[int, list[int]] = {}
+    for i in range(a0, a1):
+        entry = counts.setdefault(a[i], [0, i, 0, 0])
+        entry[0] += 1
+    for j in range(b0, b1):
+        match = counts.get(b[j])
+        if match is not None:
+            match[2] += 1
+            match[3] = j
+    pairs = sorted((i, j) for count_a, i, count_b, j in counts.values() if count_a == 1 and count_b == 1)
+    if not pairs:
+        return []
+
+    # patience sorting 求 b 下标的最长递增子序列
+    tails: list[int] = []
+    tail_index: list[int] = []
+    previous = [-1] * len(pairs)
+    for index, (_, j) in enumerate(pairs):
+        position = bisect.bisect_left(tails, j)
+        if position == len(tails):
+            tails.append(j)
+            tail_index.append(index)
+        else:
+            tails[position] = j
+            tail_index[position] = index
+        previous[index] = tail_index[position - 1] if position else -1
+
+    anchors = []
+    index = tail_index[-1]
+    while index != -1:
+        anchors.append(pairs[index])
+        index = previous[index]
+    anchors.reverse()
+    return anchors
+
+
+def _myers(a: list[int], b: list[int], a0: int, a1: int, b0: int, b1: int) -> list[tuple[int, int]] | None:
+    """Myers O(ND) 差异算法，返回匹配的行对；编辑距离超过 MYERS_MAX_COST 时返回 None"""
+    n = a1 - a0
+    m = b1 - b0
+    limit = min(n + m, MYERS_MAX_COST)
+    offset = limit + 1
+    v = [0] * (2 * limit + 3)
+    trace = []
+
+    for d in range(limit + 1):
+        trace.append(v[offset - d - 1:offset + d + 2])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[a0 + x] == b[b0 + y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _myers_backtrack(trace, d, n, m, a0, b0)
+    return None
+
+
+def _myers_backtrack(trace: list[list[int]], cost: int, n: int, m: int, a0: int, b0: int) -> list[tuple[int, int]]:
+    """沿 Myers 各步的 V 数组快照回溯出匹配的行对"""
+    pairs = []
+    x, y = n, m
+    for d in range(cost, 0, -1):
+        # 第 d 步开始前的快照，覆盖 k ∈ [-d-1, d+1]
+        snapshot = trace[d]
+        k = x - y
+        if k == -d or (k != d and snapshot[k + d] < snapshot[k + d + 2]):
+            previous_k = k + 1
+            start_x = snapshot[k + d + 2]
+        else:
+            previous_k = k - 1
+            start_x = snapshot[k + d] + 1
+        while x > start_x:
+            x -= 1
+            y -= 1
+            pairs.append((a0 + x, b0 + y))
+        x = snapshot[previous_k + d + 1]
+        y = x - previous_k
+    while x > 0 and y > 0:
+        x -= 1
+        y -= 1
+        pairs.append((a0 + x, b0 + y))
+    pairs.reverse()
+    return pairs
+
+
+def match_lines(a: list[int], b: list[int]) -> list[tuple[int, int]]:
+    """
+    计算两侧行编号序列的匹配行对（按下标递增）。
+
+    先去掉公共前后缀，再以 patience 锚点切分区间，区间内没有锚点时交给 Myers。
+    """
+    matches: list[tuple[int, int]] = []
+    regions = [(0, len(a), 0, len(b))]
+    while regions:
+        a0, a1, b0, b1 = regions.pop()
+        while a0 < a1 and b0 < b1 and a[a0] == b[b0]:
+            matches.append((a0, b0))
+            a0 += 1
+            b0 += 1
+        while a0 < a1 and b0 < b1 and a[a1 - 1] == b[b1 - 1]:
+            a1 -= 1
+            b1 -= 1
+            matches.append((a1, b1))
+        if a0 == a1 or b0 == b1:
+            continue
+
+        anchors = _unique_anchors(a, b, a0, a1, b0, b1)
+        if anchors:
+            previous_a, previous_b = a0, b0
+            for i, j in anchors:
+                regions.append((previous_a, i, previous_b, j))
+                matches.append((i, j))
+                previous_a, previous_b = i + 1, j + 1
+            regions.append((previous_a, a1, previous_b, b1))
+        else:
+            matches.extend(_myers(a, b, a0, a1, b0, b1) or ())
+    matches.sort()
+    return matches
+
+
+def _opcodes(matches: list[tuple[int, int]], n: int, m: int) -> list[tuple[str, int, int, int, int]]:
+    """由匹配行对生成 (tag, a0, a1, b0, b1) 操作序列，tag 为 equal 或 change"""
+    opcodes = []
+    i = j = 0
+    for match_a, match_b in [*matches, (n, m)]:
+        if i < match_a or j < match_b:
+            opcodes.append(("change", i, match_a, j, match_b))
+        if match_a < n:
+            if opcodes and opcodes[-1][0] == "equal" and opcodes[-1][2] == match_a:
+                _, start_a, _, start_b, _ = opcodes[-1]
+                opcodes[-1] = ("equal", start_a, match_a + 1, start_b, match_b + 1)
+            else:
+                opcodes.append(("equal", match_a, match_a + 1, match_b, match_b + 1))
+        i, j = match_a + 1, match_b + 1
+    return opcodes
+
+
+def _format_range(start: int, stop: int) -> str:
+    """unified diff 的区间格式（与 difflib 一致）"""
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+
+def _diff_line(prefix: str, line: str) -> list[str]:
+    if line.endswith("\n"):
+        return [prefix + line[:-1]]
+    return [prefix + line, "\\ No newline at end of file"]
+
+
+def unified_diff(
+    a_lines: list[str],
+    b_lines: list[str],
+    from_file: str,
+    to_file: str,
+    context: int = 3,
+    max_lines: int | None = None,
+) -> dict[str, Any]:
+    """生成 unified diff 文本及增删统计；超出 max_lines 时截断"""
+    a, b = _hash_lines(a_lines, b_lines)
+    opcodes = _opcodes(match_lines(a, b), len(a), len(b))
+    changes = [op for op in opcodes if op[0] == "change"]
+    added = sum(b1 - b0 for _, _, _, b0, b1 in changes)
+    removed = sum(a1 - a0 for _, a0, a1, _, _ in changes)
+
+    # 以变更块为中心扩展上下文，相邻且上下文重叠的合并为一个 hunk
+    hunks: list[list[tuple[str, int, int, int, int]]] = []
+    for tag, a0, a1, b0, b1 in opcodes:
+        if tag == "change":
+            if hunks and a0 - hunks[-1][-1][2] <= 2 * context:
+                _, _, last_a1, _, last_b1 = hunks[-1][-1]
+                hunks[-1].append(("equal", last_a1, a0, last_b1, b0))
+                hunks[-1].append((tag, a0, a1, b0, b1))
+            else:
+                hunks.append([(tag, a0, a1, b0, b1)])
+
+    output = [f"--- {from_file}", f"+++ {to_file}"] if hunks else []
+    truncated = False
+    for hunk in hunks:
+        first_a = max(hunk[0][1] - context, 0)
+        first_b = max(hunk[0][3] - context, 0)
+        last_a = min(hunk[-1][2] + context, len(a))
+        last_b = min(hunk[-1][4] + context, len(b))
+        lines = [f"@@ -{_format_range(first_a, last_a)} +{_format_range(first_b, last_b)} @@"]
+        lines.extend(line for i in range(first_a, hunk[0][1]) for line in _diff_line(" ", a_lines[i]))
+        for tag, a0, a1, b0, b1 in hunk:
+            if tag == "equal":
+                lines.extend(line for i in range(a0, a1) for line in _diff_line(" ", a_lines[i]))
+            else:
+                lines.extend(line for i in range(a0, a1) for line in _diff_line("-", a_lines[i]))
+                lines.extend(line for j in range(b0, b1) for line in _diff_line("+", b_lines[j]))
+        lines.extend(line for i in range(hunk[-1][2], last_a) for line in _diff_line(" ", a_lines[i]))
+
+        if max_lines is not None and len(output) + len(lines) > max_lines:
+            output.extend(lines[:max_lines - len(output)])
+            truncated = True
+            break
+        output.extend(lines)
+
+    return {
+        "diff": "\n".join(output) + ("\n" if output else ""),
+        "added": added,
+        "removed": removed,
+        "hunks": len(hunks),
+        "identical": not changes,
+        "truncated": truncated,
+    }
+
+
+def split_lines(text: str) -> list[str]:
+    """仅按 \\n 切分并保留换行符（str.splitlines 还会在 \\f、\\x85、\\u2028 等字符处切分）"""
+    lines = [line + "\n" for line in text.split("\n")]
+    lines[-1] = lines[-1][:-1]
+    if not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def _read_lines(file_path: str) -> list[str]:
+    """读取工作目录中的文本文件并按行切分（保留换行符）"""
+    safe_path: Path = _get_safe_path(file_path)
+    if not safe_path.exists():
+        raise FileNotFoundError(f"File {file_path} not found")
+    if not safe_path.is_file():
+        raise ValueError(f"{file_path} is not a file")
+    try:
+        return split_lines(read_cache.get_or_load(safe_path, "text", _load_text))
+    except UnicodeDecodeError:
+        raise ValueError(f"File {file_path} is not a valid text file") from None
+
+
+def register_diff_tools(mcp: FastMCP) -> None:
+    """注册文件差异相关的工具"""
+
+    @mcp.tool(title="Diff Files", description="Show a unified diff between two workspace files")
+    @offload_io
+    def diff_files(
+        from_path: str,
+        to_path: str,
+        context: int = 3,
+        max_lines: int = 2000,
+    ) -> dict[str, Any]:
+        """
+        Compare two workspace text files line by line and return a unified diff.
+
+        Lines are hashed once and matched with patience anchors plus a
+        bounded Myers search, so large files with scattered edits diff in
+        near-linear time.
+
+        Args:
+            from_path: Relative path of the original file
+            to_path: Relative path of the changed file
+            context: Number of unchanged lines shown around each change
+            max_lines: Maximum number of diff lines to return
+        """
+        if context < 0:
+            raise ValueError("context must be >= 0")
+        if max_lines <= 0:
+            raise ValueError("max_lines must be > 0")
+
+        return unified_diff(
+            _read_lines(from_path),
+            _read_lines(to_path),
+            f"a/{from_path}",
+            f"b/{to_path}",
+            context,
+            max_lines,
+        )
@@ -5,36 +5,982 @@
 注意：为了安全考虑，这些工具只允许访问特定目录。
 """
 
+import asyncio
+import base64
+import functools
+import hashlib
+import heapq
 import json
+import mmap
+import os
+import re
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any, Literal, TypeVar
 
 from mcp.server.fastmcp import FastMCP
+from pydantic import BaseModel, Field
+
+from ..config import settings
+
+T = TypeVar("T")
+
+# 定义安全的工作目录
+SAFE_DIR = Path.cwd() / "workspace"
+
+# 流式读取时每次读取的块大小
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+# 文件 I/O 线程池（首次使用时创建）
+_io_executor: ThreadPoolExecutor | None = None
+_io_slots: threading.BoundedSemaphore | None = None
+_io_lock = threading.Lock()
+
+
+def _get_io_executor() -> tuple[ThreadPoolExecutor, threading.BoundedSemaphore]:
+    """获取文件 I/O 线程池及其排队配额"""
+    global _io_executor, _io_slots
+    with _io_lock:
+        if _io_executor is None or _io_slots is None:
+            _io_executor = ThreadPoolExecutor(
+                max_workers=settings.file_io_max_workers,
+                thread_name_prefix="file-io",
+            )
+            _io_slots = threading.BoundedSemaphore(
+                settings.file_io_max_workers + settings.file_io_max_queue
+            )
+        return _io_executor, _io_slots
+
+
+async def run_in_io_pool(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    在文件 I/O 线程池中执行阻塞调用，避免阻塞事件循环。
+
+    运行中与排队中的任务总数超过 file_io_max_workers + file_io_max_queue 时
+    立即拒绝，而不是无限排队。
+    """
+    executor, slots = _get_io_executor()
+    if not slots.acquire(blocking=False):
+        raise RuntimeError("File I/O queue is full, please retry later")
+    try:
+        future = executor.submit(func, *args, **kwargs)
+    except BaseException:
+        slots.release()
+        raise
+    # 任务完成或在排队中被取消时释放配额
+    future.add_done_callback(lambda _: slots.release())
+    return await asyncio.wrap_future(future)
+
+
+def offload_io(func: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+    """将同步文件工具包装为在 I/O 线程池中执行的协程，保持原有签名"""
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        return await run_in_io_pool(func, *args, **kwargs)
+
+    return wrapper
+
+
+_fanout_executor: ThreadPoolExecutor | None = None
+
+
+def _get_fanout_executor() -> ThreadPoolExecutor:
+    """
+    获取工具内部并行子任务（目录遍历、批量写入等）使用的线程池。
+
+    与文件 I/O 线程池分开，避免工具在 I/O 线程中向同一线程池嵌套提交而死锁。
+    """
+    global _fanout_executor
+    with _io_lock:
+        if _fanout_executor is None:
+            _fanout_executor = ThreadPoolExecutor(
+                max_workers=settings.file_io_max_workers,
+                thread_name_prefix="file-fanout",
+            )
+        return _fanout_executor
+
+
+class ReadCache:
+    """
+    按字节预算淘汰的 LRU 读取缓存。
+
+    缓存解码后的文本与解析后的 JSON，每次命中前都会用 (mtime, size, inode)
+    校验文件是否变化；条目按源文件字节数计入预算。
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple[str, str], tuple[tuple[int, int, int], Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _signature(stat: os.stat_result) -> tuple[int, int, int]:
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def get_or_load(self, path: Path, kind: str, loader: Callable[[Path], T], cost: int | None = None) -> T:
+        """
+        返回缓存值；未命中或文件已变化时调用 loader 重新加载。
+
+        cost 为条目计入预算的字节数，默认按源文件大小计算；行数等小型派生值可传入较小的值。
+        """
+        stat = path.stat()
+        signature = self._signature(stat)
+        key = (str(path.resolve()), kind)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]  # type: ignore[no-any-return]
+            self.misses += 1
+
+        value = loader(path)
+        cost = max(stat.st_size if cost is None else cost, 1)
+        if cost > self.max_bytes:
+            return value
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (signature, value, cost)
+            self._bytes += cost
+            while self._bytes > self.max_bytes:
+                _, (_, _, evicted_cost) = self._entries.popitem(last=False)
+                self._bytes -= evicted_cost
+                self.evictions += 1
+        return value
+
+    def invalidate(self, path: Path) -> None:
+        """移除某个文件的全部缓存条目"""
+        resolved = str(path.resolve())
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == resolved]:
+                self._bytes -= self._entries.pop(key)[2]
+                self.invalidations += 1
+
+    def stats(self) -> dict[str, int]:
+        """返回缓存命中统计"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+read_cache = ReadCache(settings.file_cache_max_bytes)
+
+
+def _load_text(path: Path) -> str:
+    return path.read_text(encoding='utf-8')
+
+
+def _load_json(path: Path) -> Any:
+    with path.open('r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# 支持的摘要算法（blake2b 为标准库中最快的选择）
+HASH_ALGORITHMS = ("sha256", "blake2b", "sha1", "md5")
+
+# 摘要缓存最多保留的条目数
+DIGEST_CACHE_MAX_ENTRIES = 100_000
+
+
+class DigestCache:
+    """文件摘要缓存，文件 (mtime, size, inode) 未变化时直接复用"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], tuple[tuple[int, int, int], str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def digest(self, path: Path, algorithm: str = "sha256") -> tuple[str, bool]:
+        """
+        计算文件摘要，按固定大小分块流式读取。
+
+        Returns:
+            (十六进制摘要, 是否来自缓存)
+        """
+        if algorithm not in HASH_ALGORITHMS:
+            raise ValueError(f"Unsupported algorithm. Use: {', '.join(HASH_ALGORITHMS)}")
+        stat = path.stat()
+        signature = ReadCache._signature(stat)
+        key = (str(path.resolve()), algorithm)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                return entry[1], True
+
+        hasher = hashlib.new(algorithm)
+        buffer = bytearray(READ_CHUNK_SIZE)
+        view = memoryview(buffer)
+        with path.open('rb', buffering=0) as f:
+            while size := f.readinto(buffer):
+                hasher.update(view[:size])
+        digest = hasher.hexdigest()
+
+        with self._lock:
+            self._entries[key] = (signature, digest)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return digest, False
+
+
+digest_cache = DigestCache(DIGEST_CACHE_MAX_ENTRIES)
+
+
+def _get_safe_path(file_path: str) -> Path:
+    """获取安全的文件路径，确保在允许的目录内"""
+    path = SAFE_DIR / file_path
+    # 确保路径在安全目录内
+    try:
+        path.resolve().relative_to(SAFE_DIR.resolve())
+        return path
+    except ValueError:
+        raise ValueError(f"Access denied: Path {file_path} is outside safe directory") from None
+
+
+def _count_lines(path: Path) -> int:
+    """分块扫描换行符统计行数（与 split('\\n') 语义一致），不构建行列表"""
+    newlines = 0
+    with path.open('rb') as f:
+        while chunk := f.read(READ_CHUNK_SIZE):
+            newlines += chunk.count(b'\n')
+    return newlines + 1
+
+
+def _ends_with_newline(path: Path, start: int, end: int) -> bool:
+    """字节区间 [start, end) 非空且以换行符结尾"""
+    if end <= start:
+        return False
+    with path.open('rb') as f:
+        f.seek(end - 1)
+        return f.read(1) == b'\n'
+
+
+def _read_byte_range(path: Path, offset: int, limit: int) -> tuple[bytes, int, int]:
+    """
+    通过 mmap 读取字节区间，并将边界对齐到完整的 UTF-8 字符。
+
+    Returns:
+        (数据, 实际起始偏移, 下一次读取的偏移)
+    """
+    size = path.stat().st_size
+    if offset >= size:
+        return b"", size, size
+
+    with path.open('rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = offset
+        # 跳过落在多字节字符中间的续字节
+        while start < size and mm[start] & 0xC0 == 0x80:
+            start += 1
+        end = min(start + limit, size)
+        # 回退到字符边界，避免截断多字节字符
+        while start < end < size and mm[end] & 0xC0 == 0x80:
+            end -= 1
+        if end == start and start < size:
+            # limit 小于单个字符长度时至少返回一个完整字符
+            end = start + 1
+            while end < size and mm[end] & 0xC0 == 0x80:
+                end += 1
+        return mm[start:end], start, end
+
+
+def _total_lines(path: Path) -> int:
+    """文件总行数，按 (mtime, size, inode) 缓存，分页读取时不必每页重新扫描整个文件"""
+    return read_cache.get_or_load(path, "line_count", _count_lines, cost=64)
+
+
+def _read_line_range(path: Path, start_line: int, end_line: int | None) -> tuple[bytes, int, bool]:
+    """
+    缓冲流式读取行区间（行号从 1 开始，包含 end_line）。
+
+    Returns:
+        (数据, 文件总行数, 是否还有后续内容)
+    """
+    collected = bytearray()
+    newlines = 0
+    with path.open('rb') as f:
+        for line_no, line in enumerate(f, start=1):
+            if end_line is not None and line_no > end_line:
+                # 区间之后的内容不再读取，总行数取自缓存
+                return bytes(collected), _total_lines(path), True
+            if line.endswith(b'\n'):
+                newlines += 1
+            if line_no >= start_line:
+                collected += line
+
+    return bytes(collected), newlines + 1, False
+
+
+def _encode_cursor(name: str) -> str:
+    """将目录项名称编码为不透明的分页游标"""
+    return base64.urlsafe_b64encode(name.encode('utf-8', 'surrogateescape')).decode('ascii')
+
+
+def _decode_cursor(cursor: str) -> str:
+    """解码分页游标"""
+    try:
+        return base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8', 'surrogateescape')
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor") from None
+
+
+def _scan_directory(
+    path: Path, page_size: int | None, after: str | None
+) -> tuple[list[os.DirEntry], bool]:
+    """
+    使用 os.scandir 列出目录项，按名称排序并可选分页。
+
+    Returns:
+        (本页目录项, 是否还有下一页)
+    """
+    with os.scandir(path) as it:
+        entries = [entry for entry in it if after is None or entry.name > after]
+
+    if page_size is None or len(entries) <= page_size:
+        return sorted(entries, key=lambda e: e.name), False
+    # 只对本页需要的条目排序
+    return heapq.nsmallest(page_size, entries, key=lambda e: e.name), True
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    """循环写入直到全部数据落盘（处理部分写入）"""
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def _copy_range(src_fd: int, dst_fd: int, offset: int, count: int) -> None:
+    """将源文件 [offset, offset + count) 复制到目标文件当前位置，优先使用内核态 copy_file_range"""
+    end = offset + count
+    if hasattr(os, "copy_file_range"):
+        try:
+            while offset < end:
+                copied = os.copy_file_range(src_fd, dst_fd, end - offset, offset)
+                if copied == 0:
+                    return
+                offset += copied
+            return
+        except OSError:
+            # 文件系统不支持时退回到用户态复制（已复制部分保持有效）
+            pass
+    while offset < end:
+        chunk = os.pread(src_fd, min(READ_CHUNK_SIZE, end - offset), offset)
+        if not chunk:
+            return
+        _write_all(dst_fd, chunk)
+        offset += len(chunk)
+
+
+def _write_temp(path: Path, writer: Callable[[int], None], fsync: bool = True) -> Path:
+    """
+    将内容写入目标文件同目录下的临时文件，返回临时文件路径。
+
+    目标是符号链接时写到链接指向的文件旁，替换后链接保持不变。
+
+    Args:
+        path: 目标文件
+        writer: 接收临时文件描述符并写入内容的回调
+        fsync: 是否将临时文件刷入磁盘
+    """
+    path = path.resolve()
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:12]}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        try:
+            writer(fd)
+            if fsync:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        if path.exists():
+            shutil.copymode(path, tmp_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return tmp_path
+
+
+def _commit_temp(tmp_path: Path, path: Path) -> None:
+    """通过 os.replace 原子地用临时文件替换目标文件（符号链接替换其指向的文件）"""
+    try:
+        os.replace(tmp_path, path.resolve())
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _fsync_directory(directory: Path) -> None:
+    """刷新目录项，使 rename 在崩溃后依然可见"""
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    except OSError:
+        # 部分平台/文件系统不支持对目录 fsync
+        pass
+    finally:
+        os.close(fd)
+
+
+def _atomic_write(path: Path, writer: Callable[[int], None], fsync: bool = True) -> None:
+    """
+    先写入同目录下的临时文件，再通过 os.replace 原子替换目标文件，
+    读者只会看到旧内容或完整的新内容。
+    """
+    _commit_temp(_write_temp(path, writer, fsync), path)
+
+
+def _append_bytes(path: Path, data: bytes, fsync: bool = False) -> None:
+    """以 O_APPEND 追加写入，并发追加之间不会互相覆盖"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o666)
+    try:
+        _write_all(fd, data)
+        if fsync:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _patch_bytes(path: Path, start: int, end: int, data: bytes, fsync: bool = True) -> None:
+    """将文件中 [start, end) 字节替换为 data，前后内容在内核态复制"""
+    size = path.stat().st_size
+    src_fd = os.open(path, os.O_RDONLY)
+    try:
+        def writer(dst_fd: int) -> None:
+            _copy_range(src_fd, dst_fd, 0, start)
+            _write_all(dst_fd, data)
+            _copy_range(src_fd, dst_fd, end, size - end)
+
+        _atomic_write(path, writer, fsync)
+    finally:
+        os.close(src_fd)
+
+
+# 批量写入时每组提交（rename + 目录 fsync）的文件数
+WRITE_FSYNC_GROUP_SIZE = 64
+
+
+class FileWriteEntry(BaseModel):
+    """批量写入中的单个文件"""
+
+    path: str = Field(description="Relative path to the file within workspace")
+    content: str = Field(description="Content to write")
+    mode: Literal["write", "overwrite", "append"] = Field(
+        default="write", description="write fails if the file exists; overwrite replaces it; append appends"
+    )
+
+
+def _write_batch(entries: list[FileWriteEntry], fsync: bool = True) -> list[dict[str, Any]]:
+    """
+    批量写入文件：先校验全部路径，每个父目录只创建一次，然后分组并发写入临时文件
+    并 fsync，再逐个原子 rename，每组对涉及的目录统一 fsync 一次。
+
+    路径越界或重复时整批拒绝；单个文件写入失败只影响该文件的结果。
+    """
+    targets = []
+    seen = set()
+    for entry in entries:
+        target = _get_safe_path(entry.path)
+        resolved = target.resolve()
+        if resolved in seen:
+            raise ValueError(f"Duplicate path in batch: {entry.path}")
+        seen.add(resolved)
+        targets.append(target)
+
+    for parent in sorted({target.parent for target in targets}):
+        parent.mkdir(parents=True, exist_ok=True)
+
+    def stage(entry: FileWriteEntry, target: Path) -> Path | None:
+        data = entry.content.encode('utf-8')
+        if entry.mode == "append":
+            _append_bytes(target, data, fsync)
+            return None
+        if entry.mode == "write" and target.exists():
+            raise ValueError(f"File {entry.path} already exists. Use mode='overwrite' to replace it.")
+        return _write_temp(target, lambda fd: _write_all(fd, data), fsync)
+
+    executor = _get_fanout_executor()
+    results: list[dict[str, Any]] = []
+    for group_start in range(0, len(entries), WRITE_FSYNC_GROUP_SIZE):
+        group = list(zip(
+            entries[group_start:group_start + WRITE_FSYNC_GROUP_SIZE],
+            targets[group_start:group_start + WRITE_FSYNC_GROUP_SIZE],
+            strict=True,
+        ))
+        futures = [executor.submit(stage, entry, target) for entry, target in group]
+        touched_dirs = set()
+        for (entry, target), future in zip(group, futures, strict=True):
+            try:
+                tmp_path = future.result()
+                if tmp_path is not None:
+                    _commit_temp(tmp_path, target)
+                    touched_dirs.add(target.parent)
+                read_cache.invalidate(target)
+                results.append({
+                    "path": entry.path,
+                    "status": "ok",
+                    "mode": entry.mode,
+                    "size_bytes": target.stat().st_size,
+                })
+            except (OSError, ValueError) as e:
+                results.append({"path": entry.path, "status": "error", "error": str(e)})
+        if fsync:
+            for directory in touched_dirs:
+                _fsync_directory(directory)
+    return results
+
+
+def _line_start_offsets(path: Path, targets: list[int]) -> dict[int, int]:
+    """
+    分块扫描换行符，返回各目标行（从 1 开始）起始位置的字节偏移。
+    超出文件行数的目标不会出现在结果中。
+    """
+    pending = sorted(set(targets))
+    offsets = {}
+    while pending and pending[0] == 1:
+        offsets[pending.pop(0)] = 0
+
+    seen = 0
+    base = 0
+    with path.open('rb') as f:
+        while pending and (chunk := f.read(READ_CHUNK_SIZE)):
+            if seen + chunk.count(b'\n') < pending[0] - 1:
+                seen += chunk.count(b'\n')
+                base += len(chunk)
+                continue
+            pos = chunk.find(b'\n')
+            while pos != -1 and pending:
+                seen += 1
+                while pending and pending[0] - 1 == seen:
+                    offsets[pending.pop(0)] = base + pos + 1
+                pos = chunk.find(b'\n', pos + 1)
+            seen += chunk.count(b'\n', pos + 1) if pos != -1 else 0
+            base += len(chunk)
+    return offsets
+
+
+# 并行遍历时每批提交的目录数
+WALK_BATCH_SIZE = 256
+
+def _compile_glob(pattern: str) -> re.Pattern[str]:
+    """
+    将 glob 模式编译为正则：* 和 ? 不跨越目录，** 匹配任意层级目录。
+    不含 / 的模式只匹配文件名。
+    """
+    parts = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+            continue
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                parts.append(re.escape(char))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append(f"[{body}]")
+                i = end
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    return re.compile("".join(parts) + r"\Z")
+
+
+class GlobFilter:
+    """包含/排除 glob 模式过滤器"""
+
+    def __init__(self, include: list[str] | None = None, exclude: list[str] | None = None):
+        self._include = [(("/" in p), _compile_glob(p)) for p in include or []]
+        self._exclude = [(("/" in p), _compile_glob(p)) for p in exclude or []]
+
+    @staticmethod
+    def _matches(patterns: list[tuple[bool, re.Pattern[str]]], relative: str) -> bool:
+        name = relative.rsplit("/", 1)[-1]
+        return any(regex.match(relative if full else name) for full, regex in patterns)
+
+    def excluded(self, relative: str) -> bool:
+        return self._matches(self._exclude, relative)
+
+    def included(self, relative: str) -> bool:
+        return not self._include or self._matches(self._include, relative)
+
+
+def _scan_dir_sorted(path: str) -> list[os.DirEntry]:
+    """列出单个目录（按名称排序），无权限或已删除时返回空列表"""
+    try:
+        with os.scandir(path) as it:
+            return sorted(it, key=lambda e: e.name)
+    except OSError:
+        return []
+
+
+def walk_workspace(
+    directory_path: str = ".",
+    include: list[str] | None = None,
+    exclude: list[str] | None = None,
+    max_depth: int | None = None,
+    include_dirs: bool = False,
+) -> Iterator[tuple[str, os.DirEntry]]:
+    """
+    使用并行 scandir 逐层遍历工作目录，产出 (相对工作目录的路径, DirEntry)。
+
+    不跟随目录符号链接；指向工作目录之外的文件符号链接会被跳过。
+    被 exclude 匹配的目录不会继续下探。调用方停止迭代即可提前结束遍历。
+    """
+    start = _get_safe_path(directory_path)
+    if not start.is_dir():
+        raise ValueError(f"{directory_path} is not a directory")
+
+    root_relative = start.resolve().relative_to(SAFE_DIR.resolve()).as_posix()
+    prefix = "" if root_relative == "." else root_relative + "/"
+    filters = GlobFilter(include, exclude)
+    executor = _get_fanout_executor()
+
+    frontier: list[tuple[str, str]] = [(str(start), prefix)]
+    depth = 0
+    while frontier:
+        next_frontier: list[tuple[str, str]] = []
+        for batch_start in range(0, len(frontier), WALK_BATCH_SIZE):
+            batch = frontier[batch_start:batch_start + WALK_BATCH_SIZE]
+            listings = executor.map(_scan_dir_sorted, [path for path, _ in batch])
+            for (_, rel_prefix), entries in zip(batch, listings, strict=True):
+                for entry in entries:
+                    relative = rel_prefix + entry.name
+                    if filters.excluded(relative):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        if max_depth is None or depth < max_depth:
+                            next_frontier.append((entry.path, relative + "/"))
+                        if include_dirs and filters.included(relative):
+                            yield relative, entry
+                    elif entry.is_file():
+                        if entry.is_symlink():
+                            try:
+                                _get_safe_path(relative)
+                            except ValueError:
+                                continue
+                        if filters.included(relative):
+                            yield relative, entry
+        frontier = next_frontier
+        depth += 1
+
+
+# 超过该大小的 JSON 文件在投影/分页时流式解析，不整体加载
+JSON_STREAM_THRESHOLD = 16 * 1024 * 1024
+
+_JSON_PATH_TOKEN = re.compile(
+    r"""\.(?P<key>[^.\[\]*][^.\[\]]*)"""
+    r"""|\.\*|\[\*\]"""
+    r"""|\[(?P<index>-?\d+)\]"""
+    r"""|\[(?P<start>-?\d*):(?P<stop>-?\d*)\]"""
+    r"""|\[(?P<quote>['"])(?P<qkey>.*?)(?P=quote)\]"""
+)
+_JSON_STRUCT = re.compile(r'["\[\]{}]')
+_JSON_STRING_END = re.compile(r'["\\]')
+_JSON_WHITESPACE = " \t\n\r"
+_MISSING = object()
+
+
+def _parse_json_path(path: str) -> list[tuple[Any, ...]]:
+    """
+    解析 JSONPath 子集：$、.key、['key']、[n]、[start:stop]、[*] / .*
+
+    Returns:
+        步骤列表，元素为 ("key", name) / ("index", n) / ("slice", start, stop)
+    """
+    expr = path.strip()
+    if expr.startswith("$"):
+        expr = expr[1:]
+    elif expr and expr[0] not in ".[":
+        expr = "." + expr
+
+    steps: list[tuple[Any, ...]] = []
+    pos = 0
+    while pos < len(expr):
+        match = _JSON_PATH_TOKEN.match(expr, pos)
+        if match is None:
+            raise ValueError(f"Invalid JSON path: {path}")
+        if match.group("key") is not None:
+            steps.append(("key", match.group("key")))
+        elif match.group("qkey") is not None:
+            steps.append(("key", match.group("qkey")))
+        elif match.group("index") is not None:
+            steps.append(("index", int(match.group("index"))))
+        elif match.group(0).endswith(("*", "*]")):
+            steps.append(("slice", None, None))
+        else:
+            start, stop = match.group("start"), match.group("stop")
+            steps.append(("slice", int(start) if start else None, int(stop) if stop else None))
+        pos = match.end()
+    return steps
+
+
+def _apply_json_path(value: Any, steps: list[tuple[Any, ...]]) -> Any:
+    """在内存中的 JSON 值上应用路径；切片之后的步骤映射到每个元素，缺失项被忽略"""
+    for i, step in enumerate(steps):
+        if step[0] == "key":
+            if not isinstance(value, dict) or step[1] not in value:
+                return _MISSING
+            value = value[step[1]]
+        elif step[0] == "index":
+            if not isinstance(value, list) or not -len(value) <= step[1] < len(value):
+                return _MISSING
+            value = value[step[1]]
+        else:
+            if not isinstance(value, list):
+                return _MISSING
+            rest = steps[i + 1:]
+            selected = (_apply_json_path(item, rest) for item in value[step[1]:step[2]])
+            return [item for item in selected if item is not _MISSING]
+    return value
+
+
+class _JsonStream:
+    """基于 raw_decode 的增量 JSON 读取器，按需从文件读取数据块"""
+
+    def __init__(self, f: Any):
+        self._file = f
+        self._decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, min_size: int = READ_CHUNK_SIZE) -> bool:
+        """丢弃已消费内容并读取更多数据；已到文件末尾时返回 False"""
+        if self.eof:
+            return False
+        chunk = self._file.read(max(min_size, READ_CHUNK_SIZE))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """跳过空白并返回下一个字符，文件结束时返回空串"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _JSON_WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf) or not self._fill():
+                return self.buf[self.pos:self.pos + 1]
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at JSON stream position")
+        self.pos += 1
+
+    def decode_value(self) -> Any:
+        """解码下一个完整的 JSON 值"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # 数据不完整：按已缓冲大小成倍扩充，保证总体线性
+                if not self._fill(len(self.buf) - self.pos):
+                    raise
+                continue
+            # 数字可能在块边界被截断，需确认其后还有分隔符
+            if end == len(self.buf) and self._fill(len(self.buf) - self.pos):
+                continue
+            self.pos = end
+            return value
+
+    def skip_value(self) -> None:
+        """跳过下一个 JSON 值而不构建对象"""
+        if self.peek() not in "[{":
+            self.decode_value()
+            return
+        depth = 0
+        in_string = False
+        while True:
+            pattern = _JSON_STRING_END if in_string else _JSON_STRUCT
+            match = pattern.search(self.buf, self.pos)
+            if match is None or (match.group() == "\\" and match.end() == len(self.buf)):
+                self.pos = match.start() if match is not None else len(self.buf)
+                if not self._fill():
+                    raise ValueError("Unexpected end of JSON data")
+                continue
+            char = match.group()
+            self.pos = match.end()
+            if in_string:
+                if char == "\\":
+                    self.pos += 1
+                else:
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char in "[{":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def iter_array(self) -> Iterator[int]:
+        """逐个产出数组元素下标；调用方需在每次产出后消费该元素"""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        index = 0
+        while True:
+            yield index
+            char = self.peek()
+            self.pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise ValueError("Malformed JSON array")
+            index += 1
+
+    def iter_object(self) -> Iterator[str]:
+        """逐个产出对象的键；调用方需在每次产出后消费对应的值"""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.decode_value()
+            self.expect(":")
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise ValueError("Malformed JSON object")
+
+
+def _stream_json_path(stream: _JsonStream, steps: list[tuple[Any, ...]], drain: bool = False) -> Any:
+    """
+    沿路径流式定位，只解码被选中的部分。
+
+    顶层选中后立即停止读取；drain=True 时（位于切片内部）会跳过容器的剩余
+    部分，使流停在该值之后。
+    """
+    if not steps:
+        return stream.decode_value()
+    step, rest = steps[0], steps[1:]
+    char = stream.peek()
+
+    if step[0] == "key":
+        if char != "{":
+            stream.skip_value()
+            return _MISSING
+        members = stream.iter_object()
+        for key in members:
+            if key == step[1]:
+                value = _stream_json_path(stream, rest, drain)
+                if drain:
+                    for _ in members:
+                        stream.skip_value()
+                return value
+            stream.skip_value()
+        return _MISSING
+
+    if char != "[":
+        stream.skip_value()
+        return _MISSING
+
+    if step[0] == "index":
+        start, stop = step[1], step[1] + 1
+    else:
+        start, stop = step[1] or 0, step[2]
+    if start < 0 or (stop is not None and stop < 0):
+        # 负数下标需要数组长度，退回到内存中处理
+        return _apply_json_path(stream.decode_value(), [step, *rest])
+
+    results = []
+    elements = stream.iter_array()
+    for index in elements:
+        if stop is not None and index >= stop:
+            if drain:
+                stream.skip_value()
+                for _ in elements:
+                    stream.skip_value()
+            break
+        if index < start:
+            stream.skip_value()
+            continue
+        value = _stream_json_path(stream, rest, drain or step[0] == "slice")
+        if value is not _MISSING:
+            results.append(value)
+    if step[0] == "index":
+        return results[0] if results else _MISSING
+    return results
+
+
+def _select_json(path: Path, steps: list[tuple[Any, ...]]) -> Any:
+    """小文件走读取缓存后在内存中投影，大文件流式解析"""
+    if path.stat().st_size <= JSON_STREAM_THRESHOLD:
+        return _apply_json_path(read_cache.get_or_load(path, "json", _load_json), steps)
+    with path.open('r', encoding='utf-8') as f:
+        return _stream_json_path(_JsonStream(f), steps)
 
 
 def register_file_tools(mcp: FastMCP) -> None:
     """注册文件操作相关的工具"""
 
-    # 定义安全的工作目录
-    SAFE_DIR = Path.cwd() / "workspace"
     SAFE_DIR.mkdir(exist_ok=True)
 
-    def _get_safe_path(file_path: str) -> Path:
-        """获取安全的文件路径，确保在允许的目录内"""
-        path = SAFE_DIR / file_path
-        # 确保路径在安全目录内
-        try:
-            path.resolve().relative_to(SAFE_DIR.resolve())
-            return path
-        except ValueError:
-            raise ValueError(f"Access denied: Path {file_path} is outside safe directory")
-
-    @mcp.tool(title="List Directory", description="List files and directories")
-    def list_directory(directory_path: str = ".") -> dict[str, list[str]]:
+    @mcp.tool(title="List Directory", description="List files and directories, optionally paginated")
+    @offload_io
+    def list_directory(
+        directory_path: str = ".",
+        page_size: int | None = None,
+        cursor: str | None = None,
+        include_details: bool = False,
+    ) -> dict[str, Any]:
         """
         List files and directories in the specified path.
-        
+
+        Entries are returned in name order. When page_size is set, pass the
+        returned next_cursor back to fetch the following page.
+
         Args:
             directory_path: Relative path within the workspace directory
+            page_size: Maximum number of entries per page (all entries if omitted)
+            cursor: Opaque cursor returned by the previous page
+            include_details: Whether to include size and modification time per entry
         """
         safe_path = _get_safe_path(directory_path)
 
@@ -44,28 +990,118 @@ def register_file_tools(mcp: FastMCP) -> None:
         if not safe_path.is_dir():
             raise ValueError(f"{directory_path} is not a directory")
 
+        if page_size is not None and page_size <= 0:
+            raise ValueError("page_size must be > 0")
+
+        after = _decode_cursor(cursor) if cursor else None
+        entries, has_more = _scan_directory(safe_path, page_size, after)
+
         files = []
         directories = []
+        details = {}
 
-        for item in safe_path.iterdir():
-            if item.is_file():
-                files.append(item.name)
-            elif item.is_dir():
-                directories.append(item.name)
+        # DirEntry 缓存了目录项类型，无需额外 stat
+        for entry in entries:
+            if entry.is_file():
+                files.append(entry.name)
+            elif entry.is_dir():
+                directories.append(entry.name)
+            else:
+                continue
+            if include_details:
+                stat = entry.stat()
+                details[entry.name] = {"size_bytes": stat.st_size, "modified": stat.st_mtime}
+
+        result: dict[str, Any] = {
+            "files": files,
+            "directories": directories,
+            "path": directory_path
+        }
+        if include_details:
+            result["details"] = details
+        if page_size is not None:
+            result["next_cursor"] = _encode_cursor(entries[-1].name) if has_more else None
+        return result
+
+    @mcp.tool(title="Walk Directory", description="Recursively list files matching glob patterns")
+    @offload_io
+    def walk_directory(
+        directory_path: str = ".",
+        include: list[str] | None = None,
+        exclude: list[str] | None = None,
+        max_depth: int | None = None,
+        max_results: int = 1000,
+        include_dirs: bool = False,
+        include_details: bool = False,
+    ) -> dict[str, Any]:
+        """
+        Recursively walk a workspace directory using parallel scandir workers.
+
+        Patterns without "/" match file names ("*.py"); patterns with "/"
+        match the workspace-relative path ("src/**/*.py"). Excluded
+        directories are not descended into. The walk stops as soon as
+        max_results entries are found and returns the partial result with
+        truncated=True.
+
+        Args:
+            directory_path: Relative path of the directory to walk
+            include: Glob patterns an entry must match (all entries if omitted)
+            exclude: Glob patterns of entries and directories to skip
+            max_depth: Maximum depth below directory_path (0 = direct children only)
+            max_results: Maximum number of entries to return
+            include_dirs: Whether to include directories in the results
+            include_details: Whether to include size and modification time per entry
+        """
+        if max_results <= 0:
+            raise ValueError("max_results must be > 0")
+        if max_depth is not None and max_depth < 0:
+            raise ValueError("max_depth must be >= 0")
+
+        entries: list[dict[str, Any]] = []
+        truncated = False
+        for relative, entry in walk_workspace(directory_path, include, exclude, max_depth, include_dirs):
+            if len(entries) >= max_results:
+                truncated = True
+                break
+            item: dict[str, Any] = {
+                "path": relative,
+                "type": "directory" if entry.is_dir(follow_symlinks=False) else "file",
+            }
+            if include_details:
+                stat = entry.stat()
+                item["size_bytes"] = stat.st_size
+                item["modified"] = stat.st_mtime
+            entries.append(item)
 
         return {
-            "files": sorted(files),
-            "directories": sorted(directories),
+            "entries": entries,
+            "count": len(entries),
+            "truncated": truncated,
             "path": directory_path
         }
 
-    @mcp.tool(title="Read Text File", description="Read content of a text file")
-    def read_text_file(file_path: str) -> dict[str, str]:
+    @mcp.tool(title="Read Text File", description="Read content of a text file, optionally by byte or line range")
+    @offload_io
+    def read_text_file(
+        file_path: str,
+        offset: int | None = None,
+        limit: int | None = None,
+        start_line: int | None = None,
+        end_line: int | None = None,
+    ) -> dict[str, Any]:
         """
         Read the content of a text file.
-        
+
+        Without range arguments the whole file is returned. Use offset/limit
+        (bytes) or start_line/end_line (1-based, inclusive) to page through
+        large files; the response carries next_offset / next_line to continue.
+
         Args:
             file_path: Relative path to the file within workspace
+            offset: Byte offset to start reading from
+            limit: Maximum number of bytes to read
+            start_line: First line to read (1-based)
+            end_line: Last line to read (inclusive)
         """
         safe_path = _get_safe_path(file_path)
 
@@ -75,70 +1111,254 @@ def register_file_tools(mcp: FastMCP) -> None:
         if not safe_path.is_file():
             raise ValueError(f"{file_path} is not a file")
 
+        byte_mode = offset is not None or limit is not None
+        line_mode = start_line is not None or end_line is not None
+        if byte_mode and line_mode:
+            raise ValueError("Use either offset/limit or start_line/end_line, not both")
+        if offset is not None and offset < 0:
+            raise ValueError("offset must be >= 0")
+        if limit is not None and limit <= 0:
+            raise ValueError("limit must be > 0")
+        if start_line is not None and start_line < 1:
+            raise ValueError("start_line must be >= 1")
+        if end_line is not None and end_line < (start_line or 1):
+            raise ValueError("end_line must be >= start_line")
+
+        size_bytes = safe_path.stat().st_size
+
         try:
-            content = safe_path.read_text(encoding='utf-8')
+            if byte_mode:
+                data, start, next_offset = _read_byte_range(
+                    safe_path, offset or 0, limit or READ_CHUNK_SIZE
+                )
+                eof = next_offset >= size_bytes
+                return {
+                    "content": data.decode('utf-8'),
+                    "file_path": file_path,
+                    "size_bytes": size_bytes,
+                    "lines": _total_lines(safe_path),
+                    "offset": start,
+                    "next_offset": None if eof else next_offset,
+                    "eof": eof,
+                }
+
+            if line_mode:
+                first = start_line or 1
+                data, total_lines, has_more = _read_line_range(safe_path, first, end_line)
+                return {
+                    "content": data.decode('utf-8'),
+                    "file_path": file_path,
+                    "size_bytes": size_bytes,
+                    "lines": total_lines,
+                    "start_line": first,
+                    "end_line": end_line if has_more else total_lines,
+                    "next_line": end_line + 1 if has_more and end_line is not None else None,
+                    "eof": not has_more,
+                }
+
+            content = read_cache.get_or_load(safe_path, "text", _load_text)
             return {
                 "content": content,
                 "file_path": file_path,
-                "size_bytes": safe_path.stat().st_size,
-                "lines": len(content.split('\n'))
+                "size_bytes": size_bytes,
+                "lines": content.count('\n') + 1
             }
         except UnicodeDecodeError:
             raise ValueError(f"File {file_path} is not a valid text file")
 
-    @mcp.tool(title="Write Text File", description="Write content to a text file")
-    def write_text_file(file_path: str, content: str, overwrite: bool = False) -> dict[str, str]:
+    @mcp.tool(title="Write Text File", description="Write, append to or patch a text file")
+    @offload_io
+    def write_text_file(
+        file_path: str,
+        content: str,
+        overwrite: bool = False,
+        mode: Literal["write", "append", "patch_lines", "patch_bytes"] = "write",
+        start_line: int | None = None,
+        end_line: int | None = None,
+        offset: int | None = None,
+        length: int | None = None,
+    ) -> dict[str, Any]:
         """
         Write content to a text file.
-        
+
+        Modes:
+        - write: create the file, or replace it when overwrite=True
+        - append: append content to the end of the file (created if missing)
+        - patch_lines: replace lines start_line..end_line (1-based, inclusive)
+          with content; end_line = start_line - 1 inserts before start_line
+        - patch_bytes: replace length bytes starting at offset with content
+
+        Rewrites go through a temporary file and an atomic rename, and
+        appends use O_APPEND, so readers never observe partially written
+        content.
+
         Args:
             file_path: Relative path to the file within workspace
             content: Content to write
-            overwrite: Whether to overwrite existing file
+            overwrite: Whether to overwrite existing file (write mode)
+            mode: Write mode
+            start_line: First line to replace (patch_lines)
+            end_line: Last line to replace (patch_lines, defaults to start_line)
+            offset: Byte offset to start replacing at (patch_bytes)
+            length: Number of bytes to replace (patch_bytes, defaults to 0)
         """
         safe_path = _get_safe_path(file_path)
+        data = content.encode('utf-8')
 
-        if safe_path.exists() and not overwrite:
-            raise ValueError(f"File {file_path} already exists. Set overwrite=True to replace it.")
+        if mode == "write":
+            if safe_path.exists() and not overwrite:
+                raise ValueError(f"File {file_path} already exists. Set overwrite=True to replace it.")
 
-        # Create parent directories if they don't exist
-        safe_path.parent.mkdir(parents=True, exist_ok=True)
+            # Create parent directories if they don't exist
+            safe_path.parent.mkdir(parents=True, exist_ok=True)
+            _atomic_write(safe_path, lambda fd: _write_all(fd, data))
+
+        elif mode == "append":
+            safe_path.parent.mkdir(parents=True, exist_ok=True)
+            _append_bytes(safe_path, data)
 
-        safe_path.write_text(content, encoding='utf-8')
+        else:
+            if not safe_path.is_file():
+                raise FileNotFoundError(f"File {file_path} not found")
+            size = safe_path.stat().st_size
+
+            if mode == "patch_lines":
+                if start_line is None or start_line < 1:
+                    raise ValueError("patch_lines requires start_line >= 1")
+                last = start_line if end_line is None else end_line
+                if last < start_line - 1:
+                    raise ValueError("end_line must be >= start_line - 1")
+                offsets = _line_start_offsets(safe_path, [start_line, last + 1])
+                if start_line not in offsets:
+                    raise ValueError(f"start_line {start_line} is beyond the end of {file_path}")
+                start, end = offsets[start_line], offsets.get(last + 1, size)
+                # 被替换的行以换行符结尾（或插入点后还有内容）时补齐换行
+                if data and not data.endswith(b'\n') and (end < size or _ends_with_newline(safe_path, start, end)):
+                    data += b'\n'
+            elif mode == "patch_bytes":
+                if offset is None or offset < 0:
+                    raise ValueError("patch_bytes requires offset >= 0")
+                start, end = offset, offset + (length or 0)
+                if length is not None and length < 0:
+                    raise ValueError("length must be >= 0")
+                if end > size:
+                    raise ValueError(f"Byte range exceeds file size ({size} bytes)")
+            else:
+                raise ValueError("Invalid mode. Use: write, append, patch_lines, or patch_bytes")
+
+            _patch_bytes(safe_path, start, end, data)
+
+        read_cache.invalidate(safe_path)
 
         return {
             "message": f"Successfully wrote to {file_path}",
             "file_path": file_path,
+            "mode": mode,
             "size_bytes": safe_path.stat().st_size,
-            "lines": len(content.split('\n'))
+            "lines": content.count('\n') + 1
         }
 
-    @mcp.tool(title="Read JSON File", description="Read and parse a JSON file")
-    def read_json_file(file_path: str) -> dict:
+    @mcp.tool(title="Write Files", description="Write many text files in one call")
+    @offload_io
+    def write_files(files: list[FileWriteEntry], fsync: bool = True) -> dict[str, Any]:
+        """
+        Write multiple text files in a single call.
+
+        All paths are validated before anything is written. Files are written
+        concurrently through temporary files and atomic renames, and fsyncs
+        are grouped per batch. Each file gets its own result entry.
+
+        Args:
+            files: Files to write, each with path, content and mode
+            fsync: Whether to flush written files and directories to disk
+        """
+        if not files:
+            raise ValueError("files must not be empty")
+
+        results = _write_batch(files, fsync)
+        failed = sum(1 for result in results if result["status"] == "error")
+
+        return {
+            "results": results,
+            "written": len(results) - failed,
+            "failed": failed
+        }
+
+    @mcp.tool(title="Read JSON File", description="Read and parse a JSON file, optionally projecting a JSON path")
+    @offload_io
+    def read_json_file(
+        file_path: str,
+        path: str | None = None,
+        offset: int | None = None,
+        limit: int | None = None,
+    ) -> dict:
         """
         Read and parse a JSON file.
-        
+
+        path selects part of the document using a JSONPath subset, e.g.
+        "$.items[0:50].id" ($, .key, ['key'], [n], [start:stop], [*]).
+        offset/limit page through the array selected by path (or the
+        top-level array). Large files are parsed incrementally and reading
+        stops as soon as the selection is complete.
+
         Args:
             file_path: Relative path to the JSON file within workspace
+            path: Optional JSON path to project
+            offset: Index of the first array element to return
+            limit: Maximum number of array elements to return
         """
         safe_path = _get_safe_path(file_path)
 
         if not safe_path.exists():
             raise FileNotFoundError(f"File {file_path} not found")
 
+        paging = offset is not None or limit is not None
+        if offset is not None and offset < 0:
+            raise ValueError("offset must be >= 0")
+        if limit is not None and limit <= 0:
+            raise ValueError("limit must be > 0")
+
         try:
-            with safe_path.open('r', encoding='utf-8') as f:
-                data = json.load(f)
-            return {
+            if path is None and not paging:
+                data = read_cache.get_or_load(safe_path, "json", _load_json)
+                return {
+                    "data": data,
+                    "file_path": file_path,
+                    "size_bytes": safe_path.stat().st_size
+                }
+
+            steps = _parse_json_path(path or "$")
+            if paging:
+                if any(step[0] == "slice" for step in steps):
+                    raise ValueError("offset/limit cannot be combined with a slice or wildcard path")
+                first = offset or 0
+                # 多取一个元素用于判断是否还有下一页
+                stop = first + limit + 1 if limit is not None else None
+                steps.append(("slice", first, stop))
+
+            data = _select_json(safe_path, steps)
+            if data is _MISSING:
+                raise ValueError(f"Path {path} not found in {file_path}")
+
+            result = {
                 "data": data,
                 "file_path": file_path,
-                "size_bytes": safe_path.stat().st_size
+                "size_bytes": safe_path.stat().st_size,
+                "path": path or "$",
             }
+            if paging:
+                has_more = limit is not None and len(data) > limit
+                if has_more:
+                    data = data[:limit]
+                result["data"] = data
+                result["next_offset"] = (offset or 0) + len(data) if has_more else None
+            return result
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON in file {file_path}: {e}")
 
     @mcp.tool(title="Write JSON File", description="Write data to a JSON file")
-    def write_json_file(file_path: str, data: dict, overwrite: bool = False, indent: int = 2) -> dict[str, str]:
+    @offload_io
+    def write_json_file(file_path: str, data: dict, overwrite: bool = False, indent: int = 2) -> dict[str, Any]:
         """
         Write data to a JSON file.
         
@@ -156,8 +1376,9 @@ def register_file_tools(mcp: FastMCP) -> None:
         # Create parent directories if they don't exist
         safe_path.parent.mkdir(parents=True, exist_ok=True)
 
-        with safe_path.open('w', encoding='utf-8') as f:
-            json.dump(data, f, indent=indent, ensure_ascii=False)
+        encoded = json.dumps(data, indent=indent, ensure_ascii=False).encode('utf-8')
+        _atomic_write(safe_path, lambda fd: _write_all(fd, encoded))
+        read_cache.invalidate(safe_path)
 
         return {
             "message": f"Successfully wrote JSON to {file_path}",
@@ -165,7 +1386,77 @@ def register_file_tools(mcp: FastMCP) -> None:
             "size_bytes": safe_path.stat().st_size
         }
 
+    @mcp.tool(title="Hash Files", description="Compute content digests for change detection")
+    @offload_io
+    def hash_files(
+        paths: list[str] | None = None,
+        directory_path: str | None = None,
+        include: list[str] | None = None,
+        exclude: list[str] | None = None,
+        algorithm: str = "sha256",
+        max_files: int = 10000,
+    ) -> dict[str, Any]:
+        """
+        Compute streaming content digests for workspace files.
+
+        Pass explicit paths, or a directory to hash recursively (filtered by
+        include/exclude globs). Digests are cached and reused while a file's
+        mtime, size and inode are unchanged, so repeated syncs only read
+        changed files.
+
+        Args:
+            paths: Relative file paths to hash
+            directory_path: Relative directory to hash recursively
+            include: Glob patterns files must match (directory mode)
+            exclude: Glob patterns to skip (directory mode)
+            algorithm: Digest algorithm (sha256, blake2b, sha1, md5)
+            max_files: Maximum number of files to hash
+        """
+        if algorithm not in HASH_ALGORITHMS:
+            raise ValueError(f"Unsupported algorithm. Use: {', '.join(HASH_ALGORITHMS)}")
+        if (paths is None) == (directory_path is None):
+            raise ValueError("Provide either paths or directory_path")
+        if max_files <= 0:
+            raise ValueError("max_files must be > 0")
+
+        truncated = False
+        if paths is not None:
+            targets = [(path, _get_safe_path(path)) for path in paths[:max_files]]
+            truncated = len(paths) > max_files
+        else:
+            targets = []
+            for relative, entry in walk_workspace(directory_path or ".", include, exclude):
+                if len(targets) >= max_files:
+                    truncated = True
+                    break
+                targets.append((relative, Path(entry.path)))
+
+        executor = _get_fanout_executor()
+        futures = [executor.submit(digest_cache.digest, target, algorithm) for _, target in targets]
+
+        digests = {}
+        errors = {}
+        cached = 0
+        for (name, _), future in zip(targets, futures, strict=True):
+            try:
+                digest, from_cache = future.result()
+            except OSError as e:
+                errors[name] = str(e)
+                continue
+            digests[name] = digest
+            cached += from_cache
+
+        return {
+            "algorithm": algorithm,
+            "digests": digests,
+            "errors": errors,
+            "count": len(digests),
+            "cached": cached,
+            "truncated": truncated
+        }
+
     @mcp.tool(title="File Info", description="Get file information")
+    @offload_io
     def file_info(file_path: str) -> dict:
         """
         Get detailed information about a file or directory.
@@ -191,6 +1482,7 @@ def register_file_tools(mcp: FastMCP) -> None:
         }
 
     @mcp.tool(title="Create Directory", description="Create a new directory")
+    @offload_io
     def create_directory(directory_path: str) -> dict[str, str]:
         """
         Create a new directory.
@@ -206,3 +1498,8 @@ def register_file_tools(mcp: FastMCP) -> None:
             "message": f"Directory {directory_path} created successfully",
             "path": directory_path
         }
+
+    @mcp.tool(title="File Cache Stats", description="Get file read cache statistics")
+    def file_cache_stats() -> dict[str, int]:
+        """Get hit/miss/eviction counters of the file read cache."""
+        return read_cache.stats()
@@ -0,0 +1,259 @@
+"""
+全文检索工具模块
+
+基于 SQLite FTS5 为工作目录维护持久化倒排索引，提供按相关度排序、
+带行号与摘要的全文检索。索引存放在工作目录之外，避免被文件工具列出或改写；
+索引按文件 mtime/size 增量更新，短时间内的重复检索跳过重新扫描。
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from mcp.server.fastmcp import FastMCP
+
+from ..config import settings
+from . import file_operations
+from .file_operations import _get_safe_path, offload_io
+
+# 默认索引目录名（与工作目录同级）
+INDEX_DIR_NAME = ".search_index"
+
+# 超过该大小的文件不建立索引
+SEARCH_MAX_FILE_BYTES = 32 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lines (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL,
+    line_no INTEGER NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lines_file_id ON lines(file_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS lines_fts USING fts5(
+    content, content='lines', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS lines_ai AFTER INSERT ON lines BEGIN
+    INSERT INTO lines_fts(rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS lines_ad AFTER DELETE ON lines BEGIN
+    INSERT INTO lines_fts(lines_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+"""
+
+_QUERY_TERM = re.compile(r"\w+")
+
+# 同一时间只允许一个线程更新索引
+_refresh_lock = threading.Lock()
+
+# 各索引最近一次完成扫描的时间（time.monotonic）
+_last_refresh: dict[str, float] = {}
+
+
+def _index_path() -> Path:
+    """当前工作目录对应的索引文件路径（位于工作目录之外，按工作目录路径区分）"""
+    root = file_operations.SAFE_DIR.resolve()
+    index_dir = Path(settings.search_index_dir) if settings.search_index_dir else root.parent / INDEX_DIR_NAME
+    key = hashlib.blake2b(str(root).encode("utf-8"), digest_size=8).hexdigest()
+    return index_dir / f"{root.name}-{key}.sqlite3"
+
+
+def _connect() -> sqlite3.Connection:
+    """打开（必要时创建）当前工作目录的索引数据库"""
+    index_path = _index_path()
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(index_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _scan_workspace(root: Path) -> dict[str, tuple[int, int]]:
+    """遍历工作目录，返回 {相对路径: (mtime_ns, size)}"""
+    found: dict[str, tuple[int, int]] = {}
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(Path(entry.path))
+                    elif entry.is_file(follow_symlinks=False):
+                        stat = entry.stat(follow_symlinks=False)
+                        if stat.st_size <= SEARCH_MAX_FILE_BYTES:
+                            relative = Path(entry.path).relative_to(root).as_posix()
+                            found[relative] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            continue
+    return found
+
+
+def _read_lines(path: Path) -> list[tuple[int, str]] | None:
+    """逐行读取文本文件；二进制或非 UTF-8 文件返回 None"""
+    try:
+        with path.open("rb") as f:
+            if b"\0" in f.read(8192):
+                return None
+            f.seek(0)
+            return [
+                (line_no, line.decode("utf-8").rstrip("\r\n"))
+                for line_no, line in enumerate(f, start=1)
+                if line.strip()
+            ]
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def refresh_index(conn: sqlite3.Connection, max_age: float = 0.0) -> dict[str, int]:
+    """
+    根据 mtime/size 增量更新索引，返回更新统计。
+
+    距上次扫描不足 max_age 秒时跳过扫描并返回空字典。
+    """
+    root = file_operations.SAFE_DIR
+    key = str(_index_path())
+    with _refresh_lock:
+        last = _last_refresh.get(key)
+        if max_age and last is not None and time.monotonic() - last < max_age:
+            return {}
+        current = _scan_workspace(root)
+        indexed = {
+            path: (file_id, mtime_ns, size)
+            for file_id, path, mtime_ns, size in conn.execute(
+                "SELECT id, path, mtime_ns, size FROM files"
+            )
+        }
+
+        removed = [entry[0] for path, entry in indexed.items() if path not in current]
+        changed = [
+            path for path, signature in current.items()
+            if path not in indexed or indexed[path][1:] != signature
+        ]
+
+        with conn:
+            for file_id in removed:
+                conn.execute("DELETE FROM lines WHERE file_id = ?", (file_id,))
+                conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+            for path in changed:
+                if path in indexed:
+                    conn.execute("DELETE FROM lines WHERE file_id = ?", (indexed[path][0],))
+                mtime_ns, size = current[path]
+                conn.execute(
+                    "INSERT INTO files(path, mtime_ns, size) VALUES (?, ?, ?) "
+                    "ON CONFLICT(path) DO UPDATE SET mtime_ns = excluded.mtime_ns, size = excluded.size",
+                    (path, mtime_ns, size),
+                )
+                file_id = conn.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()[0]
+                lines = _read_lines(root / path)
+                if lines:
+                    conn.executemany(
+                        "INSERT INTO lines(file_id, line_no, content) VALUES (?, ?, ?)",
+                        ((file_id, line_no, content) for line_no, content in lines),
+                    )
+
+        _last_refresh[key] = time.monotonic()
+        return {
+            "indexed_files": len(current),
+            "updated_files": len(changed),
+            "removed_files": len(removed),
+        }
+
+
+def _build_match_query(query: str) -> str:
+    """将用户输入转换为安全的 FTS5 查询（所有词项均需出现）"""
+    terms = _QUERY_TERM.findall(query)
+    if not terms:
+        raise ValueError("Query must contain at least one word")
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def register_search_tools(mcp: FastMCP) -> None:
+    """注册全文检索相关的工具"""
+
+    @mcp.tool(title="Search Workspace", description="Full-text search across workspace files")
+    @offload_io
+    def search_workspace(
+        query: str,
+        limit: int = 20,
+        path_prefix: str | None = None,
+        refresh: bool = True,
+    ) -> dict[str, Any]:
+        """
+        Search workspace files using a persistent inverted index.
+
+        Hits are ranked by BM25 and include the line number and a snippet
+        with matched terms wrapped in [brackets]. The index is updated
+        incrementally from file mtime/size before searching; rescans are
+        skipped when the previous one is more recent than the configured
+        refresh interval.
+
+        Args:
+            query: Words to search for (all words must appear on the line)
+            limit: Maximum number of hits to return
+            path_prefix: Only return hits under this workspace-relative path
+            refresh: Whether to pick up file changes before searching
+        """
+        if limit <= 0:
+            raise ValueError("limit must be > 0")
+
+        match_query = _build_match_query(query)
+        prefix = None
+        if path_prefix:
+            _get_safe_path(path_prefix)
+            prefix = Path(path_prefix).as_posix().strip("/")
+            if prefix == ".":
+                prefix = None
+
+        conn = _connect()
+        try:
+            stats = refresh_index(conn, settings.search_refresh_interval) if refresh else {}
+
+            sql = (
+                "SELECT files.path, lines.line_no, "
+                "snippet(lines_fts, 0, '[', ']', '...', 16), bm25(lines_fts) "
+                "FROM lines_fts "
+                "JOIN lines ON lines.id = lines_fts.rowid "
+                "JOIN files ON files.id = lines.file_id "
+                "WHERE lines_fts MATCH ?"
+            )
+            params: list[Any] = [match_query]
+            if prefix:
+                sql += " AND (files.path = ? OR files.path LIKE ? ESCAPE '\\')"
+                escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                params += [prefix, escaped + "/%"]
+            sql += " ORDER BY bm25(lines_fts) LIMIT ?"
+            params.append(limit)
+
+            hits = [
+                {
+                    "file_path": path,
+                    "line": line_no,
+                    "snippet": snippet,
+                    "score": round(-score, 4),
+                }
+                for path, line_no, snippet, score in conn.execute(sql, params)
+            ]
+        finally:
+            conn.close()
+
+        return {
+            "query": query,
+            "hits": hits,
+            "count": len(hits),
+            "refreshed": bool(stats),
+            **stats,
+        }
@@ -0,0 +1,273 @@
+"""
+相似文档检测工具模块
+
+基于 MinHash 签名与 LSH 分桶在工作目录文本文件中查找近似重复文档，
+避免两两比较。签名按文件内容摘要缓存，重复运行时只处理变化的文件。
+"""
+
+import random
+import re
+import threading
+import zlib
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+from typing import Any
+
+from mcp.server.fastmcp import FastMCP
+
+from .file_operations import digest_cache, offload_io, walk_workspace
+
+# MinHash 哈希使用的梅森素数
+_MERSENNE_PRIME = (1 << 61) - 1
+
+# 超过该大小的文件不参与比较
+DEDUP_MAX_FILE_BYTES = 32 * 1024 * 1024
+
+# 签名缓存最多保留的条目数
+SIGNATURE_CACHE_MAX_ENTRIES = 10000
+
+_WORD = re.compile(r'\w+')
+
+
+class MinHasher:
+    """
+    单次置换 MinHash（one permutation hashing）。
+
+    每个词组只哈希一次：按哈希值分到 num_perm 个桶中各取最小值，空桶从右侧
+    最近的非空桶借值（加上距离偏移）补齐，开销与词组数量线性相关，而不是
+    词组数量乘以置换次数。
+    """
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.mix = (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+
+    @staticmethod
+    def shingles(text: str, shingle_size: int) -> set[int]:
+        """将文本切为小写词的 k-gram 并哈希为整数"""
+        words = _WORD.findall(text.lower())
+        if len(words) <= shingle_size:
+            return {zlib.crc32(" ".join(words).encode())} if words else set()
+        return {
+            zlib.crc32(" ".join(words[i:i + shingle_size]).encode())
+            for i in range(len(words) - shingle_size + 1)
+        }
+
+    def signature(self, shingles: set[int]) -> tuple[int, ...]:
+        """计算 MinHash 签名；空集合返回全最大值签名"""
+        num_perm = self.num_perm
+        prime = _MERSENNE_PRIME
+        if not shingles:
+            return (prime,) * num_perm
+        a, b = self.mix
+        bins = [prime] * num_perm
+        for value in shingles:
+            rank, index = divmod((a * value + b) % prime, num_perm)
+            if rank < bins[index]:
+                bins[index] = rank
+
+        # 从右向左补齐空桶（首个非空桶之后的空桶回绕借值）；
+        # 偏移保证借来的值与真实值不会偶然相等
+        filled = [index for index, rank in enumerate(bins) if rank != prime]
+        if len(filled) < num_perm:
+            offset = prime // num_perm + 1
+            source = filled[0] + num_perm
+            for index in range(num_perm - 1, -1, -1):
+                if bins[index] != prime:
+                    source = index
+                else:
+                    bins[index] = bins[source % num_perm] + (source - index) * offset
+        return tuple(bins)
+
+
+def estimate_similarity(left: tuple[int, ...], right: tuple[int, ...]) -> float:
+    """用签名中相等位置的比例估计 Jaccard 相似度"""
+    return sum(a == b for a, b in zip(left, right, strict=True)) / len(left)
+
+
+def choose_bands(num_perm: int, threshold: float) -> tuple[int, int]:
+    """选择 (bands, rows)，使 LSH 的 S 曲线拐点 (1/b)^(1/r) 最接近阈值"""
+    options = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    return min(options, key=lambda option: abs((1 / option[0]) ** (1 / option[1]) - threshold))
+
+
+class SignatureCache:
+    """按 (内容摘要, 参数) 缓存 MinHash 签名的 LRU 缓存"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, int, int], tuple[int, ...]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple[str, int, int]) -> tuple[int, ...] | None:
+        with self._lock:
+            signature = self._entries.get(key)
+            if signature is not None:
+                self._entries.move_to_end(key)
+            return signature
+
+    def put(self, key: tuple[str, int, int], signature: tuple[int, ...]) -> None:
+        with self._lock:
+            self._entries[key] = signature
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+signature_cache = SignatureCache(SIGNATURE_CACHE_MAX_ENTRIES)
+
+
+def _read_document(path: Path) -> str | None:
+    """读取文本文件；二进制或非 UTF-8 文件返回 None"""
+    data = path.read_bytes()
+    if b"\0" in data[:8192]:
+        return None
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+
+
+def _cluster(pairs: list[tuple[int, int, float]], count: int) -> list[tuple[list[int], float]]:
+    """并查集合并相似对，返回 (成员下标, 簇内最低相似度)"""
+    parent = list(range(count))
+
+    def find(node: int) -> int:
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for left, right, _ in pairs:
+        parent[find(left)] = find(right)
+
+    members: defaultdict[int, list[int]] = defaultdict(list)
+    lowest: dict[int, float] = {}
+    for left, _, similarity in pairs:
+        root = find(left)
+        lowest[root] = min(lowest.get(root, 1.0), similarity)
+    for node in range(count):
+        members[find(node)].append(node)
+    return [(nodes, lowest[root]) for root, nodes in members.items() if len(nodes) > 1]
+
+
+def register_similarity_tools(mcp: FastMCP) -> None:
+    """注册相似文档检测相关的工具"""
+
+    @mcp.tool(title="Find Near Duplicates", description="Find near-duplicate text files using MinHash/LSH")
+    @offload_io
+    def find_near_duplicates(
+        directory_path: str = ".",
+        include: list[str] | None = None,
+        exclude: list[str] | None = None,
+        threshold: float = 0.8,
+        shingle_size: int = 5,
+        num_perm: int = 128,
+        max_files: int = 10000,
+    ) -> dict[str, Any]:
+        """
+        Group workspace text files whose contents are near-duplicates.
+
+        Files are compared through MinHash signatures of word shingles, and
+        only files sharing an LSH bucket are compared, so the cost grows
+        roughly linearly with the number of files. Files with identical
+        signatures are grouped directly, and files without any words are
+        reported as skipped. Signatures are cached by
+        content digest, so reruns only read and hash changed files.
+
+        Args:
+            directory_path: Relative directory to scan recursively
+            include: Glob patterns files must match
+            exclude: Glob patterns to skip
+            threshold: Minimum estimated Jaccard similarity (0-1) to group files
+            shingle_size: Number of consecutive words per shingle
+            num_perm: Number of MinHash permutations (signature length)
+            max_files: Maximum number of files to compare
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        if shingle_size <= 0 or num_perm <= 0 or max_files <= 0:
+            raise ValueError("shingle_size, num_perm and max_files must be > 0")
+
+        hasher = MinHasher(num_perm)
+        names: list[str] = []
+        signatures: list[tuple[int, ...]] = []
+        skipped: list[str] = []
+        computed = 0
+        truncated = False
+
+        for relative, entry in walk_workspace(directory_path, include, exclude):
+            if len(names) >= max_files:
+                truncated = True
+                break
+            path = Path(entry.path)
+            try:
+                if entry.stat().st_size > DEDUP_MAX_FILE_BYTES:
+                    skipped.append(relative)
+                    continue
+                digest, _ = digest_cache.digest(path, "blake2b")
+                key = (digest, shingle_size, num_perm)
+                signature = signature_cache.get(key)
+                if signature is None:
+                    text = _read_document(path)
+                    if text is None:
+                        skipped.append(relative)
+                        continue
+                    shingles = hasher.shingles(text, shingle_size)
+                    # 没有任何词的文档缓存为空签名，之后直接跳过
+                    signature = hasher.signature(shingles) if shingles else ()
+                    signature_cache.put(key, signature)
+                    computed += 1
+            except OSError:
+                skipped.append(relative)
+                continue
+            if not signature:
+                skipped.append(relative)
+                continue
+            names.append(relative)
+            signatures.append(signature)
+
+        # 签名完全相同的文件先归为一组（相似度 1.0），LSH 只处理每组的代表
+        duplicates: dict[tuple[int, ...], list[int]] = {}
+        for index, signature in enumerate(signatures):
+            duplicates.setdefault(signature, []).append(index)
+        pairs = [
+            (members[0], member, 1.0)
+            for members in duplicates.values()
+            for member in members[1:]
+        ]
+        representatives = [members[0] for members in duplicates.values()]
+
+        bands, rows = choose_bands(num_perm, threshold)
+        buckets: defaultdict[tuple[int, tuple[int, ...]], list[int]] = defaultdict(list)
+        for index in representatives:
+            signature = signatures[index]
+            for band in range(bands):
+                buckets[(band, signature[band * rows:(band + 1) * rows])].append(index)
+
+        candidates: set[tuple[int, int]] = set()
+        for members in buckets.values():
+            for i, left in enumerate(members):
+                for right in members[i + 1:]:
+                    candidates.add((left, right))
+
+        for left, right in candidates:
+            similarity = estimate_similarity(signatures[left], signatures[right])
+            if similarity >= threshold:
+                pairs.append((left, right, similarity))
+
+        clusters: list[dict[str, Any]] = [
+            {"files": sorted(names[i] for i in nodes), "min_similarity": round(similarity, 4)}
+            for nodes, similarity in _cluster(pairs, len(names))
+        ]
+        clusters.sort(key=lambda cluster: (-len(cluster["files"]), cluster["files"]))
+
+        return {
+            "clusters": clusters,
+            "count": len(clusters),
+            "files_compared": len(names),
+            "signatures_computed": computed,
+            "skipped": skipped,
+            "truncated": truncated,
+        }
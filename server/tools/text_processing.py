@@ -4,30 +4,746 @@
 提供各种文本处理和分析功能的 MCP 工具。
 """
 
+import functools
+import itertools
+import multiprocessing
 import re
-from typing import Any
+import threading
+import unicodedata
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import Any, Literal
 
 from mcp.server.fastmcp import FastMCP
 
+from ..config import settings
+from .file_operations import (
+    _atomic_write,
+    _get_fanout_executor,
+    _get_safe_path,
+    _write_all,
+    offload_io,
+    walk_workspace,
+)
 
-def register_text_tools(mcp: FastMCP) -> None:
-    """注册文本处理相关的工具"""
+# 分析大文本时每次处理的块大小（字符数）
+ANALYZE_CHUNK_SIZE = 1024 * 1024
+
+# 批量处理超过该条数时分发到进程池
+BATCH_PARALLEL_THRESHOLD = 2000
+
+# 进程池中每个任务处理的条数
+BATCH_CHUNK_SIZE = 500
+
+# 超过该大小的文件不做批量替换
+REPLACE_MAX_FILE_BYTES = 32 * 1024 * 1024
+
+# 服务进程中有事件循环与多个线程池，直接 fork 可能让子进程继承被持有的锁而死锁；
+# 使用 forkserver（预先导入本模块，之后的子进程从干净的单线程服务进程 fork），
+# 不支持的平台使用 spawn。正则工作进程与批量处理进程池共用该上下文
+_MP_CONTEXT: multiprocessing.context.BaseContext
+if "forkserver" in multiprocessing.get_all_start_methods():
+    _MP_CONTEXT = multiprocessing.get_context("forkserver")
+    _MP_CONTEXT.set_forkserver_preload([__name__])
+else:
+    _MP_CONTEXT = multiprocessing.get_context("spawn")
+
+_EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+_URL_PATTERN = re.compile(
+    r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
+)
+
+# 各类实体的正则；按需合并为一个带命名分组的交替模式，单遍扫描
+_ENTITY_PATTERNS: dict[str, str] = {
+    "email": _EMAIL_PATTERN.pattern,
+    "url": _URL_PATTERN.pattern,
+    "ipv4": r'\b(?:(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)\.){3}(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)\b',
+    # 两侧排除点分数字，避免把 IPv4 地址的一部分识别为电话号码
+    "phone": r'(?<![\w+.])(?:\+\d{1,3}[ .-]?)?(?:\(\d{2,4}\)[ .-]?|\d{2,4}[ .-])\d{3,4}[ .-]?\d{3,4}\b(?![\d.]\d)',
+}
+EntityKind = Literal["email", "url", "ipv4", "phone"]
+
+# 块尾保留重扫的字符数：结束于该区域内的匹配可能被块边界截断
+ENTITY_CARRY_CHARS = 1024
+
+# 续扫位置之前保留的字符数，供 \\b 与后顾断言检查前一个字符
+_ENTITY_CONTEXT_CHARS = 8
+
+# 估算 token 数时每个 token 对应的平均字符数
+CHARS_PER_TOKEN = 4
+
+# 分块边界：段落为空行，句子为句末标点后的空白（中文句末标点后可无空白），
+# none 只在超长时于空白处断开
+_CHUNK_BOUNDARIES = {
+    "none": re.compile(r'\s+'),
+    "paragraph": re.compile(r'\n[ \t]*\n\s*'),
+    "sentence": re.compile(r'\n[ \t]*\n\s*|[.!?]+\s+|[。！？]+\s*'),
+}
+ChunkBoundary = Literal["paragraph", "sentence", "none"]
+
+# 上述边界只由这些字符组成：跨越硬切点的边界一定落在切点前连续的这类字符中
+_BOUNDARY_CHARS = frozenset(".!?。！？")
+
+# ASCII slug：小写后将所有非字母数字字符映射为空格，再以 split/join 合并为连字符
+_ASCII_SLUG_TABLE = str.maketrans({
+    chr(cp): " " for cp in range(128) if not chr(cp).isalnum() or chr(cp).isupper()
+})
+# 组合符号（M*）所在的码位平面：基本多文种平面、辅助多文种平面与变体选择符所在的第 14 平面
+_MARK_PLANES = ((0x0000, 0x1FFFF), (0xE0000, 0xE0FFF))
+
+# NFKD 分解后只去掉紧跟在拉丁字母后的附加符号（café -> cafe），
+# 西里尔字母 й、天城文元音符号等属于文字本身的组合字符保持不变
+_LATIN_MARKS = re.compile(
+    r'(?<=[a-z])[\u0300-\u036F\u1AB0-\u1AFF\u1DC0-\u1DFF\u20D0-\u20FF\uFE20-\uFE2F]+'
+)
+# 不能通过分解去掉附加符号的拉丁字母
+_TRANSLITERATE_TABLE = str.maketrans({
+    "ß": "ss", "æ": "ae", "œ": "oe", "ø": "o", "đ": "d", "ł": "l", "þ": "th", "ð": "d", "ı": "i",
+})
+
+@functools.lru_cache(maxsize=1)
+def _slug_separator() -> re.Pattern[str]:
+    """
+    Unicode slug 的分隔符：字母、数字、组合符号（L*/N*/M*）以外的字符及下划线。
+
+    re 的 \\W 会把组合符号也当作分隔符，从而拆散天城文、泰文等文字的词，
+    因此在首次使用时收集组合符号的码位区间并加入字符类。
+    """
+    ranges = []
+    for first, last in _MARK_PLANES:
+        start = None
+        for cp in range(first, last + 2):
+            is_mark = cp <= last and unicodedata.category(chr(cp)).startswith("M")
+            if is_mark and start is None:
+                start = cp
+            elif not is_mark and start is not None:
+                ranges.append(f"{re.escape(chr(start))}-{re.escape(chr(cp - 1))}")
+                start = None
+    return re.compile(rf'(?:[^\w{"".join(ranges)}]|_)+')
+
+
+_CASE_CONVERTERS: dict[str, Callable[[str], str]] = {
+    "upper": str.upper,
+    "lower": str.lower,
+    "title": str.title,
+    "capitalize": str.capitalize,
+}
+
+_SENTENCE_SPLIT = re.compile(r'[.!?]+')
+# 将句末标点替换为空格，用于统计句子内的词数
+_SENTENCE_PUNCT_TO_SPACE = str.maketrans('.!?', '   ')
+
+
+class TextAnalyzer:
+    """
+    单遍流式文本分析器。
+
+    按块喂入文本，每块只做一轮 C 层面的 split/count 操作，额外内存只与块大小
+    和词汇量相关。count_words 与 text_statistics 均由它提供结果；
+    statistics=False 时跳过只有 text_statistics 需要的句子与词汇统计。
+    """
+
+    def __init__(self, statistics: bool = True) -> None:
+        self.collect_statistics = statistics
+        self.characters = 0
+        self.spaces = 0
+        self.newlines = 0
+        self.words = 0
+        self.word_length_total = 0
+        self.sentences = 0
+        self.sentence_words = 0
+        self.vocabulary: set[str] = set()
+        self._carry: list[str] = []
+        self._sentence_open = False
 
-    @mcp.tool(title="Count Words", description="Count words in text")
-    def count_words(text: str) -> dict[str, int]:
-        """Count the number of words, characters, and lines in text."""
-        words = len(text.split())
-        characters = len(text)
-        characters_no_spaces = len(text.replace(" ", ""))
-        lines = len(text.split("\n"))
+    def feed(self, chunk: str) -> None:
+        """喂入一段文本；末尾未结束的词会保留到下一块"""
+        end = len(chunk)
+        while end > 0 and not chunk[end - 1].isspace():
+            end -= 1
+        if not end:
+            self._carry.append(chunk)
+            return
+        head = chunk[:end]
+        if self._carry:
+            head = "".join(self._carry) + head
+        self._carry = [chunk[end:]] if end < len(chunk) else []
+        self._process(head)
+
+    def finish(self) -> "TextAnalyzer":
+        """处理剩余内容，返回自身以便链式调用"""
+        if self._carry:
+            self._process("".join(self._carry))
+            self._carry = []
+        return self
+
+    def _process(self, chunk: str) -> None:
+        self.characters += len(chunk)
+        self.spaces += chunk.count(" ")
+        self.newlines += chunk.count("\n")
+
+        tokens = chunk.split()
+        self.words += len(tokens)
+        if not self.collect_statistics:
+            return
+        self.word_length_total += sum(map(len, tokens))
+        self.vocabulary.update(chunk.lower().split())
+
+        # 句子：以 [.!?]+ 分隔且含非空白内容的片段，跨块的片段只计一次
+        self.sentence_words += len(chunk.translate(_SENTENCE_PUNCT_TO_SPACE).split())
+        pieces = _SENTENCE_SPLIT.split(chunk)
+        filled = [bool(piece.strip()) for piece in pieces]
+        self.sentences += sum(filled)
+        if self._sentence_open and filled[0]:
+            self.sentences -= 1
+        if len(pieces) == 1:
+            self._sentence_open = self._sentence_open or filled[0]
+        else:
+            self._sentence_open = filled[-1]
+
+    def word_counts(self) -> dict[str, int]:
+        """count_words 的结果"""
+        return {
+            "words": self.words,
+            "characters": self.characters,
+            "characters_no_spaces": self.characters - self.spaces,
+            "lines": self.newlines + 1
+        }
+
+    def statistics(self) -> dict[str, Any]:
+        """text_statistics 的结果"""
+        avg_word_length = self.word_length_total / self.words if self.words else 0
+        avg_sentence_length = self.sentence_words / self.sentences if self.sentences else 0
 
         return {
-            "words": words,
-            "characters": characters,
-            "characters_no_spaces": characters_no_spaces,
-            "lines": lines
+            "total_characters": self.characters,
+            "total_words": self.words,
+            "total_sentences": self.sentences,
+            "average_word_length": round(avg_word_length, 2),
+            "average_sentence_length": round(avg_sentence_length, 2),
+            "unique_words": len(self.vocabulary),
+            "reading_time_minutes": round(self.words / 200, 1)  # Assuming 200 WPM
         }
 
+
+def _iter_file_chunks(file_path: str) -> Iterator[str]:
+    """从工作目录中的文本文件流式读取文本块"""
+    safe_path = _get_safe_path(file_path)
+    if not safe_path.is_file():
+        raise FileNotFoundError(f"File {file_path} not found")
+    try:
+        with safe_path.open('r', encoding='utf-8') as f:
+            while chunk := f.read(ANALYZE_CHUNK_SIZE):
+                yield chunk
+    except UnicodeDecodeError:
+        raise ValueError(f"File {file_path} is not a valid text file") from None
+
+
+def iter_text_chunks(text: str | None = None, file_path: str | None = None) -> Iterator[str]:
+    """
+    返回输入的分块迭代器：text 按块切片，file_path 则从工作目录文件流式读取，
+    两者必须且只能提供一个。
+    """
+    if (text is None) == (file_path is None):
+        raise ValueError("Provide either text or file_path")
+    if file_path is not None:
+        return _iter_file_chunks(file_path)
+    assert text is not None
+    return (text[start:start + ANALYZE_CHUNK_SIZE] for start in range(0, len(text), ANALYZE_CHUNK_SIZE))
+
+
+@functools.lru_cache(maxsize=16)
+def _entity_regex(kinds: tuple[str, ...]) -> re.Pattern[str]:
+    """按实体类型组合单遍扫描用的正则"""
+    return re.compile("|".join(f"(?P<{kind}>{_ENTITY_PATTERNS[kind]})" for kind in kinds))
+
+
+def iter_entities(chunks: Iterable[str], kinds: Iterable[str]) -> Iterator[tuple[str, str]]:
+    """
+    单遍扫描文本块，按出现顺序产出 (实体类型, 值)。
+
+    各类型合并为一个交替正则，匹配互不重叠：起点靠前的匹配优先，同一起点按
+    email、url、ipv4、phone 的固定顺序取第一个，与请求中类型的顺序无关。
+    因此同时请求 url 时，URL 内的 IP 地址或邮箱只作为 url 的一部分返回。
+
+    每块只确认结束于块尾 ENTITY_CARRY_CHARS 之前的匹配，之后从跨越该区域的匹配
+    起点（没有时为所在记号之前的空白处）与下一块拼接后续扫。
+    续扫通过 finditer 的 pos 参数进行，并保留前面少量字符作为上下文，使 \\b 与
+    后顾断言看到的内容与整体扫描一致，结果不受分块位置影响。
+    """
+    kinds = tuple(dict.fromkeys(kinds))
+    unknown = [kind for kind in kinds if kind not in _ENTITY_PATTERNS]
+    if unknown or not kinds:
+        raise ValueError(f"Invalid entity kinds: {unknown}. Use: {', '.join(_ENTITY_PATTERNS)}")
+    pattern = _entity_regex(tuple(kind for kind in _ENTITY_PATTERNS if kind in kinds))
+
+    buffer = ""
+    position = 0
+    for chunk in chunks:
+        buffer += chunk
+        safe_end = len(buffer) - ENTITY_CARRY_CHARS
+        if safe_end <= position:
+            continue
+        resume = None
+        for match in pattern.finditer(buffer, position):
+            if match.end() > safe_end:
+                resume = match.start()
+                break
+            yield match.lastgroup, match.group()  # type: ignore[misc]
+            position = match.end()
+        if resume is None:
+            # 跨越 safe_end 的记号可能尚未形成匹配：回退到其前的空白处续扫，
+            # 不早于已产出的位置，因此不会重复产出
+            resume = max(position, safe_end)
+            floor = max(position, safe_end - ENTITY_CARRY_CHARS)
+            while resume > floor and not buffer[resume - 1].isspace():
+                resume -= 1
+        keep = max(resume - _ENTITY_CONTEXT_CHARS, 0)
+        buffer = buffer[keep:]
+        position = resume - keep
+
+    for match in pattern.finditer(buffer, position):
+        yield match.lastgroup, match.group()  # type: ignore[misc]
+
+
+def collect_entities(
+    chunks: Iterable[str],
+    kinds: Iterable[str],
+    dedupe: bool = True,
+    max_per_kind: int | None = None,
+) -> dict[str, list[str]]:
+    """按类型收集实体；去重时保留首次出现顺序，所有类型达到上限后提前结束"""
+    if max_per_kind is not None and max_per_kind <= 0:
+        raise ValueError("max_per_kind must be > 0")
+    kinds = tuple(dict.fromkeys(kinds))
+    results: dict[str, list[str]] = {kind: [] for kind in kinds}
+    seen: dict[str, set[str]] = {kind: set() for kind in kinds}
+    open_kinds = len(kinds)
+
+    for kind, value in iter_entities(chunks, kinds):
+        found = results[kind]
+        if max_per_kind is not None and len(found) >= max_per_kind:
+            continue
+        if dedupe:
+            if value in seen[kind]:
+                continue
+            seen[kind].add(value)
+        found.append(value)
+        if max_per_kind is not None and len(found) == max_per_kind:
+            open_kinds -= 1
+            if not open_kinds:
+                break
+    return results
+
+
+def estimate_tokens(text: str) -> int:
+    """按字符数粗略估算 token 数"""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _hard_split(segment: str, max_chars: int) -> Iterator[str]:
+    """将超长片段切成不超过 max_chars 的块，尽量在空白处断开"""
+    while len(segment) > max_chars:
+        cut = max_chars
+        space = segment.rfind(" ", max_chars // 2, max_chars)
+        if space > 0:
+            cut = space + 1
+        yield segment[:cut]
+        segment = segment[cut:]
+    if segment:
+        yield segment
+
+
+def _iter_segments(chunks: Iterable[str], boundary: str, max_chars: int) -> Iterator[str]:
+    """
+    将文本块流式切分为以边界结尾、不超过 max_chars 的片段。
+
+    最后一个未闭合的片段保留到下一块；它超过 max_chars 时先切出前面的部分，
+    保证保留内容有界、整体线性时间。切出的位置只取决于片段内容，续扫时保留
+    切点前的分隔字符作为上下文，因此结果与整段输入时一致。
+    """
+    pattern = _CHUNK_BOUNDARIES[boundary]
+    buffer = ""
+    start = 0
+    for chunk in chunks:
+        buffer += chunk
+        # 尚未越过边界时保留缓冲区开头的上下文
+        keep = 0
+        for match in pattern.finditer(buffer):
+            # 结束于块尾的分隔符可能在下一块继续
+            if match.end() == len(buffer):
+                break
+            if match.end() > start:
+                yield from _hard_split(buffer[start:match.end()], max_chars)
+                start = keep = match.end()
+        if len(buffer) - start > max_chars:
+            *pieces, carry = _hard_split(buffer[start:], max_chars)
+            yield from pieces
+            start = keep = len(buffer) - len(carry)
+            while keep and (buffer[keep - 1].isspace() or buffer[keep - 1] in _BOUNDARY_CHARS):
+                keep -= 1
+        buffer = buffer[keep:]
+        start -= keep
+    if start < len(buffer):
+        yield from _hard_split(buffer[start:], max_chars)
+
+
+def iter_text_windows(
+    chunks: Iterable[str],
+    max_tokens: int,
+    overlap_tokens: int = 0,
+    boundary: str = "sentence",
+) -> Iterator[dict[str, Any]]:
+    """
+    按近似 token 数将文本打包为块并惰性产出。
+
+    片段按边界贪心装入当前块；每块结束后保留末尾不超过 overlap_tokens 的
+    完整片段作为下一块的开头。
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens must be > 0")
+    if not 0 <= overlap_tokens < max_tokens:
+        raise ValueError("overlap_tokens must be >= 0 and less than max_tokens")
+    if boundary not in _CHUNK_BOUNDARIES:
+        raise ValueError(f"Invalid boundary: {boundary}. Use: paragraph, sentence, or none")
+
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    overlap_chars = overlap_tokens * CHARS_PER_TOKEN
+    window: deque[tuple[int, str]] = deque()
+    window_chars = 0
+    fresh = 0
+    position = 0
+    index = 0
+
+    def emit() -> dict[str, Any]:
+        start = window[0][0]
+        raw = "".join(text for _, text in window)
+        text = raw.strip()
+        return {
+            "index": index,
+            "start": start + len(raw) - len(raw.lstrip()),
+            "text": text,
+            "tokens": estimate_tokens(text),
+        }
+
+    for segment in _iter_segments(chunks, boundary, max_chars):
+        if window_chars + len(segment) > max_chars and fresh:
+            chunk = emit()
+            if chunk["text"]:
+                yield chunk
+                index += 1
+            while window and (window_chars > overlap_chars or window_chars + len(segment) > max_chars):
+                window_chars -= len(window.popleft()[1])
+            fresh = 0
+        window.append((position, segment))
+        window_chars += len(segment)
+        position += len(segment)
+        fresh += 1
+
+    if fresh:
+        chunk = emit()
+        if chunk["text"]:
+            yield chunk
+
+
+def analyze_chunks(chunks: Iterable[str], statistics: bool = True) -> TextAnalyzer:
+    """流式分析文本块"""
+    analyzer = TextAnalyzer(statistics)
+    for chunk in chunks:
+        analyzer.feed(chunk)
+    return analyzer.finish()
+
+
+def analyze_text(text: str, statistics: bool = True) -> TextAnalyzer:
+    """分块分析一段文本"""
+    return analyze_chunks(iter_text_chunks(text=text), statistics)
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_pattern(pattern: str, flags: int) -> re.Pattern[str]:
+    """按 (pattern, flags) 缓存编译后的正则"""
+    try:
+        return re.compile(pattern, flags)
+    except re.error as e:
+        raise ValueError(f"Invalid regex pattern: {e}") from e
+
+
+def _run_regex(op: str, pattern: str, flags: int, replacement: str, text: str, limit: int) -> Any:
+    """
+    执行一次正则操作：
+    sub 返回替换结果，subn 返回 (替换结果, 次数)，
+    scan 返回 (匹配次数, 前 limit 个 (起始位置, 匹配文本, 替换文本))。
+    """
+    compiled = _compile_pattern(pattern, flags)
+    if op == "sub":
+        return compiled.sub(replacement, text)
+    if op == "subn":
+        return compiled.subn(replacement, text)
+    count = 0
+    samples = []
+    for match in compiled.finditer(text):
+        if count < limit:
+            samples.append((match.start(), match.group(), match.expand(replacement)))
+        count += 1
+    return count, samples
+
+
+def _regex_worker_main(conn: Connection) -> None:
+    """正则工作进程主循环：接收 _run_regex 的参数并返回结果"""
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        try:
+            conn.send(("ok", _run_regex(*request)))
+        except (ValueError, re.error, IndexError) as e:
+            conn.send(("error", str(e)))
+
+
+class _RegexWorker:
+    """单个正则工作进程及其通信管道"""
+
+    def __init__(self, context: Any):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_regex_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class RegexWorkerPool:
+    """
+    在独立进程中执行用户提供的正则，超出时间预算时直接终止该进程。
+
+    re 模块的匹配无法在线程中中断，灾难性回溯只能通过终止进程来止损。
+    空闲进程会被复用，其中的编译缓存也随之保留。
+    """
+
+    def __init__(self, max_workers: int, timeout: float):
+        self.timeout = timeout
+        self._context = _MP_CONTEXT
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._idle: list[_RegexWorker] = []
+        self._lock = threading.Lock()
+
+    def run(self, op: str, pattern: str, flags: int, replacement: str, text: str, limit: int = 0) -> Any:
+        """在工作进程中执行一次 _run_regex 操作，超时抛出 TimeoutError"""
+        _compile_pattern(pattern, flags)  # 在主进程中快速校验模式
+
+        with self._slots:
+            with self._lock:
+                worker = self._idle.pop() if self._idle else None
+            if worker is None or not worker.process.is_alive():
+                worker = _RegexWorker(self._context)
+
+            try:
+                worker.conn.send((op, pattern, flags, replacement, text, limit))
+                ready = worker.conn.poll(self.timeout)
+                if ready:
+                    status, payload = worker.conn.recv()
+            except (EOFError, OSError):
+                # 工作进程在执行中退出（如被系统终止）；丢弃它，下次调用时重新创建
+                worker.kill()
+                raise RuntimeError("Regex worker exited unexpectedly; it will be restarted") from None
+            if not ready:
+                worker.kill()
+                raise TimeoutError(
+                    f"Regex evaluation exceeded the {self.timeout}s time budget"
+                )
+            with self._lock:
+                self._idle.append(worker)
+
+        if status == "error":
+            raise ValueError(f"Regex replacement failed: {payload}")
+        return payload
+
+    def sub(self, pattern: str, flags: int, replacement: str, text: str) -> str:
+        """在工作进程中执行 re.sub"""
+        return self.run("sub", pattern, flags, replacement, text)  # type: ignore[no-any-return]
+
+
+regex_pool = RegexWorkerPool(settings.regex_max_workers, settings.regex_timeout_seconds)
+
+
+def _literal_scan(text: str, pattern: str, replacement: str, limit: int) -> tuple[int, list[tuple[int, str, str]]]:
+    """普通字符串版本的 scan：返回匹配次数与前 limit 个匹配"""
+    count = text.count(pattern)
+    samples = []
+    start = 0
+    for _ in range(min(limit, count)):
+        start = text.find(pattern, start)
+        samples.append((start, pattern, replacement))
+        start += len(pattern)
+    return count, samples
+
+
+def _preview_lines(text: str, samples: list[tuple[int, str, str]]) -> list[dict[str, Any]]:
+    """为按位置排序的匹配样本补充行号"""
+    preview = []
+    line = 1
+    position = 0
+    for start, match, replacement in samples:
+        line += text.count("\n", position, start)
+        position = start
+        preview.append({"line": line, "match": match, "replacement": replacement})
+    return preview
+
+
+def _replace_in_file(
+    path: Path,
+    pattern: str,
+    flags: int,
+    replacement: str,
+    use_regex: bool,
+    dry_run: bool,
+    preview_limit: int,
+) -> dict[str, Any] | None:
+    """
+    对单个文件查找替换；二进制或非 UTF-8 文件返回 None。
+
+    以字节读写，保留原有换行符；有改动时通过临时文件原子替换。
+    """
+    data = path.read_bytes()
+    if b"\0" in data[:8192]:
+        return None
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+
+    if dry_run:
+        if use_regex:
+            count, samples = regex_pool.run("scan", pattern, flags, replacement, text, preview_limit)
+        else:
+            count, samples = _literal_scan(text, pattern, replacement, preview_limit)
+        return {"matches": count, "preview": _preview_lines(text, samples)}
+
+    if use_regex:
+        new_text, count = regex_pool.run("subn", pattern, flags, replacement, text)
+    else:
+        count = text.count(pattern)
+        new_text = text.replace(pattern, replacement) if count else text
+    if new_text != text:
+        encoded = new_text.encode("utf-8")
+        _atomic_write(path, lambda fd: _write_all(fd, encoded))
+    return {"matches": count}
+
+
+def _convert_case(text: str, case_type: str) -> str:
+    """按指定方式转换大小写"""
+    # 常见的小写参数直接命中，避免每次调用都做一次 lower()
+    converter = _CASE_CONVERTERS.get(case_type) or _CASE_CONVERTERS.get(case_type.lower())
+    if converter is None:
+        raise ValueError("Invalid case_type. Use: upper, lower, title, or capitalize")
+    return converter(text)
+
+
+def _extract_emails(text: str) -> list[str]:
+    """提取并去重邮箱地址（按首次出现顺序）"""
+    return collect_entities([text], ("email",))["email"]
+
+
+def _clean_text(text: str) -> str:
+    """合并连续空白并去除首尾空白"""
+    # str.split() 与 \s 的空白定义一致，且只需一次 C 层面的扫描
+    return " ".join(text.split())
+
+
+def _generate_slug(text: str) -> str:
+    """
+    生成 URL 友好的 slug。
+
+    纯 ASCII 文本走转换表快速路径；其他文本先 NFKD 分解并去掉拉丁字母上的
+    附加符号（café -> cafe），其余文字原样保留（你好 世界 -> 你好-世界，
+    नमस्ते दुनिया -> नमस्ते-दुनिया）。
+    """
+    text = text.lower()
+    if text.isascii():
+        return "-".join(text.translate(_ASCII_SLUG_TABLE).split())
+    text = _LATIN_MARKS.sub("", unicodedata.normalize("NFKD", text))
+    text = unicodedata.normalize("NFC", text).translate(_TRANSLITERATE_TABLE)
+    if text.isascii():
+        return "-".join(text.translate(_ASCII_SLUG_TABLE).split())
+    return _slug_separator().sub("-", text).strip("-")
+
+
+_BATCH_OPERATIONS: dict[str, Callable[..., Any]] = {
+    "clean_text": _clean_text,
+    "generate_slug": _generate_slug,
+    "convert_case": _convert_case,
+    "extract_emails": _extract_emails,
+}
+
+_batch_executor: ProcessPoolExecutor | None = None
+_batch_lock = threading.Lock()
+
+
+def _get_batch_executor() -> ProcessPoolExecutor:
+    """
+    获取批量文本处理进程池（首次使用时创建）。
+
+    通常在 I/O 线程池中首次调用，因此与正则工作进程一样使用 _MP_CONTEXT
+    （forkserver/spawn），不从多线程的服务进程直接 fork。
+    """
+    global _batch_executor
+    with _batch_lock:
+        if _batch_executor is None:
+            _batch_executor = ProcessPoolExecutor(
+                max_workers=settings.text_batch_max_workers, mp_context=_MP_CONTEXT
+            )
+        return _batch_executor
+
+
+def _apply_batch(operation: str, texts: list[str], *args: Any) -> list[Any]:
+    """对一组文本依次执行同一操作"""
+    func = _BATCH_OPERATIONS[operation]
+    return [func(text, *args) for text in texts]
+
+
+def process_batch(operation: str, texts: list[str], *args: Any) -> list[Any]:
+    """
+    批量执行文本操作；条数超过 BATCH_PARALLEL_THRESHOLD 时按 BATCH_CHUNK_SIZE
+    分块分发到进程池，结果顺序与输入一致。
+    """
+    if operation not in _BATCH_OPERATIONS:
+        raise ValueError(f"Invalid operation. Use: {', '.join(_BATCH_OPERATIONS)}")
+    if len(texts) <= BATCH_PARALLEL_THRESHOLD:
+        return _apply_batch(operation, texts, *args)
+
+    executor = _get_batch_executor()
+    futures = [
+        executor.submit(_apply_batch, operation, texts[start:start + BATCH_CHUNK_SIZE], *args)
+        for start in range(0, len(texts), BATCH_CHUNK_SIZE)
+    ]
+    results: list[Any] = []
+    for future in futures:
+        results.extend(future.result())
+    return results
+
+
+def register_text_tools(mcp: FastMCP) -> None:
+    """注册文本处理相关的工具"""
+
+    @mcp.tool(title="Count Words", description="Count words in text or a workspace file")
+    @offload_io
+    def count_words(text: str | None = None, file_path: str | None = None) -> dict[str, int]:
+        """
+        Count the number of words, characters, and lines in text.
+
+        Args:
+            text: Input text
+            file_path: Workspace file to analyze instead of text (streamed)
+        """
+        return analyze_chunks(iter_text_chunks(text, file_path), statistics=False).word_counts()
+
     @mcp.tool(title="Convert Case", description="Convert text case")
     def convert_case(text: str, case_type: str) -> str:
         """
@@ -37,90 +753,265 @@ def register_text_tools(mcp: FastMCP) -> None:
             text: Input text
             case_type: Type of case conversion (upper, lower, title, capitalize)
         """
-        case_type = case_type.lower()
+        return _convert_case(text, case_type)
 
-        if case_type == "upper":
-            return text.upper()
-        elif case_type == "lower":
-            return text.lower()
-        elif case_type == "title":
-            return text.title()
-        elif case_type == "capitalize":
-            return text.capitalize()
-        else:
-            raise ValueError("Invalid case_type. Use: upper, lower, title, or capitalize")
-
-    @mcp.tool(title="Extract Emails", description="Extract email addresses from text")
-    def extract_emails(text: str) -> list[str]:
-        """Extract all email addresses from the given text."""
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, text)
-        return list(set(emails))  # Remove duplicates
-
-    @mcp.tool(title="Extract URLs", description="Extract URLs from text")
-    def extract_urls(text: str) -> list[str]:
-        """Extract all URLs from the given text."""
-        url_pattern = r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
-        urls = re.findall(url_pattern, text)
-        return list(set(urls))  # Remove duplicates
+    @mcp.tool(title="Extract Emails", description="Extract email addresses from text or a workspace file")
+    @offload_io
+    def extract_emails(text: str | None = None, file_path: str | None = None) -> list[str]:
+        """
+        Extract all email addresses from the given text.
+
+        Args:
+            text: Input text
+            file_path: Workspace file to scan instead of text (streamed)
+        """
+        return collect_entities(iter_text_chunks(text, file_path), ("email",))["email"]
+
+    @mcp.tool(title="Extract URLs", description="Extract URLs from text or a workspace file")
+    @offload_io
+    def extract_urls(text: str | None = None, file_path: str | None = None) -> list[str]:
+        """
+        Extract all URLs from the given text.
+
+        Args:
+            text: Input text
+            file_path: Workspace file to scan instead of text (streamed)
+        """
+        return collect_entities(iter_text_chunks(text, file_path), ("url",))["url"]
+
+    @mcp.tool(
+        title="Extract Entities",
+        description="Extract emails, URLs, IPv4 addresses and phone numbers in one pass",
+    )
+    @offload_io
+    def extract_entities(
+        text: str | None = None,
+        file_path: str | None = None,
+        kinds: list[EntityKind] | None = None,
+        dedupe: bool = True,
+        max_per_kind: int | None = None,
+    ) -> dict[str, list[str]]:
+        """
+        Extract several kinds of entities with a single streaming scan.
+
+        Results are grouped by kind and listed in order of first appearance.
+        Matches never overlap: text claimed by one kind (e.g. an IP address
+        inside a URL) is not reported again under another requested kind.
+
+        Args:
+            text: Input text
+            file_path: Workspace file to scan instead of text (streamed)
+            kinds: Entity kinds to extract (default: all of email, url, ipv4, phone)
+            dedupe: Whether to drop repeated values within each kind
+            max_per_kind: Stop collecting a kind after this many values
+        """
+        return collect_entities(
+            iter_text_chunks(text, file_path), kinds or list(_ENTITY_PATTERNS), dedupe, max_per_kind
+        )
 
     @mcp.tool(title="Replace Text", description="Replace text with regex support")
-    def replace_text(text: str, pattern: str, replacement: str, use_regex: bool = False) -> str:
+    @offload_io
+    def replace_text(
+        text: str,
+        pattern: str,
+        replacement: str,
+        use_regex: bool = False,
+        ignore_case: bool = False,
+        multiline: bool = False,
+    ) -> str:
         """
         Replace text using simple string replacement or regex.
-        
+
+        Regex replacements run in a separate worker process under a time
+        budget, so a pathological pattern fails fast instead of blocking.
+
         Args:
             text: Input text
             pattern: Pattern to search for
             replacement: Replacement text
             use_regex: Whether to use regex for pattern matching
+            ignore_case: Case-insensitive matching (regex only)
+            multiline: ^ and $ match at line boundaries (regex only)
         """
         if use_regex:
-            return re.sub(pattern, replacement, text)
+            flags = (re.IGNORECASE if ignore_case else 0) | (re.MULTILINE if multiline else 0)
+            return regex_pool.sub(pattern, flags, replacement, text)
         else:
             return text.replace(pattern, replacement)
 
+    @mcp.tool(title="Replace In Files", description="Find and replace across workspace files")
+    @offload_io
+    def replace_in_files(
+        pattern: str,
+        replacement: str,
+        include: list[str] | None = None,
+        exclude: list[str] | None = None,
+        directory_path: str = ".",
+        use_regex: bool = False,
+        ignore_case: bool = False,
+        multiline: bool = False,
+        dry_run: bool = True,
+        preview_limit: int = 3,
+        max_files: int = 10000,
+    ) -> dict[str, Any]:
+        """
+        Find and replace a pattern in every matching workspace text file.
+
+        Files are processed in parallel; regex patterns run in worker
+        processes under the same time budget as replace_text. With dry_run
+        (the default) nothing is written and each matching file reports its
+        match count and a preview of the first matches. Otherwise changed
+        files are rewritten atomically, keeping their line endings.
+
+        Args:
+            pattern: Pattern to search for
+            replacement: Replacement text (may reference groups when use_regex is set)
+            include: Glob patterns files must match
+            exclude: Glob patterns to skip
+            directory_path: Relative directory to search recursively
+            use_regex: Whether to use regex for pattern matching
+            ignore_case: Case-insensitive matching (regex only)
+            multiline: ^ and $ match at line boundaries (regex only)
+            dry_run: Only report matches without modifying files
+            preview_limit: Maximum preview entries per file (dry run only)
+            max_files: Maximum number of files to process
+        """
+        if not pattern:
+            raise ValueError("pattern must not be empty")
+        if preview_limit < 0 or max_files <= 0:
+            raise ValueError("preview_limit must be >= 0 and max_files must be > 0")
+        flags = (re.IGNORECASE if ignore_case else 0) | (re.MULTILINE if multiline else 0)
+        if use_regex:
+            _compile_pattern(pattern, flags)
+
+        targets: list[tuple[str, Path]] = []
+        skipped = 0
+        truncated = False
+        for relative, entry in walk_workspace(directory_path, include, exclude):
+            if len(targets) >= max_files:
+                truncated = True
+                break
+            if entry.stat().st_size > REPLACE_MAX_FILE_BYTES:
+                skipped += 1
+                continue
+            targets.append((relative, Path(entry.path)))
+
+        executor = _get_fanout_executor()
+        futures = [
+            executor.submit(
+                _replace_in_file, path, pattern, flags, replacement, use_regex, dry_run, preview_limit
+            )
+            for _, path in targets
+        ]
+
+        files = []
+        errors = {}
+        total = 0
+        scanned = 0
+        for (relative, _), future in zip(targets, futures, strict=True):
+            try:
+                result = future.result()
+            except (OSError, TimeoutError, ValueError, RuntimeError) as e:
+                errors[relative] = str(e)
+                continue
+            if result is None:
+                skipped += 1
+                continue
+            scanned += 1
+            if result["matches"]:
+                total += result["matches"]
+                files.append({"path": relative, **result})
+
+        return {
+            "dry_run": dry_run,
+            "files": files,
+            "files_matched": len(files),
+            "total_matches": total,
+            "files_scanned": scanned,
+            "skipped": skipped,
+            "errors": errors,
+            "truncated": truncated,
+        }
+
     @mcp.tool(title="Clean Text", description="Clean and normalize text")
     def clean_text(text: str) -> str:
         """Clean text by removing extra whitespace and normalizing."""
-        # Remove extra whitespace
-        cleaned = re.sub(r'\s+', ' ', text)
-        # Strip leading/trailing whitespace
-        cleaned = cleaned.strip()
-        return cleaned
+        return _clean_text(text)
 
     @mcp.tool(title="Generate Slug", description="Generate URL-friendly slug from text")
     def generate_slug(text: str) -> str:
         """Generate a URL-friendly slug from text."""
-        # Convert to lowercase
-        slug = text.lower()
-        # Replace spaces and special characters with hyphens
-        slug = re.sub(r'[^a-z0-9]+', '-', slug)
-        # Remove leading/trailing hyphens
-        slug = slug.strip('-')
-        return slug
-
-    @mcp.tool(title="Text Statistics", description="Get detailed text statistics")
-    def text_statistics(text: str) -> dict[str, Any]:
-        """Get comprehensive statistics about the text."""
-        words = text.split()
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if s.strip()]
-
-        # Calculate average word length
-        total_word_length = sum(len(word) for word in words)
-        avg_word_length = total_word_length / len(words) if words else 0
-
-        # Calculate average sentence length
-        total_sentence_length = sum(len(sentence.split()) for sentence in sentences)
-        avg_sentence_length = total_sentence_length / len(sentences) if sentences else 0
+        return _generate_slug(text)
+
+    @mcp.tool(title="Batch Process Text", description="Apply a text tool to many strings in one call")
+    @offload_io
+    def batch_process_text(
+        operation: Literal["clean_text", "generate_slug", "convert_case", "extract_emails"],
+        texts: list[str],
+        case_type: str | None = None,
+    ) -> list[Any]:
+        """
+        Apply clean_text, generate_slug, convert_case or extract_emails to
+        every string in texts. Results are returned in input order; large
+        batches are split across a process pool.
+
+        Args:
+            operation: Text tool to apply
+            texts: Input strings
+            case_type: Case conversion type (required for convert_case)
+        """
+        if operation == "convert_case":
+            if case_type is None:
+                raise ValueError("case_type is required for convert_case")
+            _convert_case("", case_type)  # 提前校验 case_type
+            return process_batch(operation, texts, case_type)
+        return process_batch(operation, texts)
+
+    @mcp.tool(title="Chunk Text", description="Split text or a workspace file into token-sized chunks")
+    @offload_io
+    def chunk_text(
+        text: str | None = None,
+        file_path: str | None = None,
+        max_tokens: int = 512,
+        overlap_tokens: int = 0,
+        boundary: ChunkBoundary = "sentence",
+        max_chunks: int = 200,
+    ) -> dict[str, Any]:
+        """
+        Split text into chunks of approximately max_tokens tokens for LLM context packing.
+
+        Tokens are estimated from character count. Chunks end on sentence or
+        paragraph boundaries where possible; segments longer than a chunk are
+        split at whitespace.
 
+        Args:
+            text: Input text
+            file_path: Workspace file to chunk instead of text (streamed)
+            max_tokens: Approximate maximum tokens per chunk
+            overlap_tokens: Approximate tokens repeated from the end of the previous chunk
+            boundary: Preferred split boundary: sentence, paragraph, or none
+            max_chunks: Maximum number of chunks to return; reading stops once reached
+        """
+        if max_chunks <= 0:
+            raise ValueError("max_chunks must be > 0")
+
+        windows = iter_text_windows(iter_text_chunks(text, file_path), max_tokens, overlap_tokens, boundary)
+        chunks = list(itertools.islice(windows, max_chunks))
+        truncated = next(windows, None) is not None
         return {
-            "total_characters": len(text),
-            "total_words": len(words),
-            "total_sentences": len(sentences),
-            "average_word_length": round(avg_word_length, 2),
-            "average_sentence_length": round(avg_sentence_length, 2),
-            "unique_words": len({word.lower() for word in words}),
-            "reading_time_minutes": round(len(words) / 200, 1)  # Assuming 200 WPM
+            "chunks": chunks,
+            "count": len(chunks),
+            "truncated": truncated,
         }
+
+    @mcp.tool(title="Text Statistics", description="Get detailed statistics for text or a workspace file")
+    @offload_io
+    def text_statistics(text: str | None = None, file_path: str | None = None) -> dict[str, Any]:
+        """
+        Get comprehensive statistics about the text.
+
+        Args:
+            text: Input text
+            file_path: Workspace file to analyze instead of text (streamed)
+        """
+        return analyze_chunks(iter_text_chunks(text, file_path)).statistics()
@@ -4,6 +4,7 @@ MCP 工具测试模块
 测试所有 MCP 工具的功能和边界条件。
 """
 
+import json
 import re
 
 import pytest
@@ -53,6 +54,182 @@ class TestCalculatorTools:
             calculate_bmi(-70, 1.75)
 
 
+class TestVectorCalculate:
+    """数组批量计算测试"""
+
+    @pytest.fixture(params=["numpy", "python"])
+    def calculator(self, request, monkeypatch):
+        """分别在 NumPy 与纯 Python 实现下运行"""
+        from server.tools import calculator
+
+        if request.param == "numpy":
+            pytest.importorskip("numpy")
+        else:
+            monkeypatch.setattr(calculator, "np", None)
+        return calculator
+
+    def test_broadcasting(self, calculator):
+        """测试数组与标量广播"""
+        assert calculator.vector_apply("add", [1, 2, 3], 10) == [11, 12, 13]
+        assert calculator.vector_apply("subtract", 10, [1, 2]) == [9, 8]
+        assert calculator.vector_apply("multiply", [1, 2], [3, 4]) == [3, 8]
+        assert calculator.vector_apply("percentage", [50, 200], 10) == [5, 20]
+        assert calculator.vector_apply("power", 2, [0, 1, 10]) == [1, 2, 1024]
+        assert calculator.vector_apply("sqrt", [4, 9]) == [2, 3]
+
+    def test_errors(self, calculator):
+        """测试除零、负数开方、溢出与长度不一致"""
+        with pytest.raises(ValueError, match="Cannot divide by zero"):
+            calculator.vector_apply("divide", [1, 2], [1, 0])
+        with pytest.raises(ValueError, match="square root of negative"):
+            calculator.vector_apply("sqrt", [1, -1])
+        with pytest.raises(ValueError, match="not a finite real number"):
+            calculator.vector_apply("power", [-8.0, 10.0], [0.5, 400])
+        for operation, a, b in (
+            ("multiply", [1e308], 10),
+            ("add", [1e308, 1.0], 1e308),
+            ("subtract", -1e308, [1e308]),
+            ("percentage", [1e308], 1e10),
+            ("divide", [1e308], 1e-10),
+            ("power", [0.0], -1.0),
+        ):
+            with pytest.raises(ValueError, match="not a finite real number"):
+                calculator.vector_apply(operation, a, b)
+        with pytest.raises(ValueError, match="lengths do not match"):
+            calculator.vector_apply("add", [1, 2], [1, 2, 3])
+        with pytest.raises(ValueError, match="requires a second operand"):
+            calculator.vector_apply("add", [1, 2])
+
+    async def test_tool_rounding(self, tool_caller):
+        """测试工具结果按位数舍入"""
+        from server.tools.calculator import register_calculator_tools
+
+        call = tool_caller(register_calculator_tools)
+        result = await call("vector_calculate", operation="divide", a=[1, 2], b=3, round_digits=3)
+        assert result == {"operation": "divide", "count": 2, "values": [0.333, 0.667]}
+
+
+class TestDescribe:
+    """流式描述统计测试"""
+
+    def test_matches_exact_statistics(self):
+        """测试均值、方差与分位数与精确值接近"""
+        import random
+        import statistics
+
+        from server.tools.calculator import RunningStats
+
+        rng = random.Random(0)
+        values = [rng.gauss(100, 15) for _ in range(50000)]
+        summary = RunningStats().update(values).summary([0.01, 0.5, 0.99])
+
+        assert summary["count"] == 50000
+        assert summary["mean"] == pytest.approx(statistics.fmean(values))
+        assert summary["variance"] == pytest.approx(statistics.variance(values))
+        assert (summary["min"], summary["max"]) == (min(values), max(values))
+        ordered = sorted(values)
+        for key, q in (("p1", 0.01), ("p50", 0.5), ("p99", 0.99)):
+            rank = sum(1 for value in ordered if value <= summary["quantiles"][key]) / len(ordered)
+            assert abs(rank - q) < 0.005
+
+    def test_welford_is_numerically_stable(self):
+        """测试大偏移量数据的方差不会因抵消而失真"""
+        from server.tools.calculator import RunningStats
+
+        stats = RunningStats().update([1e9 + 4, 1e9 + 7, 1e9 + 13, 1e9 + 16])
+        assert stats.variance() == pytest.approx(30.0)
+
+    def test_merge(self):
+        """测试两份部分统计合并后与整体一致"""
+        from server.tools.calculator import RunningStats
+
+        left = RunningStats().update(range(1000))
+        left.merge(RunningStats().update(range(1000, 3000)))
+        whole = RunningStats().update(range(3000))
+        assert left.count == whole.count
+        assert left.variance() == pytest.approx(whole.variance())
+        assert left.sum == whole.sum
+        assert left.digest.quantile(0.5) == pytest.approx(whole.digest.quantile(0.5), rel=0.01)
+
+    async def test_describe_file(self, tool_caller):
+        """测试从工作目录文件流式读取数字"""
+        from server.tools.calculator import register_calculator_tools
+
+        call = tool_caller(register_calculator_tools)
+        (call.workspace / "values.txt").write_text("1, 2,3\n4\t5\n")
+        result = await call("describe", file_path="values.txt", quantiles=[0.5])
+        assert result == {
+            "count": 5, "sum": 15.0, "mean": 3.0, "variance": 2.5, "std": pytest.approx(2.5 ** 0.5),
+            "min": 1.0, "max": 5.0, "quantiles": {"p50": 3.0},
+        }
+        with pytest.raises(Exception, match="empty dataset"):
+            await call("describe", numbers=[])
+
+
+class TestEvaluate:
+    """安全表达式求值测试"""
+
+    def test_expressions_and_cache(self):
+        """测试运算、函数、常量以及编译缓存"""
+        from server.tools.calculator import compile_expression
+
+        compiled = compile_expression("sqrt(a**2 + b**2) * 100 / total")
+        assert compiled.variables == {"a", "b", "total"}
+        assert compiled.evaluate({"a": 3, "b": 4, "total": 50}) == 10
+        assert compile_expression("sqrt(a**2 + b**2) * 100 / total") is compiled
+        assert compile_expression("-2 * pi + max(1, 2, 3) + round(2.567, 1)").evaluate({}) == pytest.approx(
+            -2 * 3.141592653589793 + 3 + 2.6
+        )
+
+    @pytest.mark.parametrize("expression, message", [
+        ("__import__('os')", "Only math functions"),
+        ("x.real", "Unsupported syntax"),
+        ("x if x else 1", "Unsupported syntax"),
+        ("x % 2", "Unsupported operator"),
+        ("_pow(2, 3)", "Only math functions"),
+        ("2 ** 10 ** 10", "Exponent"),
+        ("1 / (x - x)", "divide by zero"),
+        ("10.0 ** 400", "not a finite"),
+        ("x + y", "Missing variables: y"),
+    ])
+    def test_rejected_expressions(self, expression, message):
+        """测试不允许的语法与超限运算被拒绝"""
+        from server.tools.calculator import compile_expression
+
+        with pytest.raises(ValueError, match=message):
+            compile_expression(expression).evaluate({"x": 1.0})
+
+    async def test_bindings_and_time_budget(self, tool_caller, monkeypatch):
+        """测试多组变量绑定求值与时间预算"""
+        from server.config import settings
+        from server.tools.calculator import evaluate_bindings, register_calculator_tools
+
+        call = tool_caller(register_calculator_tools)
+        result = await call(
+            "evaluate",
+            expression="x * rate + base",
+            variables={"base": 1},
+            bindings=[{"x": 1, "rate": 2}, {"x": 2, "rate": 0.5}],
+        )
+        assert result == {"expression": "x * rate + base", "count": 2, "results": [3.0, 2.0]}
+
+        monkeypatch.setattr(settings, "eval_timeout_seconds", 0.0)
+        with pytest.raises(TimeoutError):
+            evaluate_bindings("x + 1", [{"x": 1.0}] * 1000)
+
+    async def test_runs_outside_file_io_pool(self, tool_caller, monkeypatch):
+        """测试 evaluate 在计算线程池中执行，不占用文件 I/O 排队配额"""
+        from server.tools import file_operations
+        from server.tools.calculator import register_calculator_tools
+
+        async def io_queue_full(*args, **kwargs):
+            raise RuntimeError("File I/O queue is full, please retry later")
+
+        monkeypatch.setattr(file_operations, "run_in_io_pool", io_queue_full)
+        call = tool_caller(register_calculator_tools)
+        assert await call("evaluate", expression="2 ** 10") == {"expression": "2 ** 10", "result": 1024.0}
+
+
 class TestTextProcessingTools:
     """文本处理工具测试"""
 
@@ -109,6 +286,386 @@ class TestTextProcessingTools:
         assert slug == expected_slug
 
 
+class TestTextTransforms:
+    """文本转换快速路径测试"""
+
+    def test_unicode_slug(self):
+        """测试带重音与 CJK 文本的 slug"""
+        from server.tools.text_processing import _generate_slug
+
+        assert _generate_slug("Hello, World! v2.0") == "hello-world-v2-0"
+        assert _generate_slug("Café Crème brûlée") == "cafe-creme-brulee"
+        assert _generate_slug("Straße_Łódź") == "strasse-lodz"
+        assert _generate_slug("你好 世界！Hello") == "你好-世界-hello"
+        assert _generate_slug("日本語のがぎ") == "日本語のがぎ"
+        assert _generate_slug("नमस्ते दुनिया") == "नमस्ते-दुनिया"
+        assert _generate_slug("สวัสดีครับ ok") == "สวัสดีครับ-ok"
+        assert _generate_slug("Привет, йод") == "привет-йод"
+
+    def test_clean_text_unicode_whitespace(self):
+        """测试各类 Unicode 空白均被合并"""
+        from server.tools.text_processing import _clean_text
+
+        assert _clean_text("\u3000a\t\u00a0 b\n\u2028c  ") == "a b c"
+
+    def test_convert_case(self):
+        """测试大小写转换及非法参数"""
+        from server.tools.text_processing import _convert_case
+
+        assert _convert_case("hello world", "TITLE") == "Hello World"
+        with pytest.raises(ValueError, match="Invalid case_type"):
+            _convert_case("x", "snake")
+
+
+class TestTextAnalyzer:
+    """单遍文本分析器测试"""
+
+    TEXT = "Hello world! This is a test.\nSecond line? Yes... the END"
+
+    def test_matches_tool_semantics(self):
+        """测试结果与原有工具语义一致"""
+        from server.tools.text_processing import analyze_text
+
+        analyzer = analyze_text(self.TEXT)
+        assert analyzer.word_counts() == {
+            "words": 11,
+            "characters": 56,
+            "characters_no_spaces": 47,
+            "lines": 2,
+        }
+        stats = analyzer.statistics()
+        assert stats["total_sentences"] == 5
+        assert stats["unique_words"] == 11
+        assert stats["average_sentence_length"] == 2.2
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 7])
+    def test_chunk_boundaries(self, monkeypatch, chunk_size):
+        """测试分块边界不影响统计结果"""
+        from server.tools import text_processing
+
+        expected = text_processing.analyze_text(self.TEXT).statistics()
+        monkeypatch.setattr(text_processing, "ANALYZE_CHUNK_SIZE", chunk_size)
+        assert text_processing.analyze_text(self.TEXT).statistics() == expected
+
+
+class TestRegexReplace:
+    """正则替换时间预算测试"""
+
+    def test_sub_and_compile_cache(self):
+        """测试工作进程替换结果与编译缓存"""
+        from server.tools.text_processing import RegexWorkerPool, _compile_pattern
+
+        pool = RegexWorkerPool(max_workers=1, timeout=5)
+        assert pool.sub(r"(\d+)", 0, r"<\1>", "a1b22") == "a<1>b<22>"
+        hits = _compile_pattern.cache_info().hits
+        assert pool.sub(r"(\d+)", 0, r"<\1>", "c3") == "c<3>"
+        assert _compile_pattern.cache_info().hits > hits
+
+    def test_catastrophic_backtracking_times_out(self):
+        """测试灾难性回溯在时间预算内失败，且进程池仍可继续使用"""
+        import time
+
+        from server.tools.text_processing import RegexWorkerPool
+
+        pool = RegexWorkerPool(max_workers=1, timeout=0.5)
+        start = time.perf_counter()
+        with pytest.raises(TimeoutError):
+            pool.sub(r"(a+)+$", 0, "", "a" * 40 + "b")
+        assert time.perf_counter() - start < 3
+        assert pool.sub("a", 0, "b", "aa") == "bb"
+
+    def test_worker_death_is_reported_and_recovered(self):
+        """测试工作进程在执行中退出时报错，之后自动重建"""
+        import threading
+        import time
+
+        from server.tools.text_processing import RegexWorkerPool
+
+        pool = RegexWorkerPool(max_workers=1, timeout=30)
+        assert pool.sub("a", 0, "b", "a") == "b"
+        (worker,) = pool._idle
+        errors = []
+
+        def run():
+            try:
+                pool.sub(r"(a+)+$", 0, "", "a" * 40 + "b")
+            except Exception as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        time.sleep(0.5)
+        worker.process.kill()
+        thread.join(10)
+        assert len(errors) == 1
+        assert isinstance(errors[0], RuntimeError)
+        assert "exited unexpectedly" in str(errors[0])
+        assert pool.sub("a", 0, "b", "aa") == "bb"
+
+    def test_invalid_pattern(self):
+        """测试非法正则快速报错"""
+        from server.tools.text_processing import RegexWorkerPool
+
+        with pytest.raises(ValueError, match="Invalid regex"):
+            RegexWorkerPool(max_workers=1, timeout=1).sub("(", 0, "", "x")
+
+
+class TestBatchTextProcessing:
+    """批量文本处理测试"""
+
+    def test_small_batch_inline(self):
+        """测试小批量直接处理"""
+        from server.tools.text_processing import process_batch
+
+        assert process_batch("generate_slug", ["Hello World!", " A  b "]) == ["hello-world", "a-b"]
+        assert process_batch("convert_case", ["abc", "Def"], "upper") == ["ABC", "DEF"]
+
+    def test_large_batch_uses_process_pool(self, monkeypatch):
+        """测试大批量分块分发到进程池且保持顺序"""
+        from server.tools import text_processing
+
+        monkeypatch.setattr(text_processing, "BATCH_PARALLEL_THRESHOLD", 10)
+        monkeypatch.setattr(text_processing, "BATCH_CHUNK_SIZE", 7)
+        texts = [f"  item   {i}  " for i in range(50)]
+        assert text_processing.process_batch("clean_text", texts) == [f"item {i}" for i in range(50)]
+
+    def test_pool_created_from_thread_does_not_fork(self, monkeypatch):
+        """测试在线程中首次创建的进程池不使用 fork 启动"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        from server.tools import text_processing
+
+        monkeypatch.setattr(text_processing, "_batch_executor", None)
+        monkeypatch.setattr(text_processing, "BATCH_PARALLEL_THRESHOLD", 2)
+        monkeypatch.setattr(text_processing, "BATCH_CHUNK_SIZE", 2)
+        with ThreadPoolExecutor(max_workers=2) as threads:
+            future = threads.submit(text_processing.process_batch, "generate_slug", ["A b", "C d", "E f"])
+            assert future.result(timeout=30) == ["a-b", "c-d", "e-f"]
+        executor = text_processing._batch_executor
+        try:
+            assert executor._mp_context.get_start_method() in ("forkserver", "spawn")
+        finally:
+            executor.shutdown()
+
+    def test_invalid_operation(self):
+        """测试未知操作报错"""
+        from server.tools.text_processing import process_batch
+
+        with pytest.raises(ValueError, match="Invalid operation"):
+            process_batch("reverse", ["x"])
+
+
+class TestEntityExtraction:
+    """多类实体单遍提取测试"""
+
+    def test_kinds_order_and_dedupe(self):
+        """测试按类型分组、按首次出现顺序去重"""
+        from server.tools.text_processing import collect_entities
+
+        text = "b@x.io a@x.io b@x.io http://x.io/p 10.0.0.1 call +1 555-123-4567"
+        result = collect_entities([text], ["email", "url", "ipv4", "phone"])
+        assert result == {
+            "email": ["b@x.io", "a@x.io"],
+            "url": ["http://x.io/p"],
+            "ipv4": ["10.0.0.1"],
+            "phone": ["+1 555-123-4567"],
+        }
+        assert collect_entities([text], ["email"], dedupe=False)["email"] == ["b@x.io", "a@x.io", "b@x.io"]
+        assert collect_entities([text], ["email"], max_per_kind=1)["email"] == ["b@x.io"]
+
+    def test_matches_across_chunk_boundaries(self, monkeypatch):
+        """测试跨块的匹配与整体扫描结果一致"""
+        from server.tools import text_processing
+
+        monkeypatch.setattr(text_processing, "ENTITY_CARRY_CHARS", 16)
+        text = " ".join(f"user{i}@example.com https://h.io/{i} 192.168.0.{i}" for i in range(200))
+        expected = text_processing.collect_entities([text], ["email", "url", "ipv4"], dedupe=False)
+        chunks = [text[i:i + 13] for i in range(0, len(text), 13)]
+        assert text_processing.collect_entities(chunks, ["email", "url", "ipv4"], dedupe=False) == expected
+        assert len(expected["email"]) == 200
+
+    def test_chunking_does_not_change_matches(self, monkeypatch):
+        """测试任意小块切分与整体 finditer 的结果一致，续扫保留前文上下文"""
+        import random
+
+        from server.tools import text_processing
+
+        monkeypatch.setattr(text_processing, "ENTITY_CARRY_CHARS", 48)
+        kinds = ["email", "url", "ipv4", "phone"]
+        pattern = text_processing._entity_regex(tuple(kinds))
+        words = [".a@b.io", "a@b.io", "http://x.io/p", "10.0.0.1", "555-123-4567", "192.168.100.200", "x.y", "1.2"]
+        rng = random.Random(0)
+        for _ in range(200):
+            pairs = (rng.choice(words) + rng.choice([".", "-", ""]) + rng.choice(words) for _ in range(20))
+            text = rng.choice([" ", "\n"]).join(pairs)
+            expected: dict[str, list[str]] = {kind: [] for kind in kinds}
+            for match in pattern.finditer(text):
+                expected[match.lastgroup].append(match.group())
+            size = rng.randint(1, 12)
+            chunks = [text[i:i + size] for i in range(0, len(text), size)]
+            assert text_processing.collect_entities(chunks, kinds, dedupe=False) == expected
+
+    def test_phone_does_not_match_dotted_quads(self):
+        """测试电话号码不会从 IPv4 地址中截取"""
+        from server.tools.text_processing import collect_entities
+
+        text = "host 192.168.100.200 or 10.20.300.400, call 555.123.4567."
+        assert collect_entities([text], ["phone"])["phone"] == ["555.123.4567"]
+        assert collect_entities([text], ["ipv4", "phone"]) == {
+            "ipv4": ["192.168.100.200"],
+            "phone": ["555.123.4567"],
+        }
+
+    def test_overlapping_kinds_do_not_overlap(self):
+        """测试合并扫描中的匹配互不重叠，且与请求类型的顺序无关"""
+        from server.tools.text_processing import collect_entities
+
+        text = "see http://10.0.0.1/status and 10.0.0.2"
+        assert collect_entities([text], ["ipv4"])["ipv4"] == ["10.0.0.1", "10.0.0.2"]
+        expected = {"url": ["http://10.0.0.1/status"], "ipv4": ["10.0.0.2"]}
+        assert collect_entities([text], ["url", "ipv4"]) == expected
+        assert collect_entities([text], ["ipv4", "url"]) == {"ipv4": ["10.0.0.2"], "url": ["http://10.0.0.1/status"]}
+
+    def test_invalid_kind(self):
+        """测试未知实体类型报错"""
+        from server.tools.text_processing import collect_entities
+
+        with pytest.raises(ValueError, match="Invalid entity kinds"):
+            collect_entities(["x"], ["ssn"])
+
+
+class TestChunkText:
+    """按 token 分块测试"""
+
+    def test_sentence_boundaries_and_overlap(self):
+        """测试按句子边界打包、块间重叠且偏移可回溯原文"""
+        from server.tools.text_processing import iter_text_chunks, iter_text_windows
+
+        text = " ".join(f"Sentence number {i} is here." for i in range(40))
+        chunks = list(iter_text_windows(iter_text_chunks(text), max_tokens=20, overlap_tokens=8))
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert chunk["tokens"] <= 20
+            assert chunk["text"].endswith(".")
+            assert text[chunk["start"]:chunk["start"] + len(chunk["text"])] == chunk["text"]
+        assert [chunk["index"] for chunk in chunks] == list(range(len(chunks)))
+        # 每块以上一块的末句开头
+        assert chunks[1]["text"].startswith(chunks[0]["text"].rsplit(". ", 1)[-1])
+
+    def test_streamed_chunks_match_whole_text(self):
+        """测试流式输入与整体输入的分块结果一致，超长片段被强制切分"""
+        from server.tools.text_processing import iter_text_windows
+
+        text = "First para.\n\n" + "word " * 100 + "\n\nLast para!"
+        expected = list(iter_text_windows([text], max_tokens=16, boundary="paragraph"))
+        pieces = [text[i:i + 7] for i in range(0, len(text), 7)]
+        assert list(iter_text_windows(pieces, max_tokens=16, boundary="paragraph")) == expected
+        assert expected[0]["text"] == "First para."
+        assert expected[-1]["text"].endswith("\n\nLast para!")
+        assert all(chunk["tokens"] <= 16 for chunk in expected)
+
+    def test_hard_splits_do_not_depend_on_chunking(self):
+        """测试强制切分落在分隔符中间时，任意小块输入与整体输入结果一致"""
+        import random
+
+        from server.tools.text_processing import iter_text_windows
+
+        words = ["ab", "word ", "x. ", "Y!   ", "\n\n", "\n \n", "  ", "!!", "。", "longwordwithoutspaces"]
+        rng = random.Random(0)
+        for _ in range(300):
+            text = "".join(rng.choice(words) for _ in range(50))
+            max_tokens = rng.randint(1, 6)
+            options = {"max_tokens": max_tokens, "overlap_tokens": rng.randint(0, max_tokens - 1)}
+            for boundary in ("paragraph", "sentence", "none"):
+                expected = list(iter_text_windows([text], boundary=boundary, **options))
+                size = rng.randint(1, 9)
+                pieces = [text[i:i + size] for i in range(0, len(text), size)]
+                assert list(iter_text_windows(pieces, boundary=boundary, **options)) == expected
+
+    def test_invalid_arguments(self):
+        """测试参数校验"""
+        from server.tools.text_processing import iter_text_windows
+
+        with pytest.raises(ValueError, match="overlap_tokens"):
+            list(iter_text_windows(["abc"], max_tokens=4, overlap_tokens=4))
+        with pytest.raises(ValueError, match="max_tokens"):
+            list(iter_text_windows(["abc"], max_tokens=0))
+
+
+class TestTextToolsOnFiles:
+    """文本工具直接处理工作目录文件测试"""
+
+    @pytest.fixture
+    def text_tools(self, tool_caller):
+        from server.tools.text_processing import register_text_tools
+
+        return tool_caller(register_text_tools)
+
+    async def test_file_matches_text(self, text_tools, monkeypatch):
+        """测试跨块流式读取文件与直接传入文本结果一致"""
+        from server.tools import text_processing
+
+        monkeypatch.setattr(text_processing, "ANALYZE_CHUNK_SIZE", 5)
+        content = "Mail a@example.com or visit https://example.org/x\nSecond line. Bye!\n"
+        (text_tools.workspace / "doc.txt").write_text(content, encoding="utf-8")
+
+        for name in ("count_words", "text_statistics"):
+            assert await text_tools(name, file_path="doc.txt") == await text_tools(name, text=content)
+        assert await text_tools("extract_emails", file_path="doc.txt") == ["a@example.com"]
+        assert await text_tools("extract_urls", file_path="doc.txt") == ["https://example.org/x"]
+        assert await text_tools("extract_entities", file_path="doc.txt", kinds=["url", "email"]) == {
+            "url": ["https://example.org/x"],
+            "email": ["a@example.com"],
+        }
+
+    async def test_chunk_file(self, text_tools):
+        """测试对工作目录文件分块并限制块数"""
+        (text_tools.workspace / "doc.txt").write_text("One. Two. Three. Four.", encoding="utf-8")
+
+        result = await text_tools("chunk_text", file_path="doc.txt", max_tokens=2, max_chunks=3)
+        assert [chunk["text"] for chunk in result["chunks"]] == ["One.", "Two.", "Three."]
+        assert result["count"] == 3
+        assert result["truncated"] is True
+
+    async def test_replace_in_files(self, text_tools):
+        """测试多文件查找替换：预览不写入，正式执行原子写入并保留换行符"""
+        src = text_tools.workspace / "src"
+        src.mkdir()
+        (src / "a.py").write_bytes(b"old_name = 1\r\nprint(old_name)\r\n")
+        (src / "b.py").write_text("nothing here\n")
+        (src / "c.txt").write_text("old_name\n")
+        (src / "d.py").write_bytes(b"\0old_name")
+
+        preview = await text_tools(
+            "replace_in_files", pattern=r"old_(\w+)", replacement=r"new_\1",
+            include=["**/*.py"], use_regex=True,
+        )
+        assert preview["files_matched"] == 1
+        assert preview["total_matches"] == 2
+        assert preview["skipped"] == 1
+        assert preview["files"][0]["preview"][1] == {"line": 2, "match": "old_name", "replacement": "new_name"}
+        assert (src / "a.py").read_bytes() == b"old_name = 1\r\nprint(old_name)\r\n"
+
+        result = await text_tools(
+            "replace_in_files", pattern="old_name", replacement="new_name",
+            include=["**/*.py"], dry_run=False,
+        )
+        assert [(f["path"], f["matches"]) for f in result["files"]] == [("src/a.py", 2)]
+        assert (src / "a.py").read_bytes() == b"new_name = 1\r\nprint(new_name)\r\n"
+        assert (src / "c.txt").read_text() == "old_name\n"
+
+    async def test_input_validation(self, text_tools):
+        """测试输入参数与路径校验"""
+        with pytest.raises(Exception, match="either text or file_path"):
+            await text_tools("count_words")
+        with pytest.raises(Exception, match="either text or file_path"):
+            await text_tools("count_words", text="a", file_path="a.txt")
+        with pytest.raises(Exception, match="Access denied"):
+            await text_tools("text_statistics", file_path="../secret.txt")
+        with pytest.raises(Exception, match="not found"):
+            await text_tools("extract_emails", file_path="missing.txt")
+
+
 class TestFileOperationTools:
     """文件操作工具测试"""
 
@@ -169,6 +726,747 @@ class TestFileOperationTools:
         test_file.unlink(missing_ok=True)
 
 
+@pytest.fixture
+def tool_caller(tmp_path, monkeypatch):
+    """
+    返回工具调用函数的工厂：用给定的 register_* 函数注册到新的 FastMCP 实例，
+    安全目录指向临时目录。调用函数带有 workspace 与 mcp 属性。
+    """
+    from mcp.server.fastmcp import FastMCP
+
+    from server.tools import file_operations
+
+    monkeypatch.setattr(file_operations, "SAFE_DIR", tmp_path)
+
+    def build(*registers):
+        mcp = FastMCP("test")
+        for register in registers:
+            register(mcp)
+
+        async def call(name, **arguments):
+            # 与真实调用一致地经过输出 schema 校验
+            result = await mcp._tool_manager.call_tool(name, arguments, convert_result=True)
+            if not isinstance(result, tuple):
+                # 没有输出 schema 的工具只返回文本内容
+                return json.loads(result[0].text)
+            structured = result[1]
+            if mcp._tool_manager.get_tool(name).fn_metadata.wrap_output:
+                return structured["result"]
+            return structured
+
+        call.workspace = tmp_path
+        call.mcp = mcp
+        return call
+
+    return build
+
+
+@pytest.fixture
+def file_tools(tool_caller):
+    """注册文件操作工具"""
+    from server.tools.file_operations import register_file_tools
+
+    return tool_caller(register_file_tools)
+
+
+class TestWalkDirectory:
+    """递归遍历工具测试"""
+
+    @pytest.fixture
+    def tree(self, file_tools):
+        root = file_tools.workspace
+        for relative in ["a.py", "b.txt", "src/c.py", "src/pkg/d.py", "node_modules/e.py"]:
+            path = root / relative
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("x")
+        return file_tools
+
+    async def test_include_exclude(self, tree):
+        """测试包含/排除模式与排除目录剪枝"""
+        result = await tree("walk_directory", include=["*.py"], exclude=["node_modules"])
+        assert sorted(e["path"] for e in result["entries"]) == ["a.py", "src/c.py", "src/pkg/d.py"]
+
+        result = await tree("walk_directory", include=["src/**/*.py"])
+        assert sorted(e["path"] for e in result["entries"]) == ["src/c.py", "src/pkg/d.py"]
+
+    async def test_depth_and_result_limits(self, tree):
+        """测试最大深度与结果数量限制"""
+        result = await tree("walk_directory", directory_path="src", max_depth=0)
+        assert [e["path"] for e in result["entries"]] == ["src/c.py"]
+
+        result = await tree("walk_directory", max_results=2)
+        assert result["count"] == 2
+        assert result["truncated"] is True
+
+    async def test_outside_workspace_rejected(self, tree):
+        """测试遍历工作目录之外的路径被拒绝"""
+        with pytest.raises(Exception, match="Access denied"):
+            await tree("walk_directory", directory_path="..")
+
+
+class TestReadTextFileRanges:
+    """read_text_file 区间读取测试"""
+
+    async def test_full_read_line_count(self, file_tools):
+        """测试整文件读取与行数统计"""
+        (file_tools.workspace / "a.txt").write_text("one\ntwo\nthree\n")
+        result = await file_tools("read_text_file", file_path="a.txt")
+        assert result["content"] == "one\ntwo\nthree\n"
+        assert result["lines"] == 4
+
+    async def test_byte_range_with_cursor(self, file_tools):
+        """测试按字节分页读取并使用续读游标"""
+        (file_tools.workspace / "b.txt").write_text("héllo wörld")
+        chunks = []
+        offset = 0
+        while offset is not None:
+            result = await file_tools("read_text_file", file_path="b.txt", offset=offset, limit=2)
+            chunks.append(result["content"])
+            offset = result["next_offset"]
+        assert "".join(chunks) == "héllo wörld"
+        assert result["eof"] is True
+
+    async def test_line_range(self, file_tools):
+        """测试按行区间读取"""
+        (file_tools.workspace / "c.txt").write_text("\n".join(f"line{i}" for i in range(1, 11)))
+        result = await file_tools("read_text_file", file_path="c.txt", start_line=3, end_line=5)
+        assert result["content"] == "line3\nline4\nline5\n"
+        assert result["next_line"] == 6
+        assert result["lines"] == 10
+
+        result = await file_tools("read_text_file", file_path="c.txt", start_line=9)
+        assert result["content"] == "line9\nline10"
+        assert result["eof"] is True
+
+    async def test_total_line_count_is_cached(self, file_tools, monkeypatch):
+        """测试分页读取只在文件变化后重新统计总行数"""
+        from server.tools import file_operations
+
+        calls = []
+        original = file_operations._count_lines
+        monkeypatch.setattr(file_operations, "_count_lines", lambda path: calls.append(path) or original(path))
+        target = file_tools.workspace / "log.txt"
+        target.write_text("".join(f"entry {i}\n" for i in range(100)))
+
+        for offset in (0, 100, 200):
+            result = await file_tools("read_text_file", file_path="log.txt", offset=offset, limit=100)
+            assert result["lines"] == 101
+        result = await file_tools("read_text_file", file_path="log.txt", start_line=10, end_line=20)
+        assert result["lines"] == 101
+        assert len(calls) == 1
+
+        target.write_text("a\nb\n")
+        result = await file_tools("read_text_file", file_path="log.txt", offset=0, limit=1)
+        assert result["lines"] == 3
+        assert len(calls) == 2
+
+    async def test_mixed_range_modes_rejected(self, file_tools):
+        """测试字节与行区间参数不能混用"""
+        (file_tools.workspace / "d.txt").write_text("x")
+        with pytest.raises(Exception, match="either offset/limit"):
+            await file_tools("read_text_file", file_path="d.txt", offset=0, start_line=1)
+
+
+class TestListDirectoryPagination:
+    """list_directory 分页测试"""
+
+    async def test_cursor_pagination(self, file_tools):
+        """测试按游标分页遍历完整目录"""
+        for i in range(7):
+            (file_tools.workspace / f"f{i}.txt").write_text("x" * i)
+        (file_tools.workspace / "sub").mkdir()
+
+        seen_files, seen_dirs = [], []
+        cursor = None
+        while True:
+            result = await file_tools("list_directory", page_size=3, cursor=cursor)
+            seen_files += result["files"]
+            seen_dirs += result["directories"]
+            cursor = result["next_cursor"]
+            if cursor is None:
+                break
+
+        assert seen_files == [f"f{i}.txt" for i in range(7)]
+        assert seen_dirs == ["sub"]
+
+    async def test_include_details(self, file_tools):
+        """测试返回文件大小与修改时间"""
+        (file_tools.workspace / "big.txt").write_text("hello")
+        result = await file_tools("list_directory", include_details=True)
+        assert result["details"]["big.txt"]["size_bytes"] == 5
+        assert "next_cursor" not in result
+
+
+class TestFileIOPool:
+    """文件 I/O 线程池测试"""
+
+    async def test_slow_io_does_not_block_event_loop(self):
+        """测试慢速 I/O 在线程池中执行时不阻塞事件循环"""
+        import asyncio
+        import time
+
+        from server.tools.file_operations import run_in_io_pool
+
+        slow = asyncio.create_task(run_in_io_pool(time.sleep, 0.3))
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        assert time.perf_counter() - start < 0.2
+        await slow
+
+    async def test_queue_full_rejected(self, monkeypatch):
+        """测试排队已满时立即拒绝"""
+        import asyncio
+        import threading
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+
+        from server.tools import file_operations
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        monkeypatch.setattr(file_operations, "_io_executor", executor)
+        monkeypatch.setattr(file_operations, "_io_slots", threading.BoundedSemaphore(1))
+
+        busy = asyncio.create_task(file_operations.run_in_io_pool(time.sleep, 0.2))
+        await asyncio.sleep(0)
+        with pytest.raises(RuntimeError, match="queue is full"):
+            await file_operations.run_in_io_pool(time.sleep, 0)
+        await busy
+        executor.shutdown()
+
+
+class TestWriteTextFileModes:
+    """write_text_file 追加与局部修改测试"""
+
+    async def test_append(self, file_tools):
+        """测试追加模式"""
+        await file_tools("write_text_file", file_path="log.txt", content="a\n", mode="append")
+        await file_tools("write_text_file", file_path="log.txt", content="b\n", mode="append")
+        assert (file_tools.workspace / "log.txt").read_text() == "a\nb\n"
+
+    async def test_patch_lines(self, file_tools):
+        """测试按行替换与插入"""
+        target = file_tools.workspace / "f.txt"
+        target.write_text("1\n2\n3\n4\n")
+
+        await file_tools("write_text_file", file_path="f.txt", content="two\nthree",
+                         mode="patch_lines", start_line=2, end_line=3)
+        assert target.read_text() == "1\ntwo\nthree\n4\n"
+
+        await file_tools("write_text_file", file_path="f.txt", content="zero\n",
+                         mode="patch_lines", start_line=1, end_line=0)
+        assert target.read_text() == "zero\n1\ntwo\nthree\n4\n"
+
+    async def test_patch_last_line_keeps_trailing_newline(self, file_tools):
+        """测试替换最后一行时保留文件末尾的换行符"""
+        target = file_tools.workspace / "f.txt"
+        target.write_text("a\nb\n")
+        await file_tools("write_text_file", file_path="f.txt", content="X", mode="patch_lines", start_line=2)
+        assert target.read_text() == "a\nX\n"
+
+        target.write_text("a\nb")
+        await file_tools("write_text_file", file_path="f.txt", content="X", mode="patch_lines", start_line=2)
+        assert target.read_text() == "a\nX"
+
+    async def test_patch_bytes(self, file_tools):
+        """测试按字节区间替换"""
+        target = file_tools.workspace / "g.txt"
+        target.write_text("hello world")
+        result = await file_tools("write_text_file", file_path="g.txt", content="there",
+                                  mode="patch_bytes", offset=6, length=5)
+        assert target.read_text() == "hello there"
+        assert result["size_bytes"] == 11
+
+        with pytest.raises(Exception, match="exceeds file size"):
+            await file_tools("write_text_file", file_path="g.txt", content="x",
+                             mode="patch_bytes", offset=10, length=5)
+
+    async def test_overwrite_is_atomic_and_leaves_no_temp_files(self, file_tools):
+        """测试覆盖写入后不残留临时文件"""
+        await file_tools("write_text_file", file_path="h.txt", content="old")
+        await file_tools("write_text_file", file_path="h.txt", content="new", overwrite=True)
+        assert [p.name for p in file_tools.workspace.iterdir()] == ["h.txt"]
+        assert (file_tools.workspace / "h.txt").read_text() == "new"
+
+    async def test_overwrite_through_symlink_keeps_link(self, file_tools):
+        """测试通过符号链接覆盖写入时更新其指向的文件，链接本身保留"""
+        target = file_tools.workspace / "real.txt"
+        target.write_text("old")
+        link = file_tools.workspace / "link.txt"
+        link.symlink_to("real.txt")
+
+        await file_tools("write_text_file", file_path="link.txt", content="new", overwrite=True)
+        await file_tools("write_files", files=[{"path": "link.txt", "content": "newer", "mode": "overwrite"}])
+        assert link.is_symlink()
+        assert target.read_text() == "newer"
+        assert sorted(p.name for p in file_tools.workspace.iterdir()) == ["link.txt", "real.txt"]
+
+
+class TestWriteFiles:
+    """批量写入工具测试"""
+
+    async def test_batch_write_with_per_file_results(self, file_tools):
+        """测试批量写入及逐文件结果"""
+        (file_tools.workspace / "exists.txt").write_text("keep")
+        files = [{"path": f"gen/pkg{i % 3}/m{i}.py", "content": f"# {i}\n"} for i in range(10)]
+        files.append({"path": "exists.txt", "content": "new"})
+        files.append({"path": "log.txt", "content": "line\n", "mode": "append"})
+
+        result = await file_tools("write_files", files=files)
+        assert result["written"] == 11
+        assert result["failed"] == 1
+        assert result["results"][10]["status"] == "error"
+        assert (file_tools.workspace / "gen/pkg1/m4.py").read_text() == "# 4\n"
+        assert (file_tools.workspace / "exists.txt").read_text() == "keep"
+
+    async def test_unsafe_path_rejects_whole_batch(self, file_tools):
+        """测试任一路径越界时整批拒绝"""
+        files = [{"path": "ok.txt", "content": "x"}, {"path": "../evil.txt", "content": "x"}]
+        with pytest.raises(Exception, match="Access denied"):
+            await file_tools("write_files", files=files)
+        assert not (file_tools.workspace / "ok.txt").exists()
+
+
+class TestHashFiles:
+    """文件摘要工具测试"""
+
+    async def test_digests_and_cache_reuse(self, file_tools):
+        """测试摘要计算与未变化文件的缓存复用"""
+        import hashlib
+
+        (file_tools.workspace / "src").mkdir()
+        (file_tools.workspace / "src" / "a.txt").write_text("alpha")
+        (file_tools.workspace / "src" / "b.txt").write_text("beta")
+
+        first = await file_tools("hash_files", directory_path="src")
+        assert first["digests"]["src/a.txt"] == hashlib.sha256(b"alpha").hexdigest()
+        assert first["count"] == 2
+
+        (file_tools.workspace / "src" / "b.txt").write_text("beta v2")
+        second = await file_tools("hash_files", paths=["src/a.txt", "src/b.txt", "missing.txt"])
+        assert second["cached"] == 1
+        assert second["digests"]["src/b.txt"] == hashlib.sha256(b"beta v2").hexdigest()
+        assert "missing.txt" in second["errors"]
+
+
+class TestReadCache:
+    """文件读取缓存测试"""
+
+    async def test_hit_and_invalidate_on_write(self, file_tools, monkeypatch):
+        """测试重复读取命中缓存，写入后失效"""
+        from server.tools import file_operations
+
+        monkeypatch.setattr(file_operations, "read_cache", file_operations.ReadCache(1024))
+        await file_tools("write_json_file", file_path="cfg.json", data={"v": 1})
+        for _ in range(3):
+            result = await file_tools("read_json_file", file_path="cfg.json")
+        assert result["data"] == {"v": 1}
+
+        await file_tools("write_json_file", file_path="cfg.json", data={"v": 2}, overwrite=True)
+        result = await file_tools("read_json_file", file_path="cfg.json")
+        assert result["data"] == {"v": 2}
+
+        stats = await file_tools("file_cache_stats")
+        assert stats["hits"] == 2
+        assert stats["misses"] == 2
+        assert stats["invalidations"] == 1
+
+    def test_external_change_and_eviction(self, tmp_path):
+        """测试外部修改被检测到，超出预算时淘汰最久未用条目"""
+        from server.tools.file_operations import ReadCache
+
+        cache = ReadCache(max_bytes=10)
+        a, b = tmp_path / "a.txt", tmp_path / "b.txt"
+        a.write_text("aaaaaa")
+        b.write_text("bbbbbb")
+
+        def load(path):
+            return path.read_text()
+
+        assert cache.get_or_load(a, "text", load) == "aaaaaa"
+        a.write_text("changed!")
+        assert cache.get_or_load(a, "text", load) == "changed!"
+        cache.get_or_load(b, "text", load)
+
+        stats = cache.stats()
+        assert stats["evictions"] == 1
+        assert stats["bytes"] <= 10
+
+
+class TestReadJsonProjection:
+    """read_json_file 路径投影与分页测试"""
+
+    DOC = {
+        "meta": {"name": "demo"},
+        "items": [{"id": i, "tags": ["t"] * (i % 3)} for i in range(100)],
+    }
+
+    @pytest.fixture(params=["memory", "stream"])
+    def json_tools(self, request, file_tools, monkeypatch):
+        """分别以内存投影和流式解析两种方式运行"""
+        import json
+
+        from server.tools import file_operations
+
+        if request.param == "stream":
+            monkeypatch.setattr(file_operations, "JSON_STREAM_THRESHOLD", 0)
+            monkeypatch.setattr(file_operations, "READ_CHUNK_SIZE", 16)
+        (file_tools.workspace / "doc.json").write_text(json.dumps(self.DOC))
+        (file_tools.workspace / "list.json").write_text(json.dumps(list(range(25))))
+        return file_tools
+
+    async def test_path_projection(self, json_tools):
+        """测试 JSON 路径投影"""
+        result = await json_tools("read_json_file", file_path="doc.json", path="$.items[0:5].id")
+        assert result["data"] == [0, 1, 2, 3, 4]
+
+        result = await json_tools("read_json_file", file_path="doc.json", path="meta.name")
+        assert result["data"] == "demo"
+
+        result = await json_tools("read_json_file", file_path="doc.json", path="$.items[-1].id")
+        assert result["data"] == 99
+
+    async def test_paging_top_level_array(self, json_tools):
+        """测试顶层数组分页"""
+        pages = []
+        offset = 0
+        while offset is not None:
+            result = await json_tools("read_json_file", file_path="list.json", offset=offset, limit=10)
+            pages.append(result["data"])
+            offset = result["next_offset"]
+        assert [len(page) for page in pages] == [10, 10, 5]
+        assert sum(pages, []) == list(range(25))
+
+    async def test_missing_path(self, json_tools):
+        """测试路径不存在时报错"""
+        with pytest.raises(Exception, match="not found"):
+            await json_tools("read_json_file", file_path="doc.json", path="$.missing")
+
+
+class TestSearchWorkspace:
+    """全文检索工具测试"""
+
+    @pytest.fixture
+    def search_tools(self, tool_caller):
+        from server.tools.search import register_search_tools
+
+        return tool_caller(register_search_tools)
+
+    async def test_ranked_hits_with_line_numbers(self, search_tools):
+        """测试检索结果包含行号与摘要"""
+        docs = search_tools.workspace / "docs"
+        docs.mkdir()
+        (docs / "a.md").write_text("intro\nthe streaming parser\nend\n")
+        (search_tools.workspace / "b.txt").write_text("parser parser streaming\n")
+
+        result = await search_tools("search_workspace", query="streaming parser")
+        assert result["count"] == 2
+        assert {(hit["file_path"], hit["line"]) for hit in result["hits"]} == {
+            ("docs/a.md", 2), ("b.txt", 1)
+        }
+        assert "[streaming]" in result["hits"][0]["snippet"]
+
+        result = await search_tools("search_workspace", query="parser", path_prefix="docs")
+        assert [hit["file_path"] for hit in result["hits"]] == ["docs/a.md"]
+
+    async def test_incremental_refresh(self, search_tools, monkeypatch):
+        """测试文件修改与删除后索引增量更新"""
+        from server.config import settings
+
+        monkeypatch.setattr(settings, "search_refresh_interval", 0)
+        target = search_tools.workspace / "notes.txt"
+        target.write_text("alpha\n")
+        assert (await search_tools("search_workspace", query="alpha"))["count"] == 1
+
+        result = await search_tools("search_workspace", query="alpha")
+        assert result["updated_files"] == 0
+
+        target.write_text("beta gamma\n")
+        assert (await search_tools("search_workspace", query="alpha"))["count"] == 0
+        assert (await search_tools("search_workspace", query="gamma"))["count"] == 1
+
+        target.unlink()
+        result = await search_tools("search_workspace", query="gamma")
+        assert result["count"] == 0
+        assert result["removed_files"] == 1
+
+    async def test_refresh_is_throttled(self, search_tools, monkeypatch):
+        """测试刷新间隔内的重复检索跳过扫描"""
+        from server.config import settings
+
+        monkeypatch.setattr(settings, "search_refresh_interval", 60)
+        (search_tools.workspace / "notes.txt").write_text("alpha\n")
+        assert (await search_tools("search_workspace", query="alpha"))["refreshed"] is True
+
+        (search_tools.workspace / "more.txt").write_text("alpha\n")
+        result = await search_tools("search_workspace", query="alpha")
+        assert (result["refreshed"], result["count"]) == (False, 1)
+
+    async def test_index_is_outside_workspace(self, search_tools, file_tools):
+        """测试索引文件不出现在工作目录中"""
+        (search_tools.workspace / "notes.txt").write_text("alpha\n")
+        await search_tools("search_workspace", query="alpha")
+        assert [p.name for p in search_tools.workspace.iterdir()] == ["notes.txt"]
+        result = await file_tools("walk_directory")
+        assert [entry["path"] for entry in result["entries"]] == ["notes.txt"]
+
+
+class TestFindNearDuplicates:
+    """近似重复文档检测测试"""
+
+    @pytest.fixture
+    def dedup_tools(self, tool_caller):
+        from server.tools.similarity import register_similarity_tools
+
+        return tool_caller(register_similarity_tools)
+
+    async def test_clusters_and_signature_cache(self, dedup_tools):
+        """测试相似文件被聚为一簇，未变化文件复用签名"""
+        base = " ".join(f"token{i}" for i in range(300))
+        (dedup_tools.workspace / "a.txt").write_text(base)
+        (dedup_tools.workspace / "b.txt").write_text(base + " extra words at the end")
+        (dedup_tools.workspace / "c.txt").write_text(" ".join(f"other{i}" for i in range(300)))
+        (dedup_tools.workspace / "blob.bin").write_bytes(b"\0\1\2")
+
+        result = await dedup_tools("find_near_duplicates", threshold=0.8)
+        assert [cluster["files"] for cluster in result["clusters"]] == [["a.txt", "b.txt"]]
+        assert result["clusters"][0]["min_similarity"] >= 0.8
+        assert result["files_compared"] == 3
+        assert result["skipped"] == ["blob.bin"]
+
+        (dedup_tools.workspace / "c.txt").write_text(base + " changed")
+        result = await dedup_tools("find_near_duplicates", threshold=0.8)
+        assert result["signatures_computed"] == 1
+        assert result["clusters"][0]["files"] == ["a.txt", "b.txt", "c.txt"]
+
+    async def test_empty_files_skipped_and_exact_duplicates_grouped(self, dedup_tools):
+        """测试没有词的文件被跳过，完全相同的文件直接归为一簇"""
+        for i in range(50):
+            (dedup_tools.workspace / f"empty{i:02d}.txt").write_text(" ... \n" if i % 2 else "")
+        text = " ".join(f"word{i}" for i in range(200))
+        for i in range(200):
+            (dedup_tools.workspace / f"copy{i:03d}.txt").write_text(text)
+        (dedup_tools.workspace / "near.txt").write_text(text + " tail")
+
+        result = await dedup_tools("find_near_duplicates", threshold=0.9)
+        assert sorted(result["skipped"]) == [f"empty{i:02d}.txt" for i in range(50)]
+        assert result["files_compared"] == 201
+        (cluster,) = result["clusters"]
+        assert len(cluster["files"]) == 201
+        assert 0.9 <= cluster["min_similarity"] < 1.0
+
+        result = await dedup_tools("find_near_duplicates", threshold=0.9)
+        assert len(result["skipped"]) == 50
+
+    def test_similarity_estimate(self):
+        """测试签名相似度估计接近真实 Jaccard 相似度"""
+        from server.tools.similarity import MinHasher, estimate_similarity
+
+        hasher = MinHasher(256)
+        left = set(range(0, 1000))
+        right = set(range(500, 1500))
+        similarity = estimate_similarity(hasher.signature(left), hasher.signature(right))
+        assert abs(similarity - 1 / 3) < 0.1
+
+
+class TestDiffFiles:
+    """文件差异工具测试"""
+
+    @pytest.fixture
+    def diff_tools(self, tool_caller):
+        from server.tools.diff import register_diff_tools
+
+        return tool_caller(register_diff_tools)
+
+    async def test_matches_difflib_output(self, diff_tools):
+        """测试简单修改的输出与 difflib 一致"""
+        import difflib
+
+        before = [f"line {i}\n" for i in range(20)]
+        after = list(before)
+        after[3] = "changed\n"
+        after.insert(15, "inserted\n")
+        (diff_tools.workspace / "a.txt").write_text("".join(before))
+        (diff_tools.workspace / "b.txt").write_text("".join(after))
+
+        result = await diff_tools("diff_files", from_path="a.txt", to_path="b.txt", context=2)
+        expected = difflib.unified_diff(before, after, "a/a.txt", "b/b.txt", n=2, lineterm="")
+        assert result["diff"] == "".join(
+            line if line.endswith("\n") else line + "\n" for line in expected
+        )
+        assert (result["added"], result["removed"], result["hunks"]) == (2, 1, 2)
+
+    async def test_identical_missing_newline_and_truncation(self, diff_tools):
+        """测试相同文件、末尾无换行与输出截断"""
+        (diff_tools.workspace / "a.txt").write_text("x\ny")
+        (diff_tools.workspace / "b.txt").write_text("x\nz")
+        result = await diff_tools("diff_files", from_path="a.txt", to_path="a.txt")
+        assert result["identical"] is True
+        assert result["diff"] == ""
+
+        result = await diff_tools("diff_files", from_path="a.txt", to_path="b.txt")
+        assert result["diff"].endswith("-y\n\\ No newline at end of file\n+z\n\\ No newline at end of file\n")
+
+        result = await diff_tools("diff_files", from_path="a.txt", to_path="b.txt", max_lines=3)
+        assert result["truncated"] is True
+        assert len(result["diff"].splitlines()) == 3
+
+    async def test_only_newline_splits_lines(self, diff_tools):
+        """测试换页符等字符不会被当作行分隔符"""
+        (diff_tools.workspace / "a.txt").write_text("page one\x0cstill one\nshared\n")
+        (diff_tools.workspace / "b.txt").write_text("page one\x0cchanged\nshared\n")
+        result = await diff_tools("diff_files", from_path="a.txt", to_path="b.txt")
+        assert result["diff"] == (
+            "--- a/a.txt\n+++ b/b.txt\n@@ -1,2 +1,2 @@\n"
+            "-page one\x0cstill one\n+page one\x0cchanged\n shared\n"
+        )
+        assert "No newline" not in result["diff"]
+
+    def test_minimal_diff_on_repetitive_lines(self):
+        """测试没有唯一行锚点时仍能得到最小差异"""
+        from server.tools.diff import match_lines
+
+        a = [1, 2, 1, 2, 1, 2, 3]
+        b = [2, 1, 2, 1, 3, 3]
+        matches = match_lines(a, b)
+        assert len(matches) == 5
+        assert all(a[i] == b[j] for i, j in matches)
+
+
+class TestAggregateFile:
+    """数据集分组聚合测试"""
+
+    @pytest.fixture
+    def dataset_tools(self, tool_caller):
+        from server.tools.datasets import register_dataset_tools
+
+        return tool_caller(register_dataset_tools)
+
+    async def test_grouped_csv(self, dataset_tools):
+        """测试按列分组的求和、均值、缺失计数与分位数"""
+        (dataset_tools.workspace / "sales.csv").write_text(
+            "region,amount,note\n"
+            "east,10,a\n"
+            "west,5,b\n"
+            "east,30,c\n"
+            "east,,d\n"
+            "west,n/a,e\n"
+        )
+        result = await dataset_tools(
+            "aggregate_file", file_path="sales.csv", columns=["amount"], group_by=["region"], quantiles=[0.5],
+        )
+        assert (result["format"], result["rows"], result["group_count"]) == ("csv", 5, 2)
+        groups = {group["key"]["region"]: group for group in result["groups"]}
+        east = groups["east"]["columns"]["amount"]
+        assert groups["east"]["rows"] == 3
+        assert (east["count"], east["sum"], east["mean"], east["missing"]) == (2, 40.0, 20.0, 1)
+        assert east["quantiles"]["p50"] == pytest.approx(20.0)
+        west = groups["west"]["columns"]["amount"]
+        assert (west["count"], west["missing"]) == (1, 1)
+
+    async def test_jsonl_without_groups(self, dataset_tools):
+        """测试 JSON Lines 输入与不分组的整体聚合"""
+        (dataset_tools.workspace / "events.jsonl").write_text(
+            '{"ms": 1.5, "ok": true}\n\n{"ms": 2.5}\n{"ok": false}\n'
+        )
+        result = await dataset_tools("aggregate_file", file_path="events.jsonl", columns=["ms", "ok"])
+        (group,) = result["groups"]
+        assert group["key"] == {}
+        assert group["columns"]["ms"]["sum"] == 4.0
+        assert "quantiles" not in group["columns"]["ms"]
+        assert group["columns"]["ok"] == {"count": 0, "missing": 3}
+
+    async def test_errors(self, dataset_tools):
+        """测试未知列与分组数超限"""
+        (dataset_tools.workspace / "data.csv").write_text("id,value\n1,1\n2,2\n3,3\n")
+        with pytest.raises(Exception, match="Unknown columns: missing"):
+            await dataset_tools("aggregate_file", file_path="data.csv", columns=["missing"])
+        with pytest.raises(Exception, match="More than 2 groups"):
+            await dataset_tools(
+                "aggregate_file", file_path="data.csv", columns=["value"], group_by=["id"], max_groups=2,
+            )
+        (dataset_tools.workspace / "data.txt").write_text("id\n")
+        with pytest.raises(Exception, match="Cannot detect format"):
+            await dataset_tools("aggregate_file", file_path="data.txt", columns=["id"])
+
+    async def test_json_array_is_rejected(self, dataset_tools):
+        """测试 .json 不再按 JSON Lines 推断，JSON 数组明确报错"""
+        (dataset_tools.workspace / "rows.json").write_text('[{"v": 1}, {"v": 2}]\n')
+        with pytest.raises(Exception, match="Cannot detect format"):
+            await dataset_tools("aggregate_file", file_path="rows.json", columns=["v"])
+        with pytest.raises(Exception, match="JSON array, not JSON Lines"):
+            await dataset_tools("aggregate_file", file_path="rows.json", columns=["v"], file_format="jsonl")
+
+        (dataset_tools.workspace / "pretty.json").write_text('\n[\n  {"v": 1}\n]\n')
+        with pytest.raises(Exception, match="JSON array, not JSON Lines"):
+            await dataset_tools("aggregate_file", file_path="pretty.json", columns=["v"], file_format="jsonl")
+
+
+class TestProfileFile:
+    """数据集画像测试"""
+
+    @pytest.fixture
+    def profile_tools(self, tool_caller):
+        from server.prompts.data_analysis import register_analysis_prompts
+        from server.tools.datasets import register_dataset_tools
+
+        return tool_caller(register_dataset_tools, register_analysis_prompts)
+
+    async def test_column_profiles(self, profile_tools):
+        """测试类型推断、空值率、基数估计、直方图与高频值"""
+        lines = ["id,score,city,joined"]
+        for i in range(1000):
+            score = "" if i % 10 == 0 else str(i % 100)
+            lines.append(f"{i},{score},{'ab'[i % 2]}town,2024-01-{i % 28 + 1:02d}")
+        (profile_tools.workspace / "people.csv").write_text("\n".join(lines) + "\n")
+
+        result = await profile_tools("profile_file", file_path="people.csv", bins=4)
+        assert (result["rows"], result["truncated"], result["cached"]) == (1000, False, False)
+        columns = {column["name"]: column for column in result["columns"]}
+        assert columns["id"]["type"] == "integer"
+        assert abs(columns["id"]["distinct"] - 1000) < 50
+        score = columns["score"]
+        assert score["null_rate"] == pytest.approx(0.1)
+        assert score["numeric"]["max"] == 99
+        assert sum(score["histogram"]) == 900
+        assert len(score["histogram"]) == 4
+        assert columns["city"]["type"] == "string"
+        assert columns["city"]["distinct"] == 2
+        assert {item["value"] for item in columns["city"]["top_values"]} == {"atown", "btown"}
+        assert columns["joined"]["type"] == "datetime"
+
+        again = await profile_tools("profile_file", file_path="people.csv", bins=4)
+        assert again["cached"] is True
+
+    async def test_jsonl_types_and_row_limit(self, profile_tools):
+        """测试 JSON Lines 的混合类型与行数上限"""
+        (profile_tools.workspace / "mixed.jsonl").write_text(
+            '{"v": 1, "flag": true}\n{"v": 2.5, "flag": null}\n{"v": "x", "flag": false}\n'
+        )
+        result = await profile_tools("profile_file", file_path="mixed.jsonl")
+        columns = {column["name"]: column for column in result["columns"]}
+        assert columns["v"]["type"] == "mixed"
+        assert columns["v"]["type_counts"] == {"float": 1, "integer": 1, "string": 1}
+        assert columns["flag"]["type"] == "boolean"
+        assert columns["flag"]["null_rate"] == pytest.approx(1 / 3)
+
+        result = await profile_tools("profile_file", file_path="mixed.jsonl", max_rows=2)
+        assert (result["rows"], result["truncated"]) == (2, True)
+
+    async def test_prompt_embeds_profile(self, profile_tools):
+        """测试数据分析提示嵌入画像摘要"""
+        (profile_tools.workspace / "data.csv").write_text("a,b\n1,x\n3,y\n")
+        result = await profile_tools.mcp.get_prompt(
+            "data_quality_assessment", {"dataset_info": "orders", "file_path": "data.csv"}
+        )
+        text = result.messages[0].content.text
+        assert "**Dataset Profile (data.csv):**" in text
+        assert "2 rows, 2 columns (csv)" in text
+        assert "- a: integer; nulls 0.0%; ~2 distinct; mean 2" in text
+
+        result = await profile_tools.mcp.get_prompt("statistical_analysis", {"hypothesis": "h", "data_info": "d"})
+        assert "Dataset Profile" not in result.messages[0].content.text
+
+
 @pytest.fixture
 def setup_test_environment():
     """设置测试环境"""